@@ -0,0 +1,26 @@
+"""
+Gunicorn settings, picked up from the working directory (scripts/deploy.sh
+starts gunicorn in the app directory). The application module is still
+given on the command line: ``mysite.wsgi`` or ``mysite.asgi``.
+
+With ``preload_app`` the master imports Django and runs the warm-up
+(tasks.warmup) once, before forking, so every worker starts with the
+imports, URL resolver and compiled templates already in memory (shared
+copy-on-write) and opens its own database connection in ``post_fork``.
+"""
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "3"))
+if os.environ.get("DJANGO_SERVING") == "asgi":
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+if preload_app:
+    os.environ.setdefault("DJANGO_WARMUP", "preload")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from tasks import warmup
+        warmup.post_fork()
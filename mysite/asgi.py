@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+# Turns on the async API views (tasks.aio); mysite.wsgi leaves them sync.
+os.environ.setdefault('DJANGO_SERVING', 'asgi')
 
 application = get_asgi_application()
+
+# Imports, URLs, templates and DB connections before the first request;
+# in the gunicorn master when preloading (see gunicorn.conf.py).
+from tasks import warmup  # noqa: E402
+
+warmup.on_load()
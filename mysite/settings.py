@@ -60,6 +60,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.middleware.RequestMetricsMiddleware',  # first: times everything below
+    'tasks.routing.ReplicaStickinessMiddleware',  # before sessions: their reads may need the primary
     'corsheaders.middleware.CorsMiddleware',  # Add this at the top
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -123,6 +125,13 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
+# Serving mode: mysite.asgi sets DJANGO_SERVING=asgi, which turns the API
+# list/detail and reminder views into async views whose ORM work runs on a
+# pool of ASYNC_DB_THREADS threads per process (tasks.aio). The pool size
+# bounds the database connections each ASGI worker opens.
+ASYNC_VIEWS = os.environ.get('DJANGO_SERVING', 'wsgi') == 'asgi'
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', '16'))
+
 # Database (use PostgreSQL via env vars)
 DATABASES = {
     'default': {
@@ -132,9 +141,84 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        # Persistent per-worker connections (opened at warm-up, see
+        # tasks.warmup), checked before reuse after an idle request.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# DB_POOL=true: connections come from a per-process pool (tasks.pooling)
+# and go back to it after every request, instead of one persistent
+# connection per thread. Under ASGI the pool must cover the ASYNC_DB_THREADS
+# ORM threads, plus a few for the views Django runs on its own threads
+# (tasks.checks warns when it does not).
+if os.environ.get('DB_POOL', 'false').lower() == 'true':
+    DATABASES['default'].update({
+        'ENGINE': 'tasks.backends.postgresql_pool',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+            'MAX_SIZE': int(os.environ.get(
+                'DB_POOL_MAX_SIZE', str(ASYNC_DB_THREADS + 4 if ASYNC_VIEWS else 10)
+            )),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+            'MAX_LIFETIME': float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+            'CHECK_AFTER': float(os.environ.get('DB_POOL_CHECK_AFTER', '30')),
+        },
+    })
+
+# Optional read replica (tasks.routing): safe reads go to it, except for a
+# client that wrote within the last REPLICA_STICKY_SECONDS.
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['tasks.routing.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+
+# Cache: Redis when REDIS_URL is set (shared by all gunicorn workers),
+# otherwise a per-process locmem cache.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'productivity',
+        }
+    }
+
+# Versioned list/API page cache (tasks.caching). Only safe with a cache that
+# every worker shares, hence tied to Redis by default.
+TASKS_CACHE_ENABLED = os.environ.get('TASKS_CACHE_ENABLED', 'true' if REDIS_URL else 'false').lower() == 'true'
+TASKS_CACHE_TIMEOUT = int(os.environ.get('TASKS_CACHE_TIMEOUT', '300'))
+
+# Worker warm-up before the first request (tasks.warmup): "background",
+# "preload" (set by gunicorn.conf.py) or "off". /health/ answers 503 until
+# the warm-up has finished.
+WARMUP_MODE = os.environ.get('DJANGO_WARMUP', 'background')
+
+# Request metrics (tasks.middleware / tasks.metrics). Each worker writes its
+# totals to METRICS_DIR, which must be shared by the workers of one host;
+# /metrics answers only with "Authorization: Bearer <METRICS_TOKEN>" (or
+# to anyone when DEBUG is on and no token is set).
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+# Log a warning when one request runs the same SQL this many times
+METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', '10'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -170,6 +254,15 @@ API_BASE_URL = os.environ.get(
     "https://ai9l8btla8.execute-api.eu-central-1.amazonaws.com/v1"
 )
 API_KEY = os.environ.get("API_KEY", "")  # only if you enable API keys later
+# Parallel requests per dispatch_reminders batch (also the HTTP pool size)
+SCHEDULER_MAX_CONCURRENCY = int(os.environ.get("SCHEDULER_MAX_CONCURRENCY", "8"))
+# Seconds before a scheduler API call counts as failed (and is retried)
+SCHEDULER_TIMEOUT = float(os.environ.get("SCHEDULER_TIMEOUT", "10"))
+
+# ---- Domain events (EventBridge via the outbox) ----
+# Dotted path to a factory returning a PutEvents-compatible client; empty
+# means boto3's "events" client. See tasks.aws_events.InMemoryEventBus.
+EVENTS_CLIENT = os.environ.get("EVENTS_CLIENT", "")
 
 
 # Logging configuration for AWS/production
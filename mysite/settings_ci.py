@@ -5,7 +5,20 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "ci.sqlite3",
-    }
+    },
+    # Stand-in replica: a second connection to the same file, so reads go
+    # through tasks.routing; the test runner mirrors it onto "default".
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "ci.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
+    # A separate database, for the router tests: they point tasks.routing
+    # at it to check which side each read and write reaches.
+    "replica_standalone": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "ci_replica.sqlite3",
+    },
 }
 
 # Fast/isolated CI defaults
@@ -19,6 +32,11 @@ CACHES = {
         "LOCATION": "ci-cache",
     }
 }
+# Single process in CI, so the locmem cache is safe for versioned caching
+TASKS_CACHE_ENABLED = True
+
+# Publish outbox events to an in-process stand-in instead of EventBridge
+EVENTS_CLIENT = "tasks.aws_events.InMemoryEventBus"
 
 # Speed up auth hashing if you ever run tests in CI
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
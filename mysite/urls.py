@@ -20,13 +20,31 @@ from rest_framework.authtoken.views import obtain_auth_token
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect
+from django.utils.crypto import constant_time_compare
+
+from tasks import metrics, warmup
 
 
 def health_check(request):
+    # Not ready until the worker has warmed up (tasks.warmup), so the load
+    # balancer never routes a first, cold request to it.
+    if not warmup.is_ready():
+        return HttpResponse("Warming up", status=503)
     return HttpResponse("OK", status=200)
 
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponse("Unauthorized", status=401)
+    elif not settings.DEBUG:
+        raise Http404
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 schema_view = get_schema_view(
    openapi.Info(
       title="Productivity App API",
@@ -40,6 +58,7 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('', lambda request: redirect('/accounts/login/'), name='root-redirect'),
     path('health/', health_check),
+    path('metrics', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('tasks/', include('tasks.urls')),
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
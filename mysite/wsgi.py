@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
 application = get_wsgi_application()
+
+# Imports, URLs, templates and DB connections before the first request;
+# in the gunicorn master when preloading (see gunicorn.conf.py).
+from tasks import warmup  # noqa: E402
+
+warmup.on_load()
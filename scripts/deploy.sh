@@ -69,6 +69,15 @@ echo "[*] Collect static…"
 python manage.py collectstatic --noinput
 
 # --- (Re)write Gunicorn systemd unit AFTER migrations succeed ---
+# DJANGO_SERVING=asgi runs uvicorn workers on mysite.asgi (async API views,
+# see tasks/aio.py); anything else keeps the sync workers on mysite.wsgi.
+# Workers, bind address and preloading come from gunicorn.conf.py.
+if [ "${DJANGO_SERVING:-wsgi}" = "asgi" ]; then
+  GUNICORN_APP="mysite.asgi"
+else
+  GUNICORN_APP="mysite.wsgi"
+fi
+
 cat > /tmp/gunicorn.service <<EOF
 [Unit]
 Description=gunicorn daemon for Django
@@ -83,7 +92,8 @@ Environment=DB_USER=$DB_USER
 Environment=DB_PASSWORD=$DB_PASS
 Environment=DB_HOST=$DB_HOST
 Environment=DB_NAME=$DB_NAME
-ExecStart=$APP_DIR/venv/bin/gunicorn --workers 3 --bind 127.0.0.1:8000 mysite.wsgi
+Environment=DJANGO_SERVING=${DJANGO_SERVING:-wsgi}
+ExecStart=$APP_DIR/venv/bin/gunicorn --config $APP_DIR/gunicorn.conf.py $GUNICORN_APP
 Restart=always
 
 [Install]
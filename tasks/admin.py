@@ -1,11 +1,23 @@
 from django.contrib import admin
-from .models import Task, Habit, Note, Event
+from .models import Task, Habit, Note, Event, RecurrenceRule, Tag
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+    ordering = ('name',)
+
+class RecurrenceRuleInline(admin.StackedInline):
+    model = RecurrenceRule
+    extra = 0
+    readonly_fields = ('ends', 'materialized_until')
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
+    inlines = (RecurrenceRuleInline,)
     list_display = ('title', 'completed', 'priority', 'due_date', 'recurring', 'created', 'last_modified')
-    list_filter = ('completed', 'priority', 'due_date', 'recurring', 'tags','groups')
-    search_fields = ('title', 'notes', 'tags')
+    list_filter = ('completed', 'priority', 'due_date', 'recurring', 'normalized_tags','groups')
+    search_fields = ('title', 'notes', '=normalized_tags__name')
     ordering = ('-created',)
     date_hierarchy = 'due_date'
     readonly_fields = ('created', 'last_modified')
@@ -26,7 +38,7 @@ class TaskAdmin(admin.ModelAdmin):
 class HabitAdmin(admin.ModelAdmin):
     list_display = ('name', 'frequency', 'last_done', 'streak', 'created', 'last_modified')
     list_filter = ('frequency', 'streak','groups')
-    search_fields = ('name', 'notes', 'tags')
+    search_fields = ('name', 'notes', '=normalized_tags__name')
     ordering = ('-streak',)
     readonly_fields = ('created', 'last_modified')
     filter_horizontal = ('groups',)      # nice M2M selector
@@ -45,8 +57,8 @@ class HabitAdmin(admin.ModelAdmin):
 @admin.register(Note)
 class NoteAdmin(admin.ModelAdmin):
     list_display = ('title', 'created', 'last_modified', 'tags')
-    list_filter = ('tags', 'groups')
-    search_fields = ('title', 'content', 'tags')
+    list_filter = ('normalized_tags', 'groups')
+    search_fields = ('title', 'content', '=normalized_tags__name')
     ordering = ('-created',)
     readonly_fields = ('created', 'last_modified')
     filter_horizontal = ('groups',)      # nice M2M selector
@@ -54,8 +66,8 @@ class NoteAdmin(admin.ModelAdmin):
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
     list_display = ('title', 'event_date', 'location', 'reminder', 'created', 'last_modified')
-    list_filter = ('event_date', 'tags','groups')
-    search_fields = ('title', 'description', 'tags')
+    list_filter = ('event_date', 'normalized_tags','groups')
+    search_fields = ('title', 'description', '=normalized_tags__name')
     ordering = ('event_date',)
     readonly_fields = ('created', 'last_modified')
     filter_horizontal = ('groups',)      # nice M2M selector
@@ -0,0 +1,90 @@
+"""
+Async request path for the ASGI deployment (``mysite.asgi`` under uvicorn
+workers, see scripts/deploy.sh).
+
+Under ASGI Django runs a plain sync view through
+``sync_to_async(thread_sensitive=True)``: every sync view of the process
+shares one thread, so a single slow query stalls all concurrent requests.
+Views wrapped with ``offload`` are coroutines instead; their ORM and DRF
+work runs with ``thread_sensitive=False`` on a pool of ``ASYNC_DB_THREADS``
+threads, and the event loop stays free to accept and park hundreds of
+requests while they wait for a thread. The pool size is also the most
+database connections a process opens, so it is the knob to size against
+the server's connection limit.
+
+Each pool thread has its own connection (Django's are thread-local) and
+handles it like a WSGI request would: ``close_old_connections`` before and
+after every call, honouring CONN_MAX_AGE.
+
+Streamed bodies go through ``serve_iter``: Django would otherwise read a
+sync iterator to the end, into memory, before sending the first byte. Each
+chunk is produced by its own call on the pool, possibly on another thread,
+so such iterators must not keep a cursor open from one chunk to the next.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_DONE = object()
+
+
+def executor():
+    # Created on first use, i.e. in the worker process after the fork.
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'ASYNC_DB_THREADS', 16), thread_name_prefix='orm'
+        )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    close_old_connections()
+    try:
+        result = func(*args, **kwargs)
+        # Render DRF/template responses here rather than on the single
+        # thread Django would otherwise use for it.
+        if callable(getattr(result, 'render', None)) and not getattr(result, 'is_rendered', True):
+            result.render()
+        return result
+    finally:
+        close_old_connections()
+
+
+async def run(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` on the ORM thread pool."""
+    return await sync_to_async(_call, thread_sensitive=False, executor=executor())(
+        func, args, kwargs
+    )
+
+
+def offload(view):
+    """Async version of a sync view; the sync view runs on the ORM pool."""
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await run(view, request, *args, **kwargs)
+    return async_view
+
+
+def serve(view):
+    """``view`` as deployed: offloaded when serving over ASGI, else unchanged."""
+    return offload(view) if getattr(settings, 'ASYNC_VIEWS', False) else view
+
+
+async def offload_iter(iterable):
+    """Async iterator over ``iterable``; each item is produced on the ORM pool."""
+    iterator = iter(iterable)
+    while True:
+        item = await run(next, iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+def serve_iter(iterable):
+    """Streamed content as deployed: offloaded when serving over ASGI, else unchanged."""
+    return offload_iter(iterable) if getattr(settings, 'ASYNC_VIEWS', False) else iterable
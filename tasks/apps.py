@@ -1,5 +1,6 @@
 
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 class AccountsConfig(AppConfig):
     name = "accounts"
@@ -13,3 +14,9 @@ class TasksConfig(AppConfig):
 
     def ready(self):
         import tasks.signals  # ensures signals are registered
+        import tasks.checks  # noqa: F401
+        from tasks import metrics, middleware
+        if metrics.enabled():
+            # Before any connection opens, so each one gets the query observer.
+            connection_created.connect(middleware.install_observer,
+                                       dispatch_uid='tasks.middleware.install_observer')
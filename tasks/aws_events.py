@@ -1,30 +1,75 @@
 import os, json, boto3
+from django.conf import settings
+from django.utils.module_loading import import_string
 
 REGION = os.getenv("AWS_DEFAULT_REGION", "eu-central-1")
 BUS_NAME = os.getenv("APP_EVENT_BUS_NAME", "domain-events-bus")
+SOURCE = "yourapp.tasks"
+
+# PutEvents accepts at most 10 entries per call.
+MAX_ENTRIES_PER_CALL = 10
 
 _events = None
 def _client():
     global _events
     if _events is None:
-        _events = boto3.client("events", region_name=REGION)
+        # settings.EVENTS_CLIENT lets CI and local runs swap in a stand-in
+        # such as InMemoryEventBus instead of talking to EventBridge.
+        factory = getattr(settings, "EVENTS_CLIENT", "")
+        if factory:
+            _events = import_string(factory)()
+        else:
+            _events = boto3.client("events", region_name=REGION)
     return _events
 
-def put_task_created(detail: dict):
-    """
-    detail schema we send:
-    {
-      "task_id": str,
-      "owner_id": str,
-      "owner_email": str,
-      "owner_name": str,
-      "task_title": str,
-      "dueAtIso": "YYYY-MM-DDTHH:MM:SSZ"
-    }
-    """
-    _client().put_events(Entries=[{
-        "Source": "yourapp.tasks",
-        "DetailType": "TaskCreated",
+def build_entry(detail_type: str, detail: dict, source: str = SOURCE):
+    return {
+        "Source": source,
+        "DetailType": detail_type,
         "EventBusName": BUS_NAME,
         "Detail": json.dumps(detail),
-    }])
+    }
+
+def put_entries(entries, client=None):
+    """
+    Send up to MAX_ENTRIES_PER_CALL entries in a single PutEvents call.
+    Returns a list with one item per entry: None when it was accepted,
+    otherwise the error message EventBridge reported for it.
+    """
+    if len(entries) > MAX_ENTRIES_PER_CALL:
+        raise ValueError(f"PutEvents accepts at most {MAX_ENTRIES_PER_CALL} entries")
+    response = (client or _client()).put_events(Entries=entries)
+    results = response.get("Entries") or [{} for _ in entries]
+    return [
+        None if "ErrorCode" not in r else f"{r['ErrorCode']}: {r.get('ErrorMessage', '')}"
+        for r in results
+    ]
+
+
+class InMemoryEventBus:
+    """
+    Local stand-in for the boto3 ``events`` client. Accepted entries are kept
+    in ``self.entries``; ``fail_every`` rejects every n-th entry so partial
+    failure handling can be exercised.
+    """
+
+    def __init__(self, fail_every=0):
+        self.entries = []
+        self.calls = 0
+        self.fail_every = fail_every
+        self._seen = 0
+
+    def put_events(self, Entries):
+        if len(Entries) > MAX_ENTRIES_PER_CALL:
+            raise ValueError("Too many entries")
+        self.calls += 1
+        results, failed = [], 0
+        for entry in Entries:
+            self._seen += 1
+            if self.fail_every and self._seen % self.fail_every == 0:
+                failed += 1
+                results.append({"ErrorCode": "InternalFailure", "ErrorMessage": "simulated"})
+            else:
+                self.entries.append(entry)
+                results.append({"EventId": str(len(self.entries))})
+        return {"FailedEntryCount": failed, "Entries": results}
@@ -0,0 +1,41 @@
+"""
+PostgreSQL engine whose connections come from a per-process pool
+(tasks.pooling)::
+
+    DATABASES['default'] = {
+        'ENGINE': 'tasks.backends.postgresql_pool',
+        ...,
+        'CONN_MAX_AGE': 0,  # hand the connection back after every request
+        'POOL': {'MAX_SIZE': 10, 'TIMEOUT': 10, 'MAX_LIFETIME': 1800, 'CHECK_AFTER': 30},
+    }
+
+Everything else is Django's psycopg2 backend; only opening and closing the
+underlying connection change.
+"""
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from tasks import pooling
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        pool = pooling.get_pool(
+            self.alias,
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            self.settings_dict.get('POOL'),
+        )
+        # Django's get_new_connection records the isolation level on the
+        # wrapper; a reused connection still carries the one it was opened with.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        # The pool the connection belongs to, even if this process has forked
+        # and started new pools since.
+        self._pool = pool
+        return pool.getconn()
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pool.putconn(self.connection)
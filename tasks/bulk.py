@@ -0,0 +1,151 @@
+"""
+Batched writes behind the ``api/<resource>/bulk/`` endpoints.
+
+Every item is validated with the resource's regular serializer in a single
+pass; the valid ones are then written with one ``bulk_create`` /
+``bulk_update`` and one INSERT into the ``groups`` through table for the
+whole batch. Results are returned per item, in request order, so clients
+can tell exactly which entries were rejected.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, outbox, search, tagging
+from .membership import group_ids
+from .models import Event, Task
+
+MAX_ITEMS = 1000
+
+
+def _result(index, status, **extra):
+    return {'index': index, 'status': status, **extra}
+
+
+def _clean_groups(item, allowed):
+    """
+    Pop the optional ``groups`` list from ``item``. Returns (group ids or
+    None, error dict or None); users may only share with their own groups.
+    """
+    if not isinstance(item, dict) or 'groups' not in item:
+        return None, None
+    groups = item.pop('groups')
+    if not isinstance(groups, list) or not all(isinstance(g, int) for g in groups):
+        return None, {'groups': ['Expected a list of group ids.']}
+    foreign = set(groups) - allowed
+    if foreign:
+        return None, {'groups': [f"Not a member of group(s) {sorted(foreign)}."]}
+    return groups, None
+
+
+def set_groups(model, assignments, replace=False):
+    """
+    Attach groups for many objects at once. ``assignments`` is a list of
+    (object pk, [group ids]); with ``replace`` the previous links of those
+    objects are removed first (one DELETE).
+    """
+    through = model.groups.through
+    fk = f"{model._meta.model_name}_id"
+    if replace and assignments:
+        through.objects.filter(**{f"{fk}__in": [pk for pk, _ in assignments]}).delete()
+    through.objects.bulk_create(
+        [through(**{fk: pk, 'group_id': gid}) for pk, gids in assignments for gid in gids],
+        ignore_conflicts=True,
+    )
+
+
+def after_create(model, objs, publish=True):
+    """
+    Side effects that post_save receivers would have produced per row.
+    Without ``publish`` the TaskCreated events are left to the caller.
+    """
+    tagging.sync_many(model, [obj for obj in objs if obj.tags], replace=False)
+    search.index_objects(objs)
+    caching.bump_objects(model, objs)
+    if model is Task and publish:
+        details = [d for d in map(outbox.task_created_detail, objs) if d is not None]
+        outbox.enqueue_many("TaskCreated", details)
+
+
+def create(serializer_class, user, items):
+    model = serializer_class.Meta.model
+    allowed = set(group_ids(user))
+    results = [None] * len(items)
+    pending = []
+    for i, item in enumerate(items):
+        groups, group_error = _clean_groups(item, allowed)
+        serializer = serializer_class(data=item)
+        if serializer.is_valid() and group_error is None:
+            pending.append((i, model(user=user, **serializer.validated_data), groups))
+        else:
+            results[i] = _result(i, 400, errors={**serializer.errors, **(group_error or {})})
+
+    with transaction.atomic():
+        objs = model.objects.bulk_create([obj for _, obj, _ in pending])
+        set_groups(model, [(obj.pk, groups) for _, obj, groups in pending if groups])
+        after_create(model, objs)
+
+    for i, obj, _ in pending:
+        results[i] = _result(i, 201, data=serializer_class(obj).data)
+    return results
+
+
+def update(serializer_class, user, items):
+    model = serializer_class.Meta.model
+    allowed = set(group_ids(user))
+    ids = [item.get('id') for item in items if isinstance(item, dict)]
+    objs = model.objects.filter(user=user).in_bulk([pk for pk in ids if isinstance(pk, int)])
+
+    results = [None] * len(items)
+    changed, fields, assignments, updated = {}, set(), [], []
+    for i, item in enumerate(items):
+        obj = objs.get(item.get('id')) if isinstance(item, dict) else None
+        if obj is None:
+            results[i] = _result(i, 404, errors={'id': ['Not found.']})
+            continue
+        groups, group_error = _clean_groups(item, allowed)
+        serializer = serializer_class(obj, data=item, partial=True)
+        if not serializer.is_valid() or group_error is not None:
+            results[i] = _result(i, 400, errors={**serializer.errors, **(group_error or {})})
+            continue
+        previous_reminder = obj.reminder if model is Event else None
+        for name, value in serializer.validated_data.items():
+            setattr(obj, name, value)
+            fields.add(name)
+        if model is Event and obj.reminder_sent_at is not None and obj.reminder != previous_reminder:
+            # Re-arm a moved reminder; bulk_update() skips the pre_save
+            # receiver (signals.rearm_moved_reminder) that does it otherwise.
+            obj.reminder_sent_at = None
+            fields.add('reminder_sent_at')
+        if groups is not None:
+            assignments.append((obj.pk, groups))
+        changed[obj.pk] = obj
+        updated.append((i, obj))
+
+    now = timezone.now()
+    for obj in changed.values():
+        obj.last_modified = now  # bulk_update() bypasses auto_now
+    with transaction.atomic():
+        if changed:
+            model.objects.bulk_update(list(changed.values()), sorted(fields | {'last_modified'}))
+        caching.bump_objects(model, changed.values())
+        caching.bump_groups(gid for _, gids in assignments for gid in gids)
+        set_groups(model, assignments, replace=True)
+        if 'tags' in fields:
+            tagging.sync_many(model, list(changed.values()))
+        search.index_objects(changed.values())
+
+    for i, obj in updated:
+        results[i] = _result(i, 200, data=serializer_class(obj).data)
+    return results
+
+
+def delete(model, user, ids):
+    pks = [pk for pk in ids if isinstance(pk, int)]
+    queryset = model.objects.filter(user=user, pk__in=pks)
+    with transaction.atomic():
+        found = set(queryset.values_list('pk', flat=True))
+        queryset.delete()
+    return [
+        _result(i, 204 if pk in found else 404, id=pk)
+        for i, pk in enumerate(ids)
+    ]
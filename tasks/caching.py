@@ -0,0 +1,182 @@
+"""
+Versioned cache for list pages and API responses.
+
+Cache keys embed a version number per user and per group. Writes never
+delete entries; receivers in tasks.signals (and the bulk paths) bump the
+owner's version and the versions of the groups an object is shared with,
+which makes every key built from the old versions unreachable. Stale
+entries then simply expire. A version starts from the clock (nanoseconds)
+rather than 0, so a version key the cache evicted (locmem culls past
+MAX_ENTRIES, Redis under memory pressure) comes back with a value that no
+older key was built from.
+
+``get_or_set`` protects against stampedes: on a miss only the caller that
+wins a short ``cache.add`` lock recomputes, the others wait briefly for the
+fresh value. Hit/miss counters live in the cache too, so with the Redis
+backend they are shared by all gunicorn workers.
+
+Caching is controlled by ``settings.TASKS_CACHE_ENABLED``. It must only be
+on with a cache shared by all workers (Redis in production, locmem under
+settings_ci), otherwise version bumps would not reach the other processes.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import routing
+
+PREFIX = 'tasks'
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.05
+_MISSING = object()
+
+
+def enabled():
+    return getattr(settings, 'TASKS_CACHE_ENABLED', False)
+
+
+def timeout():
+    return getattr(settings, 'TASKS_CACHE_TIMEOUT', 300)
+
+
+def _user_key(user_id):
+    return f'{PREFIX}:v:u:{user_id}'
+
+
+def _group_key(group_id):
+    return f'{PREFIX}:v:g:{group_id}'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def _versions(keys):
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        cache.add(key, _new_version(), timeout=None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never set or evicted: a fresh version differs from every old one.
+            if not cache.add(key, _new_version(), timeout=None):
+                cache.incr(key)
+
+
+def _bump_on_commit(keys):
+    # Bumping before commit would let a concurrent request re-cache the
+    # old rows under the new version.
+    keys = set(keys)
+    if keys:
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def bump_users(user_ids):
+    if enabled():
+        _bump_on_commit(_user_key(pk) for pk in user_ids)
+
+
+def bump_groups(group_ids):
+    if enabled():
+        _bump_on_commit(_group_key(pk) for pk in group_ids)
+
+
+def shared_group_ids(model, pks):
+    """Groups the given ``model`` rows are currently shared with (one query)."""
+    through = model.groups.through
+    fk = f"{model._meta.model_name}_id"
+    return set(
+        through.objects.filter(**{f"{fk}__in": list(pks)}).values_list('group_id', flat=True)
+    )
+
+
+def bump_objects(model, objs):
+    """Invalidate everything that may show ``objs``: owners and their groups."""
+    if not enabled():
+        return
+    objs = [obj for obj in objs if obj.pk is not None]
+    if objs:
+        bump_users(obj.user_id for obj in objs)
+        bump_groups(shared_group_ids(model, [obj.pk for obj in objs]))
+
+
+def make_key(namespace, user_id, group_ids=(), params=()):
+    """
+    Key for ``namespace`` as seen by ``user_id``, valid until the user's or
+    one of ``group_ids``' versions is bumped. ``params`` distinguishes
+    pages, filters and the like.
+    """
+    version_keys = [_user_key(user_id)] + [_group_key(g) for g in sorted(group_ids)]
+    versions = _versions(version_keys)
+    stamp = ','.join(str(versions.get(k) or _new_version()) for k in version_keys)
+    digest = hashlib.md5(repr((stamp, tuple(sorted(group_ids)), params)).encode()).hexdigest()
+    return f'{PREFIX}:{namespace}:{user_id}:{digest}'
+
+
+def _count(name):
+    key = f'{PREFIX}:stats:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_or_set(key, compute, ttl=None):
+    """
+    Cached value for ``key``, computing it at most once across workers.
+    ``ttl`` overrides TASKS_CACHE_TIMEOUT for values that go stale without
+    a write.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count('hits')
+        return value
+    _count('misses')
+
+    lock = f'{key}:lock'
+    locked = cache.add(lock, 1, timeout=LOCK_TIMEOUT)
+    if not locked:
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        # The lock holder is slow or gone; compute rather than fail.
+    try:
+        # From the primary: a replica that lags behind the write which
+        # bumped the version would otherwise get cached as current.
+        with routing.use_primary():
+            value = compute()
+        cache.set(key, value, timeout=ttl or timeout())
+    finally:
+        # A waiter that gave up must not release the holder's lock.
+        if locked:
+            cache.delete(lock)
+    return value
+
+
+def stats():
+    values = cache.get_many([f'{PREFIX}:stats:hits', f'{PREFIX}:stats:misses'])
+    hits = values.get(f'{PREFIX}:stats:hits', 0)
+    misses = values.get(f'{PREFIX}:stats:misses', 0)
+    total = hits + misses
+    return {
+        'enabled': enabled(),
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
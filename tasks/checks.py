@@ -0,0 +1,35 @@
+"""
+System checks for settings that only go wrong under load.
+
+They run with ``manage.py check`` (scripts/deploy.sh runs it before every
+deploy), and tasks.warmup logs them when a server process starts, since
+gunicorn itself does not run system checks.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from . import pooling
+
+POOL_ENGINE = 'tasks.backends.postgresql_pool'
+
+
+@register()
+def pool_covers_async_threads(app_configs=None, **kwargs):
+    """Under ASGI every ORM thread of tasks.aio may hold a pooled connection."""
+    if not getattr(settings, 'ASYNC_VIEWS', False):
+        return []
+    threads = getattr(settings, 'ASYNC_DB_THREADS', 16)
+    warnings = []
+    for alias, database in settings.DATABASES.items():
+        if database.get('ENGINE') != POOL_ENGINE:
+            continue
+        max_size = (database.get('POOL') or {}).get('MAX_SIZE', pooling.DEFAULTS['MAX_SIZE'])
+        if max_size < threads:
+            warnings.append(Warning(
+                f"The '{alias}' connection pool holds {max_size} connections but "
+                f"ASYNC_DB_THREADS runs {threads} ORM threads; under load requests "
+                f"wait for a connection and fail after the pool TIMEOUT.",
+                hint="Raise DB_POOL_MAX_SIZE (or lower ASYNC_DB_THREADS).",
+                id='tasks.W001',
+            ))
+    return warnings
@@ -0,0 +1,160 @@
+"""
+HTTP conditional request support for the REST views.
+
+List views answer ``If-None-Match`` / ``If-Modified-Since`` with a weak
+validator built from ``max(last_modified)``, the row count and the query
+string, so an unchanged list costs one aggregate query and no
+serialization (none at all when the page is in the versioned cache).
+Detail views use a strong ETag derived from the object's
+``last_modified``; writes honour ``If-Match`` / ``If-Unmodified-Since`` with
+the row locked, so two clients cannot both update the same version.
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from . import caching, fastlist
+
+
+def _digest(*parts):
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()
+
+
+def aggregate_validators(queryset, *scope):
+    """
+    (weak ETag, Last-Modified datetime or None) summarising ``queryset``
+    with one aggregate query; ``scope`` distinguishes responses built from
+    the same rows (user, query string, ...).
+    """
+    stats = queryset.order_by().aggregate(latest=Max('last_modified'), count=Count('pk'))
+    latest = stats['latest']
+    tag = _digest(*scope, latest.isoformat() if latest else '', stats['count'])
+    return f'W/"{tag}"', latest
+
+
+def list_validators(queryset, request):
+    """(weak ETag, Last-Modified datetime or None) for a list response."""
+    return aggregate_validators(queryset, request.user.pk, sorted(request.query_params.lists()))
+
+
+def object_etag(obj):
+    return '"%s"' % _digest(type(obj).__name__, obj.pk, obj.last_modified.isoformat())
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Validators are per user; shared caches must not mix them up.
+    patch_vary_headers(response, ('Authorization', 'Cookie'))
+    return response
+
+
+class ConditionalListMixin:
+    """
+    Set ``cache_namespace`` to also serve pages from the per-user versioned
+    cache (tasks.caching); the validators are cached with the page, so a
+    cache hit answers without touching the database.
+
+    With ``fast_list`` the page is read with values() and formatted by
+    tasks.fastlist instead of instantiating the serializer per row.
+    """
+    cache_namespace = None
+    fast_list = True
+
+    def _list_data(self, queryset):
+        if self.fast_list:
+            serializer_class = self.get_serializer_class()
+            rows = fastlist.rows(queryset, serializer_class)
+            page = self.paginate_queryset(rows)
+            items = fastlist.represent(rows if page is None else page, serializer_class)
+        else:
+            page = self.paginate_queryset(queryset)
+            items = self.get_serializer(queryset if page is None else page, many=True).data
+        if page is not None:
+            return self.get_paginated_response(items).data
+        return items
+
+    def _build_list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(queryset, request)
+        return etag, last_modified, self._list_data(queryset)
+
+    def _not_modified(self, request, etag, last_modified):
+        return get_conditional_response(
+            request, etag=etag,
+            last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+
+    def list(self, request, *args, **kwargs):
+        if self.cache_namespace and caching.enabled() and request.user.is_authenticated:
+            key = caching.make_key(
+                self.cache_namespace, request.user.pk,
+                params=tuple(sorted(request.query_params.lists())),
+            )
+            etag, last_modified, data = caching.get_or_set(key, lambda: self._build_list(request))
+            not_modified = self._not_modified(request, etag, last_modified)
+            response = not_modified if not_modified is not None else Response(data)
+            return _set_validators(response, etag, last_modified)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = list_validators(queryset, request)
+        not_modified = self._not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return _set_validators(not_modified, etag, last_modified)
+        response = Response(self._list_data(queryset))
+        return _set_validators(response, etag, last_modified)
+
+
+class ConditionalDetailMixin:
+    _lock_object = False
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self._lock_object:
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def _precondition_failed(self, request, obj):
+        return get_conditional_response(
+            request, etag=object_etag(obj),
+            last_modified=int(obj.last_modified.timestamp()),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        obj = self.get_object()
+        etag = object_etag(obj)
+        not_modified = self._precondition_failed(request, obj)
+        if not_modified is not None:
+            return _set_validators(not_modified, etag, obj.last_modified)
+        response = Response(self.get_serializer(obj).data)
+        return _set_validators(response, etag, obj.last_modified)
+
+    def _guarded(self, handler, request, *args, **kwargs):
+        with transaction.atomic():
+            self._lock_object = True
+            try:
+                failed = self._precondition_failed(request, self.get_object())
+                if failed is not None:
+                    return failed
+                return handler(request, *args, **kwargs)
+            finally:
+                self._lock_object = False
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self._updated = serializer.instance
+
+    def update(self, request, *args, **kwargs):
+        self._updated = None
+        response = self._guarded(super().update, request, *args, **kwargs)
+        if self._updated is not None and response.status_code == 200:
+            _set_validators(response, object_etag(self._updated), self._updated.last_modified)
+        return response
+
+    def destroy(self, request, *args, **kwargs):
+        return self._guarded(super().destroy, request, *args, **kwargs)
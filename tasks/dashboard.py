@@ -0,0 +1,129 @@
+"""
+Home-screen summary for ``api/dashboard/``.
+
+Each resource is summarised by one conditional aggregation
+(``Count(..., filter=Q(...))``) over the set visible to the user, plus one
+query for the next few events: five queries in all, none of them
+returning more than a handful of rows. The result is cached under the
+user's and groups' versions (tasks.caching), so any write to something the
+user can see invalidates it. "Overdue" and "due today" also change without
+any write, so the entry only lives for ``CACHE_TTL`` seconds.
+"""
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import caching
+from .membership import group_ids
+from .models import Event, Habit, Note, Task
+from .visibility import visible_to
+
+UPCOMING_EVENTS = 5
+CACHE_TTL = 60
+
+
+def _visible(model, user):
+    return visible_to(model, user).order_by()
+
+
+def _midnight(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def _iso(value):
+    value = value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _tasks(user, now, today, tomorrow):
+    open_ = Q(completed=False)
+    overdue = open_ & Q(due_date__lt=now)
+    counts = {
+        'open': Count('pk', filter=open_),
+        'overdue': Count('pk', filter=overdue),
+        'due_today': Count('pk', filter=open_ & Q(due_date__gte=today, due_date__lt=tomorrow)),
+    }
+    for priority, _ in Task.PRIORITY_CHOICES:
+        counts[f'open_{priority}'] = Count('pk', filter=open_ & Q(priority=priority))
+        counts[f'overdue_{priority}'] = Count('pk', filter=overdue & Q(priority=priority))
+    row = _visible(Task, user).aggregate(**counts)
+    return {
+        'open': row['open'],
+        'overdue': row['overdue'],
+        'due_today': row['due_today'],
+        'by_priority': {
+            priority: {'open': row[f'open_{priority}'], 'overdue': row[f'overdue_{priority}']}
+            for priority, _ in Task.PRIORITY_CHOICES
+        },
+    }
+
+
+def _habits(user, today_date):
+    # A habit is due until it has been done in its current period.
+    week = today_date - timedelta(days=today_date.weekday())
+    period_start = {
+        'Daily': _midnight(today_date),
+        'Weekly': _midnight(week),
+        'Monthly': _midnight(today_date.replace(day=1)),
+    }
+    counts = {}
+    for frequency, _ in Habit.FREQUENCY_CHOICES:
+        of_kind = Q(frequency=frequency)
+        not_done = Q(last_done__isnull=True) | Q(last_done__lt=period_start[frequency])
+        counts[f'total_{frequency}'] = Count('pk', filter=of_kind)
+        counts[f'due_{frequency}'] = Count('pk', filter=of_kind & not_done)
+    row = _visible(Habit, user).aggregate(**counts)
+    by_frequency = {
+        frequency: {'total': row[f'total_{frequency}'], 'due': row[f'due_{frequency}']}
+        for frequency, _ in Habit.FREQUENCY_CHOICES
+    }
+    return {
+        'total': sum(v['total'] for v in by_frequency.values()),
+        'due_today': sum(v['due'] for v in by_frequency.values()),
+        'by_frequency': by_frequency,
+    }
+
+
+def _events(user, now, tomorrow):
+    visible = _visible(Event, user)
+    row = visible.aggregate(
+        today=Count('pk', filter=Q(event_date__gte=now, event_date__lt=tomorrow)),
+        next_7_days=Count('pk', filter=Q(event_date__gte=now, event_date__lt=now + timedelta(days=7))),
+    )
+    upcoming = (
+        visible.filter(event_date__gte=now)
+        .order_by('event_date', 'id')
+        .values('id', 'title', 'event_date', 'location')[:UPCOMING_EVENTS]
+    )
+    row['upcoming'] = [{**event, 'event_date': _iso(event['event_date'])} for event in upcoming]
+    return row
+
+
+def _notes(user):
+    return _visible(Note, user).aggregate(
+        total=Count('pk'),
+        own=Count('pk', filter=Q(user=user)),
+        shared=Count('pk', filter=~Q(user=user)),
+    )
+
+
+def compute(user, now):
+    today_date = timezone.localdate(now)
+    today, tomorrow = _midnight(today_date), _midnight(today_date + timedelta(days=1))
+    return {
+        'generated_at': _iso(now),
+        'tasks': _tasks(user, now, today, tomorrow),
+        'habits': _habits(user, today_date),
+        'events': _events(user, now, tomorrow),
+        'notes': _notes(user),
+    }
+
+
+def summary(user, now=None):
+    """The dashboard of ``user``, from the versioned cache when enabled."""
+    now = now or timezone.now()
+    if not caching.enabled():
+        return compute(user, now)
+    key = caching.make_key('dashboard', user.pk, group_ids(user))
+    return caching.get_or_set(key, lambda: compute(user, now), ttl=CACHE_TTL)
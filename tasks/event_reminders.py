@@ -0,0 +1,156 @@
+"""
+Dispatcher for ``Event.reminder``.
+
+``ReminderScheduler`` keeps the reminders due within ``lookahead`` in a
+min-heap keyed by due time, refilled from a range scan over the partial
+index of unsent reminders. Due entries are claimed with SELECT ... FOR
+UPDATE SKIP LOCKED, so any number of dispatcher processes can share the
+work, and handed to the outbox as one batch per claim (manage.py
+flush_outbox publishes them). Marking a reminder sent and writing its
+outbox row happen in the same transaction.
+
+The heap is only a timer: every claim re-reads the row, so reminders
+that were moved, sent elsewhere or deleted in the meantime are dropped.
+"""
+import heapq
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import outbox
+from .models import Event
+
+DETAIL_TYPE = "EventReminderDue"
+
+
+def pending():
+    """Unsent reminders; matches the ``event_reminder_due_idx`` partial index."""
+    return Event.objects.filter(reminder__isnull=False, reminder_sent_at__isnull=True)
+
+
+def reminder_detail(event):
+    owner = event.user
+    return {
+        "event_id": str(event.pk),
+        "owner_id": str(owner.pk),
+        "owner_email": owner.email,
+        "owner_name": owner.get_username(),
+        "event_title": event.title,
+        "eventAtIso": event.event_date.isoformat(),
+        "reminderAtIso": event.reminder.isoformat(),
+    }
+
+
+class LagStats:
+    """Due time vs. actual send time of dispatched reminders, in seconds."""
+
+    def __init__(self):
+        self.lags = []
+
+    def add(self, lag):
+        self.lags.append(max(lag, 0.0))
+
+    def percentile(self, p):
+        if not self.lags:
+            return 0.0
+        ordered = sorted(self.lags)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def __str__(self):
+        if not self.lags:
+            return "sent=0"
+        return (f"sent={len(self.lags)} lag p50={self.percentile(50):.2f}s "
+                f"p95={self.percentile(95):.2f}s max={max(self.lags):.2f}s")
+
+
+class ReminderScheduler:
+    def __init__(self, lookahead=timedelta(minutes=5), refresh=timedelta(seconds=10),
+                 load_limit=5000, batch_size=100):
+        self.lookahead = lookahead
+        # Reminders created or moved after a load are seen on the next one.
+        self.refresh = refresh
+        self.load_limit = load_limit
+        self.batch_size = batch_size
+        self.heap = []  # (reminder, event pk)
+        self.queued = {}  # event pk -> reminder currently in the heap
+        self.loaded_at = self.loaded_until = None
+
+    def load(self, now):
+        """Add reminders due up to ``now + lookahead`` to the heap."""
+        horizon = now + self.lookahead
+        rows = list(
+            pending()
+            .filter(reminder__lte=horizon)
+            .order_by('reminder')
+            .values_list('pk', 'reminder')[:self.load_limit]
+        )
+        added = 0
+        for pk, reminder in rows:
+            if self.queued.get(pk) != reminder:
+                self.queued[pk] = reminder
+                heapq.heappush(self.heap, (reminder, pk))
+                added += 1
+        # A full page means more rows may be due before the horizon.
+        self.loaded_until = horizon if len(rows) < self.load_limit else rows[-1][1]
+        self.loaded_at = now
+        return added
+
+    def next_load(self):
+        if self.loaded_at is None:
+            return None
+        return min(self.loaded_at + self.refresh, self.loaded_until - self.lookahead / 2)
+
+    def needs_load(self, now):
+        return self.loaded_at is None or now >= self.next_load()
+
+    def next_due(self):
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now):
+        batch = []
+        while self.heap and self.heap[0][0] <= now and len(batch) < self.batch_size:
+            reminder, pk = heapq.heappop(self.heap)
+            if self.queued.get(pk) == reminder:
+                del self.queued[pk]
+                batch.append(pk)
+        return batch
+
+    def dispatch(self, pks, stats):
+        """Claim ``pks`` that are still due and unsent, and enqueue them."""
+        with transaction.atomic():
+            now = timezone.now()
+            claimed = list(
+                pending()
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('user')
+                .filter(pk__in=pks, reminder__lte=now)
+            )
+            if not claimed:
+                return 0
+            outbox.enqueue_many(DETAIL_TYPE, [reminder_detail(e) for e in claimed])
+            Event.objects.filter(pk__in=[e.pk for e in claimed]).update(reminder_sent_at=now)
+        for event in claimed:
+            stats.add((now - event.reminder).total_seconds())
+        return len(claimed)
+
+    def run_once(self, stats, now=None):
+        """Load if needed and dispatch everything due. Returns the count sent."""
+        now = now or timezone.now()
+        if self.needs_load(now):
+            self.load(now)
+        sent = 0
+        while True:
+            batch = self.pop_due(now)
+            if not batch:
+                return sent
+            sent += self.dispatch(batch, stats)
+
+    def seconds_to_wait(self, now, idle):
+        """Sleep until the next reminder or reload, but at most ``idle``."""
+        wake = [now + idle]
+        if self.next_due() is not None:
+            wake.append(self.next_due())
+        if self.loaded_at is not None:
+            wake.append(self.next_load())
+        return max(0.0, (min(wake) - now).total_seconds())
@@ -47,24 +47,17 @@ class TaskForm(forms.ModelForm):
         }
 
 class HabitForm(forms.ModelForm):
-    last_done = forms.DateField(
-        required=False,
-        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
-        label="Last Done"
-    )
     class Meta:
         model = Habit
+        # streak and last_done are maintained from check-ins (tasks.streaks),
+        # not typed in
         fields = [
-            'name', 'frequency', 'last_done', 'streak', 'notes'
+            'name', 'frequency', 'notes'
         ]
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Name your habit'}),
             'frequency': forms.Select(attrs={'class': 'form-select'}),
             'notes': forms.Textarea(attrs={'rows': 2, 'placeholder': 'Habit notes or motivation...', 'class': 'form-control'}),
-            'streak': forms.NumberInput(attrs={'class': 'form-control'}),
-        }
-        help_texts = {
-            'streak': "How many days/weeks/months in a row you've done this habit.",
         }
 
 class NoteForm(forms.ModelForm):
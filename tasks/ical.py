@@ -0,0 +1,141 @@
+"""
+iCalendar (RFC 5545) feeds of events.
+
+A feed URL carries a signed token naming either a user (every event the
+user can see) or a group (the events shared with it), so calendar clients
+can subscribe without a session. Feeds are streamed: rows are read with
+``values_list()`` in keyset chunks and serialized one VEVENT at a time, so
+memory use does not grow with the size of the calendar.
+"""
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth.models import Group, User
+from django.core import signing
+from django.db.models import Q
+
+from .membership import group_ids
+from .models import Event
+from .visibility import visible_to
+
+_SALT = 'tasks.ical'
+CHUNK_SIZE = 2000
+# Events are handed to the server in ~64 KiB writes rather than one by one.
+WRITE_SIZE = 64 * 1024
+FIELDS = ('pk', 'title', 'event_date', 'location', 'description', 'reminder', 'tags', 'last_modified')
+
+
+class InvalidFeed(Exception):
+    pass
+
+
+def feed_token(user, group=None):
+    return signing.dumps({'u': user.pk, 'g': group.pk if group else None}, salt=_SALT)
+
+
+def resolve(token):
+    """Token -> (user, group or None); the user must still be in the group."""
+    try:
+        data = signing.loads(token, salt=_SALT)
+        user = User.objects.get(pk=data['u'], is_active=True)
+    except (signing.BadSignature, KeyError, TypeError, User.DoesNotExist) as exc:
+        raise InvalidFeed(str(exc))
+    group = None
+    if data.get('g') is not None:
+        if data['g'] not in group_ids(user):
+            raise InvalidFeed("Not a member of this group.")
+        group = Group.objects.get(pk=data['g'])
+    return user, group
+
+
+def feed_events(user, group=None):
+    if group is None:
+        queryset = visible_to(Event, user)
+    else:
+        shared = Event.groups.through.objects.filter(group_id=group.pk).values('event_id')
+        queryset = Event.objects.filter(pk__in=shared)
+    return queryset.order_by('event_date', 'id')
+
+
+def _escape(text):
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _stamp(dt):
+    return dt.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _line(name, value):
+    """One content line, folded at 75 octets as RFC 5545 requires."""
+    raw = f'{name}:{value}'.encode()
+    parts = []
+    while len(raw) > 75:
+        cut = 75 if not parts else 74
+        # Never split a UTF-8 sequence: back up to a lead byte.
+        while raw[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(raw[:cut])
+        raw = raw[cut:]
+    parts.append(raw)
+    return b'\r\n '.join(parts).decode() + '\r\n'
+
+
+def _vevent(row, domain):
+    pk, title, event_date, location, description, reminder, tags, last_modified = row
+    out = [
+        'BEGIN:VEVENT\r\n',
+        _line('UID', f'event-{pk}@{domain}'),
+        _line('DTSTAMP', _stamp(last_modified)),
+        _line('LAST-MODIFIED', _stamp(last_modified)),
+        _line('DTSTART', _stamp(event_date)),
+        _line('SUMMARY', _escape(title)),
+    ]
+    if location:
+        out.append(_line('LOCATION', _escape(location)))
+    if description:
+        out.append(_line('DESCRIPTION', _escape(description)))
+    if tags:
+        out.append(_line('CATEGORIES', ','.join(_escape(t.strip()) for t in tags.split(',') if t.strip())))
+    if reminder:
+        out += [
+            'BEGIN:VALARM\r\n',
+            'ACTION:DISPLAY\r\n',
+            _line('DESCRIPTION', _escape(title)),
+            _line('TRIGGER;VALUE=DATE-TIME', _stamp(reminder)),
+            'END:VALARM\r\n',
+        ]
+    out.append('END:VEVENT\r\n')
+    return ''.join(out)
+
+
+def _rows(queryset):
+    """``queryset`` (ordered by event_date, id) read a chunk at a time, with
+    no cursor held open between chunks."""
+    rows = queryset.values_list(*FIELDS)
+    chunk = list(rows[:CHUNK_SIZE])
+    while chunk:
+        yield from chunk
+        if len(chunk) < CHUNK_SIZE:
+            return
+        pk, when = chunk[-1][0], chunk[-1][2]
+        chunk = list(rows.filter(Q(event_date__gt=when) | Q(event_date=when, pk__gt=pk))[:CHUNK_SIZE])
+
+
+def stream(queryset, name, domain):
+    """Yield the feed as text, serializing one row at a time."""
+    yield (
+        'BEGIN:VCALENDAR\r\n'
+        'VERSION:2.0\r\n'
+        'PRODID:-//Productivity//Events//EN\r\n'
+        'CALSCALE:GREGORIAN\r\n'
+        + _line('X-WR-CALNAME', _escape(name))
+    )
+    buffer, size = [], 0
+    for row in _rows(queryset):
+        buffer.append(_vevent(row, domain))
+        size += len(buffer[-1])
+        if size >= WRITE_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    buffer.append('END:VCALENDAR\r\n')
+    yield ''.join(buffer)
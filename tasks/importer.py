@@ -0,0 +1,255 @@
+"""
+Bulk import behind ``manage.py import_items``.
+
+Records are read one at a time from CSV or NDJSON (the formats written by
+tasks.export, so an export can be imported elsewhere) and collected per
+type into batches. Each batch is validated with a single serializer
+instance, then written in one transaction: one COPY on PostgreSQL (a
+batched ``bulk_create`` elsewhere), one INSERT on the ``groups`` through
+table and the batched side effects of ``bulk.after_create``. No per-row
+signals fire.
+
+TaskCreated events are not written per batch: the ids of the new tasks
+are kept and their outbox rows are inserted together once the whole file
+has been imported.
+
+Exported fields that the REST serializers do not accept are in
+``EXTRA_FIELDS`` and are validated against the model field instead:
+a habit's ``tags``, and its ``streak``, which comes with one completion per
+counted period ending at ``last_done`` (tasks.streaks.history), so that
+``recompute_streaks`` keeps it. A streak without ``last_done`` cannot be
+dated and is imported as 0. Ids and timestamps are never imported.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import bulk, outbox, streaks
+from .export import KINDS
+from .models import Habit, HabitCompletion, Task
+from .serializers import EventSerializer, HabitSerializer, NoteSerializer, TaskSerializer
+
+SERIALIZERS = {
+    'task': TaskSerializer,
+    'habit': HabitSerializer,
+    'note': NoteSerializer,
+    'event': EventSerializer,
+}
+# Exported, but read-only or absent in the serializer.
+EXTRA_FIELDS = {
+    'habit': ('tags', 'streak'),
+}
+BATCH_SIZE = 2000
+OUTBOX_BATCH = 5000
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.created = {kind: 0 for kind in KINDS}
+        self.errors = []  # (record number, errors)
+        self.error_count = 0
+        self.events = 0
+
+    @property
+    def total_created(self):
+        return sum(self.created.values())
+
+    def __str__(self):
+        created = ', '.join(f"{n} {kind}(s)" for kind, n in self.created.items() if n)
+        return (f"read={self.read} created={self.total_created} ({created or 'nothing'}) "
+                f"rejected={self.error_count} task_events={self.events}")
+
+
+def read_records(lines, fmt):
+    """Yield dicts from an iterable of text lines; '' in CSV means "not given"."""
+    if fmt == 'csv':
+        for row in csv.DictReader(lines):
+            yield {key: value for key, value in row.items() if key and value != ''}
+        return
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None  # rejected by Importer.add like any non-object
+
+
+def _copy_text(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_create(model, objs):
+    """
+    PostgreSQL ``bulk_create`` through COPY. Primary keys are drawn from the
+    table's sequence first, so ``objs`` come back with ids exactly as they
+    would from bulk_create.
+    """
+    meta = model._meta
+    fields = meta.concrete_fields
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [meta.db_table, meta.pk.column, len(objs)],
+        )
+        for obj, (pk,) in zip(objs, cursor.fetchall()):
+            obj.pk = pk
+        buffer = io.StringIO()
+        for obj in objs:
+            row = (field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields)
+            buffer.write('\t'.join(map(_copy_text, row)) + '\n')
+            obj._state.adding = False
+            obj._state.db = connection.alias
+        buffer.seek(0)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(meta.db_table)} ({columns}) FROM STDIN", buffer
+        )
+    return objs
+
+
+class Importer:
+    def __init__(self, user, default_type=None, groups=(), batch_size=BATCH_SIZE,
+                 dry_run=False, max_reported_errors=20):
+        self.user = user
+        self.default_type = default_type
+        self.extra_groups = list(groups)
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.max_reported_errors = max_reported_errors
+        self.stats = ImportStats()
+        self.group_ids = {}
+        for pk, name in Group.objects.values_list('pk', 'name'):
+            self.group_ids[name] = self.group_ids[pk] = self.group_ids[str(pk)] = pk
+        self.pending = {kind: [] for kind in KINDS}
+        self.task_ids = []
+
+    def _reject(self, number, errors):
+        self.stats.error_count += 1
+        if len(self.stats.errors) < self.max_reported_errors:
+            self.stats.errors.append((number, errors))
+
+    def _groups(self, value):
+        """Group names or ids, as a list or a ';'/','-separated string."""
+        if value in (None, ''):
+            names = []
+        elif isinstance(value, list):
+            names = value
+        else:
+            names = [part.strip() for part in str(value).replace(';', ',').split(',') if part.strip()]
+        ids, unknown = [], []
+        for name in list(names) + self.extra_groups:
+            if name in self.group_ids:
+                ids.append(self.group_ids[name])
+            else:
+                unknown.append(name)
+        if unknown:
+            raise ValidationError({'groups': [f"Unknown group(s): {', '.join(map(str, unknown))}."]})
+        return sorted(set(ids))
+
+    def _extras(self, model, kind, record):
+        extras, errors = {}, {}
+        for name in EXTRA_FIELDS.get(kind, ()):
+            if name not in record:
+                continue
+            field = model._meta.get_field(name)
+            try:
+                extras[name] = field.clean(record.pop(name), None)
+            except DjangoValidationError as exc:
+                errors[name] = exc.messages
+        if errors:
+            raise ValidationError(errors)
+        return extras
+
+    def add(self, number, record):
+        self.stats.read += 1
+        if not isinstance(record, dict):
+            self._reject(number, {'non_field_errors': ['Expected a JSON object.']})
+            return
+        kind = record.pop('type', None) or self.default_type
+        if kind not in KINDS:
+            self._reject(number, {'type': [f"Expected one of {', '.join(KINDS)}."]})
+            return
+        self.pending[kind].append((number, record))
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def flush(self, kind):
+        batch, self.pending[kind] = self.pending[kind], []
+        if not batch:
+            return
+        model = KINDS[kind][0]
+        validator = SERIALIZERS[kind]()  # fields are built once per batch
+        valid = []
+        for number, record in batch:
+            try:
+                groups = self._groups(record.pop('groups', None))
+                extras = self._extras(model, kind, record)
+                data = validator.run_validation(record)
+            except ValidationError as exc:
+                self._reject(number, exc.detail)
+                continue
+            obj = model(user=self.user, **data, **extras)
+            if model is Habit and obj.last_done is None:
+                obj.streak = 0
+            valid.append((obj, groups))
+        if not valid:
+            return
+        if self.dry_run:
+            self.stats.created[kind] += len(valid)
+            return
+        with transaction.atomic():
+            objs = [obj for obj, _ in valid]
+            if connection.vendor == 'postgresql':
+                copy_create(model, objs)
+            else:
+                model.objects.bulk_create(objs, batch_size=self.batch_size)
+            bulk.set_groups(model, [(obj.pk, groups) for obj, groups in valid if groups])
+            bulk.after_create(model, objs, publish=False)
+            if model is Habit:
+                self._completions(objs)
+        self.stats.created[kind] += len(objs)
+        if model is Task:
+            self.task_ids.extend(obj.pk for obj in objs if obj.due_date)
+
+    def _completions(self, habits):
+        HabitCompletion.objects.bulk_create(
+            (
+                HabitCompletion(habit=habit, user=self.user, done_at=done_at)
+                for habit in habits if habit.last_done is not None
+                for done_at in streaks.history(habit.frequency, habit.streak, habit.last_done)
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def finish(self):
+        """Flush what is left and publish TaskCreated for every new task."""
+        for kind in KINDS:
+            self.flush(kind)
+        if self.dry_run or not self.task_ids:
+            return self.stats
+        with transaction.atomic():
+            for i in range(0, len(self.task_ids), OUTBOX_BATCH):
+                tasks = Task.objects.filter(pk__in=self.task_ids[i:i + OUTBOX_BATCH]).select_related('user')
+                details = [d for d in map(outbox.task_created_detail, tasks) if d is not None]
+                outbox.enqueue_many("TaskCreated", details)
+                self.stats.events += len(details)
+        return self.stats
+
+    def run(self, records):
+        for number, record in enumerate(records, start=1):
+            self.add(number, record)
+        return self.finish()
@@ -0,0 +1,268 @@
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.models import Event, Habit, Note, Task
+
+KINDS = (Task, Habit, Note, Event)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users, groups and shared items, then drive the HTML lists, the "
+        "API list/detail/create endpoints and the dashboard through the test "
+        "client. Reports p50/p95/p99 latency, queries and peak memory per "
+        "endpoint, optionally writes them as JSON and compares them with a "
+        "baseline. Runs inside a transaction that is rolled back, so it is "
+        "safe against a real database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--groups", type=int, default=4)
+        parser.add_argument("--objects", type=int, default=500,
+                            help="Items of each kind per user (default 500).")
+        parser.add_argument("--shared", type=float, default=0.2,
+                            help="Fraction of items shared with one of the owner's groups.")
+        parser.add_argument("--repeat", type=int, default=30,
+                            help="Timed requests per endpoint.")
+        parser.add_argument("--only", default="",
+                            help="Comma-separated substrings; run matching endpoints only.")
+        parser.add_argument("--with-cache", action="store_true",
+                            help="Leave TASKS_CACHE_ENABLED as configured (default: off, "
+                                 "so every request reaches the database).")
+        parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--baseline", help="JSON written by an earlier --output to compare with.")
+        parser.add_argument("--latency-threshold", type=float, default=0.25,
+                            help="Allowed relative p95 increase (default 0.25 = +25%%).")
+        parser.add_argument("--latency-floor", type=float, default=2.0,
+                            help="Ignore p95 increases below this many ms (timer noise).")
+        parser.add_argument("--query-threshold", type=int, default=0,
+                            help="Allowed extra queries per request.")
+        parser.add_argument("--memory-threshold", type=float, default=0.5,
+                            help="Allowed relative peak-memory increase.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **opts):
+        overrides = {"ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"]}
+        if not opts["with_cache"]:
+            overrides["TASKS_CACHE_ENABLED"] = False
+        results = None
+        try:
+            with override_settings(**overrides), transaction.atomic():
+                results = self._run(**opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if opts["output"]:
+            with open(opts["output"], "w") as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {opts['output']}.")
+        if opts["baseline"]:
+            self._compare(results, **opts)
+
+    # -- seeding ---------------------------------------------------------
+
+    def _seed(self, users, groups, objects, shared, rng):
+        now = timezone.now()
+        group_objs = [Group.objects.create(name=f"bench-{g}") for g in range(groups)]
+        user_objs = [User.objects.create_user(f"bench-{u}") for u in range(users)]
+        memberships = {}
+        for u, user in enumerate(user_objs):
+            mine = [group_objs[u % groups], group_objs[(u + 1) % groups]] if groups else []
+            user.groups.add(*mine)
+            memberships[user.pk] = mine
+        words = "alpha beta gamma delta lorem ipsum report review meeting".split()
+
+        def text(n):
+            return " ".join(rng.choice(words) for _ in range(n))
+
+        build = {
+            Task: lambda user, i: Task(
+                user=user, title=f"task {i} {text(3)}", notes=text(20), tags="work",
+                priority=rng.choice(["Low", "Medium", "High"]), completed=i % 4 == 0,
+                due_date=now + timedelta(hours=rng.randint(-72, 240)),
+            ),
+            Habit: lambda user, i: Habit(
+                user=user, name=f"habit {i}", frequency=rng.choice(["Daily", "Weekly", "Monthly"]),
+                last_done=now - timedelta(days=rng.randint(0, 30)), notes=text(10),
+            ),
+            Note: lambda user, i: Note(user=user, title=f"note {i} {text(3)}", content=text(60), tags="misc"),
+            Event: lambda user, i: Event(
+                user=user, title=f"event {i} {text(2)}", location="office", description=text(15),
+                event_date=now + timedelta(hours=rng.randint(-240, 720)),
+            ),
+        }
+        for model in KINDS:
+            through = model.groups.through
+            fk = f"{model._meta.model_name}_id"
+            for user in user_objs:
+                objs = model.objects.bulk_create(build[model](user, i) for i in range(objects))
+                if memberships[user.pk]:
+                    through.objects.bulk_create(
+                        through(**{fk: obj.pk, "group_id": rng.choice(memberships[user.pk]).pk})
+                        for obj in objs if rng.random() < shared
+                    )
+        return user_objs
+
+    # -- endpoints -------------------------------------------------------
+
+    def _endpoints(self, user, rng):
+        """(name, method, path, payload or a callable producing one)."""
+        now = timezone.now()
+        detail_ids = {
+            model: list(model.objects.filter(user=user).values_list("pk", flat=True)[:50])
+            for model in KINDS
+        }
+        endpoints = [
+            ("tasks:task_list", "get", reverse("tasks:task_list"), None),
+            ("tasks:habit_list", "get", reverse("tasks:habit_list"), None),
+            ("tasks:note_list", "get", reverse("tasks:note_list"), None),
+            ("tasks:event_list", "get", reverse("tasks:event_list"), None),
+        ]
+        for model in KINDS:
+            name = model._meta.model_name
+            endpoints.append((f"tasks:api_{name}_list", "get", reverse(f"tasks:api_{name}_list"), None))
+            endpoints.append((
+                f"tasks:api_{name}_detail", "get",
+                lambda name=name, ids=detail_ids[model]: reverse(
+                    f"tasks:api_{name}_detail", args=[rng.choice(ids)]
+                ),
+                None,
+            ))
+        endpoints += [
+            ("tasks:api_dashboard", "get", reverse("tasks:api_dashboard"), None),
+            ("tasks:api_search", "get", reverse("tasks:api_search") + "?q=review", None),
+            ("tasks:api_task_list POST", "post", reverse("tasks:api_task_list"),
+             lambda: {"title": "bench task", "priority": "High", "due_date": (now + timedelta(days=1)).isoformat()}),
+            ("tasks:api_habit_list POST", "post", reverse("tasks:api_habit_list"),
+             lambda: {"name": "bench habit", "frequency": "Daily"}),
+            ("tasks:api_note_list POST", "post", reverse("tasks:api_note_list"),
+             lambda: {"title": "bench note", "content": "lorem ipsum"}),
+            ("tasks:api_event_list POST", "post", reverse("tasks:api_event_list"),
+             lambda: {"title": "bench event", "event_date": (now + timedelta(days=2)).isoformat()}),
+            ("tasks:task_create POST", "post", reverse("tasks:task_create"),
+             lambda: {"title": "bench form task", "priority": "Low"}),
+        ]
+        return endpoints
+
+    def _request(self, client, method, path, payload):
+        path = path() if callable(path) else path
+        if method == "get":
+            return client.get(path)
+        data = payload()
+        if "/api/" in path:
+            return client.post(path, data, content_type="application/json")
+        return client.post(path, data)
+
+    def _measure(self, client, method, path, payload, repeat):
+        response = self._request(client, method, path, payload)  # warm-up
+        if response.status_code >= 400:
+            raise CommandError(f"{method.upper()} {path} answered {response.status_code}")
+        timings, queries = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                self._request(client, method, path, payload)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured.captured_queries))
+        # tracemalloc slows everything down, so memory gets its own request.
+        tracemalloc.start()
+        self._request(client, method, path, payload)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        timings.sort()
+        return {
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(_percentile(timings, 95), 3),
+            "p99_ms": round(_percentile(timings, 99), 3),
+            "queries": max(queries),
+            "peak_kib": round(peak / 1024, 1),
+        }
+
+    def _run(self, users, groups, objects, shared, repeat, only, seed, **_):
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        user_objs = self._seed(users, groups, objects, shared, rng)
+        self.stdout.write(
+            f"Seeded {users} users x {objects} items of each kind, {groups} groups, "
+            f"{shared:.0%} shared, in {time.perf_counter() - start:.1f}s."
+        )
+        client = Client()
+        client.force_login(user_objs[0])
+        filters = [part.strip() for part in only.split(",") if part.strip()]
+        endpoints = {}
+        self.stdout.write(f"{'endpoint':<28} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'peak KiB':>9}")
+        for name, method, path, payload in self._endpoints(user_objs[0], rng):
+            if filters and not any(part in name for part in filters):
+                continue
+            row = endpoints[name] = self._measure(client, method, path, payload, repeat)
+            self.stdout.write(
+                f"{name:<28} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f} "
+                f"{row['queries']:8d} {row['peak_kib']:9.1f}"
+            )
+        return {
+            "meta": {
+                "vendor": connection.vendor,
+                "users": users, "groups": groups, "objects": objects, "shared": shared,
+                "repeat": repeat, "python": platform.python_version(),
+                "cache": settings.TASKS_CACHE_ENABLED,
+                "date": timezone.now().isoformat(),
+            },
+            "endpoints": endpoints,
+        }
+
+    # -- baseline --------------------------------------------------------
+
+    def _compare(self, results, baseline, latency_threshold, latency_floor,
+                 query_threshold, memory_threshold, **_):
+        with open(baseline) as fh:
+            base = json.load(fh)
+        for key in ("vendor", "users", "groups", "objects", "shared", "cache"):
+            if base["meta"].get(key) != results["meta"].get(key):
+                self.stdout.write(self.style.WARNING(
+                    f"Baseline {key}={base['meta'].get(key)!r} differs from this run's "
+                    f"{results['meta'].get(key)!r}; the comparison may not be meaningful."
+                ))
+        regressions = []
+        for name, row in results["endpoints"].items():
+            old = base["endpoints"].get(name)
+            if old is None:
+                continue
+            if (row["p95_ms"] > old["p95_ms"] * (1 + latency_threshold)
+                    and row["p95_ms"] - old["p95_ms"] > latency_floor):
+                regressions.append(f"{name}: p95 {old['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms")
+            if row["queries"] > old["queries"] + query_threshold:
+                regressions.append(f"{name}: queries {old['queries']} -> {row['queries']}")
+            if row["peak_kib"] > old["peak_kib"] * (1 + memory_threshold):
+                regressions.append(f"{name}: peak {old['peak_kib']:.0f} -> {row['peak_kib']:.0f} KiB")
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f"{len(regressions)} regression(s) against {baseline}.")
+        self.stdout.write(self.style.SUCCESS(
+            f"No regressions against {baseline} ({len(results['endpoints'])} endpoints)."
+        ))
@@ -0,0 +1,62 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection
+from rest_framework.authtoken.models import Token
+
+from tasks.management.commands import bench_serving
+from tasks.models import Task
+
+# Connection handling compared, as environment for mysite.settings.
+STRATEGIES = {
+    "per-request": {"DB_POOL": "false", "DB_CONN_MAX_AGE": "0"},
+    "persistent": {"DB_POOL": "false", "DB_CONN_MAX_AGE": "60"},
+    "pooled": {"DB_POOL": "true"},
+}
+
+
+class Command(bench_serving.Command):
+    help = (
+        "Requests/second of the same gunicorn deployment with a new PostgreSQL "
+        "connection per request, persistent per-thread connections "
+        "(CONN_MAX_AGE) and the pooled engine (DB_POOL, tasks.pooling)."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--serving", choices=list(bench_serving.MODES), default="wsgi")
+        parser.add_argument("--strategy", dest="strategies", action="append", choices=list(STRATEGIES),
+                            help="Strategies to compare (default all).")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("Connection pooling only applies to PostgreSQL; run with mysite.settings.")
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_pooling needs httpx (pip install -r requirements.txt).")
+
+        user = User.objects.create_user(f"bench-pooling-{os.getpid()}")
+        try:
+            token = Token.objects.create(user=user).key
+            tasks = Task.objects.bulk_create(
+                Task(user=user, title=f"bench {i}", notes="lorem ipsum " * 10) for i in range(opts["objects"])
+            )
+            paths = opts["path"] or ["/tasks/api/tasks/", f"/tasks/api/tasks/{tasks[0].pk}/"]
+            rows = {}
+            for strategy in opts["strategies"] or list(STRATEGIES):
+                self.stdout.write(f"{strategy}:")
+                rows[strategy] = self._bench(opts["serving"], paths, token,
+                                             extra_env=STRATEGIES[strategy], **opts)
+        finally:
+            user.delete()
+
+        self.stdout.write(
+            f"\n{'strategy':<12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+        )
+        for strategy, row in rows.items():
+            self.stdout.write(
+                f"{strategy:<12} {row['rps']:8.1f} {row['p50']:8.1f} {row['p95']:8.1f} "
+                f"{row['p99']:8.1f} {row['errors']:7d}"
+            )
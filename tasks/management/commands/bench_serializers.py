@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from tasks.models import Event, Habit, Note, Task
+from tasks.views import EventListCreateAPI, HabitListCreateAPI, NoteListCreateAPI, TaskListCreateAPI
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ModelSerializer list pages with the values() fast path "
+        "(tasks.fastlist): rows/s, queries per page and byte-identical "
+        "output. Seeds data inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=2000,
+                            help="Rows seeded per resource.")
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._run(**opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, user, objects):
+        now = timezone.now()
+        Task.objects.bulk_create(
+            Task(user=user, title=f"task {i}", due_date=now, notes="lorem ipsum " * 10, tags="work")
+            for i in range(objects)
+        )
+        Habit.objects.bulk_create(Habit(user=user, name=f"habit {i}", last_done=now) for i in range(objects))
+        Note.objects.bulk_create(Note(user=user, title=f"note {i}", content="lorem ipsum " * 20) for i in range(objects))
+        Event.objects.bulk_create(
+            Event(user=user, title=f"event {i}", event_date=now, reminder=now) for i in range(objects)
+        )
+
+    def _measure(self, view, user, path, repeat):
+        factory = APIRequestFactory()
+        timings, queries, body = [], 0, b""
+        for _ in range(repeat):
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = view(request)
+                response.render()
+                timings.append(time.perf_counter() - start)
+            queries, body = len(captured.captured_queries), response.content
+        return statistics.median(timings), queries, body
+
+    def _run(self, objects, page_size, repeat, **_):
+        user = User.objects.create(username="bench-serializers")
+        self._seed(user, objects)
+        self.stdout.write(f"Seeded {objects} rows per resource; pages of {page_size}.")
+        path = f"/?page_size={page_size}&page=2"
+        for view_class in (TaskListCreateAPI, HabitListCreateAPI, NoteListCreateAPI, EventListCreateAPI):
+            name = view_class.__name__
+            # cache_namespace=None: measure the serialization, not cache hits.
+            before = self._measure(view_class.as_view(fast_list=False, cache_namespace=None), user, path, repeat)
+            after = self._measure(view_class.as_view(fast_list=True, cache_namespace=None), user, path, repeat)
+            for label, (seconds, queries, _) in (("serializer", before), ("fast path", after)):
+                self.stdout.write(
+                    f"{name:<20} {label:<10} {seconds * 1000:8.2f} ms/page "
+                    f"{page_size / seconds:10.0f} rows/s  {queries:3d} queries"
+                )
+            identical = before[2] == after[2]
+            style = self.style.SUCCESS if identical else self.style.ERROR
+            self.stdout.write(style(
+                f"{name:<20} speed-up x{before[0] / after[0]:.1f}, "
+                f"output {'identical' if identical else 'DIFFERS'}"
+            ))
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from tasks.models import Task
+
+MODES = {
+    "wsgi": ["mysite.wsgi"],
+    "asgi": ["-k", "uvicorn.workers.UvicornWorker", "mysite.asgi"],
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Side-by-side load test of the two deployments: gunicorn sync workers "
+        "on mysite.wsgi and gunicorn + uvicorn workers on mysite.asgi, with "
+        "the same worker count, against the configured database. Creates a "
+        "bench user with a token and some tasks, and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=3)
+        parser.add_argument("--concurrency", type=int, default=200,
+                            help="Requests in flight at once.")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--path", action="append",
+                            help="Path to request (repeatable); default the task list and detail APIs.")
+        parser.add_argument("--objects", type=int, default=200, help="Tasks owned by the bench user.")
+        parser.add_argument("--mode", dest="modes", action="append", choices=list(MODES),
+                            help="Deployments to compare (default both).")
+        parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout.")
+
+    def handle(self, *args, **opts):
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_serving needs httpx (pip install -r requirements.txt).")
+
+        user = User.objects.create_user(f"bench-serving-{os.getpid()}")
+        try:
+            token = Token.objects.create(user=user).key
+            tasks = Task.objects.bulk_create(
+                Task(user=user, title=f"bench {i}", notes="lorem ipsum " * 10) for i in range(opts["objects"])
+            )
+            paths = opts["path"] or ["/tasks/api/tasks/", f"/tasks/api/tasks/{tasks[0].pk}/"]
+            rows = {}
+            for mode in opts["modes"] or list(MODES):
+                rows[mode] = self._bench(mode, paths, token, **opts)
+        finally:
+            user.delete()
+
+        self.stdout.write(
+            f"\n{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}"
+        )
+        for mode, row in rows.items():
+            self.stdout.write(
+                f"{mode:<6} {row['rps']:8.1f} {row['p50']:8.1f} {row['p95']:8.1f} "
+                f"{row['p99']:8.1f} {row['errors']:7d}"
+            )
+        if len(rows) == 2:
+            ratio = rows["asgi"]["rps"] / rows["wsgi"]["rps"] if rows["wsgi"]["rps"] else float("inf")
+            self.stdout.write(self.style.SUCCESS(
+                f"asgi/wsgi throughput x{ratio:.2f} at {opts['concurrency']} concurrent requests, "
+                f"{opts['workers']} workers each."
+            ))
+
+    def _bench(self, mode, paths, token, workers, concurrency, requests, timeout, extra_env=None, **_):
+        port = _free_port()
+        env = {**os.environ, **(extra_env or {}), "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        env.pop("DJANGO_SERVING", None)  # let mysite.asgi / mysite.wsgi decide
+        command = [
+            sys.executable, "-m", "gunicorn", "--workers", str(workers),
+            "--bind", f"127.0.0.1:{port}", "--backlog", str(max(2048, concurrency * 2)),
+            "--log-level", "warning", *MODES[mode],
+        ]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, start_new_session=True)
+        try:
+            base = f"http://127.0.0.1:{port}"
+            self._wait_ready(base, server)
+            self.stdout.write(f"{mode}: {' '.join(command[2:])}")
+            return asyncio.run(self._drive(base, paths, token, concurrency, requests, timeout))
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+
+    def _wait_ready(self, base, server, deadline=60.0):
+        import httpx
+
+        start = time.monotonic()
+        while time.monotonic() - start < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"The server exited with status {server.returncode}.")
+            try:
+                if httpx.get(f"{base}/health/", timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f"{base} did not become ready in {deadline:.0f}s.")
+
+    async def _drive(self, base, paths, token, concurrency, requests, timeout):
+        import httpx
+
+        headers = {"Authorization": f"Token {token}", "Host": "localhost"}
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        timings, errors = [], 0
+        queue = iter(range(requests))
+
+        async with httpx.AsyncClient(base_url=base, headers=headers, limits=limits, timeout=timeout) as client:
+            for path in paths:  # warm every worker's imports and caches a little
+                await client.get(path)
+
+            async def worker():
+                nonlocal errors
+                for i in queue:
+                    start = time.perf_counter()
+                    try:
+                        response = await client.get(paths[i % len(paths)])
+                        ok = response.status_code < 400
+                    except httpx.HTTPError:
+                        ok = False
+                    timings.append((time.perf_counter() - start) * 1000)
+                    errors += not ok
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+        timings.sort()
+        return {
+            "rps": requests / elapsed,
+            "p50": statistics.median(timings),
+            "p95": _percentile(timings, 95),
+            "p99": _percentile(timings, 99),
+            "errors": errors,
+        }
@@ -0,0 +1,115 @@
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from tasks.management.commands.bench_serving import MODES, _free_port
+
+# DJANGO_WARMUP / GUNICORN_PRELOAD for each startup mode (gunicorn.conf.py).
+STARTUPS = {
+    "cold": {"DJANGO_WARMUP": "off", "GUNICORN_PRELOAD": "false"},
+    "background": {"DJANGO_WARMUP": "background", "GUNICORN_PRELOAD": "false"},
+    "preload": {"GUNICORN_PRELOAD": "true"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Start gunicorn (with gunicorn.conf.py) in each warm-up mode and report "
+        "the time until /health/ is ready and the latency of the first requests "
+        "each worker serves, against steady-state latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=3)
+        parser.add_argument("--serving", choices=list(MODES), default="wsgi")
+        parser.add_argument("--startup", dest="startups", action="append", choices=list(STARTUPS),
+                            help="Modes to measure (default all).")
+        parser.add_argument("--path", action="append",
+                            help="Path to request (repeatable); default the login page and two list APIs.")
+        parser.add_argument("--steady", type=int, default=20,
+                            help="Requests per path after the first round, for the steady-state median.")
+
+    def handle(self, *args, **opts):
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_startup needs httpx (pip install -r requirements.txt).")
+
+        user = User.objects.create_user(f"bench-startup-{os.getpid()}")
+        try:
+            token = Token.objects.create(user=user).key
+            paths = opts["path"] or ["/accounts/login/", "/tasks/api/tasks/", "/tasks/api/notes/"]
+            rows = {
+                startup: self._measure(startup, paths, token, **opts)
+                for startup in opts["startups"] or list(STARTUPS)
+            }
+        finally:
+            user.delete()
+
+        self.stdout.write(
+            f"\n{'startup':<11} {'ready s':>8} {'first ms':>9} {'worst first ms':>15} {'steady ms':>10}"
+        )
+        for startup, row in rows.items():
+            self.stdout.write(
+                f"{startup:<11} {row['ready']:8.2f} {row['first']:9.1f} "
+                f"{row['worst_first']:15.1f} {row['steady']:10.1f}"
+            )
+
+    def _measure(self, startup, paths, token, workers, serving, steady, **_):
+        import httpx
+
+        port = _free_port()
+        env = {**os.environ, **STARTUPS[startup], "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+               "GUNICORN_WORKERS": str(workers), "GUNICORN_BIND": f"127.0.0.1:{port}"}
+        env.pop("DJANGO_SERVING", None)
+        if startup == "preload":
+            env.pop("DJANGO_WARMUP", None)
+        command = [sys.executable, "-m", "gunicorn", "--log-level", "warning", *MODES[serving]]
+        base = f"http://127.0.0.1:{port}"
+        headers = {"Authorization": f"Token {token}", "Host": "localhost"}
+
+        start = time.perf_counter()
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, start_new_session=True)
+        try:
+            while True:
+                if server.poll() is not None:
+                    raise CommandError(f"The server exited with status {server.returncode}.")
+                if time.perf_counter() - start > 120:
+                    raise CommandError(f"{startup}: /health/ was not ready after 120s.")
+                try:
+                    if httpx.get(f"{base}/health/", timeout=2).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.05)
+            ready = time.perf_counter() - start
+
+            def timed(path):
+                # A new connection each time, so requests spread over the workers.
+                request_start = time.perf_counter()
+                response = httpx.get(base + path, headers=headers, timeout=60)
+                if response.status_code >= 400:
+                    raise CommandError(f"GET {path} answered {response.status_code}")
+                return (time.perf_counter() - request_start) * 1000
+
+            # One round per worker: the first requests that find each worker cold.
+            first = [timed(path) for _ in range(workers) for path in paths]
+            later = [timed(path) for _ in range(steady) for path in paths]
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+        self.stdout.write(f"{startup}: ready in {ready:.2f}s, first requests {', '.join(f'{t:.0f}' for t in first)} ms")
+        return {
+            "ready": ready,
+            "first": first[0],
+            "worst_first": max(first),
+            "steady": statistics.median(later),
+        }
@@ -0,0 +1,100 @@
+import statistics
+import time
+
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+
+from tasks.models import Task
+from tasks.visibility import LIST_ORDERING, VisibleList, visible_to
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the legacy (own | shared).distinct() list query with the "
+        "visibility semi-join and with the paged UNION the list views use "
+        "(VisibleList). Seeds data inside a transaction that is rolled back, "
+        "so it is safe to run against a real database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=10000,
+                            help="Shared tasks per group (default 10000).")
+        parser.add_argument("--groups", type=int, default=3)
+        parser.add_argument("--others", type=int, default=0,
+                            help="Tasks of another user the viewer cannot see.")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--page", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._run(**opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, objects, groups, others, repeat, page, **_):
+        owner = User.objects.create(username="bench-visibility-owner")
+        viewer = User.objects.create(username="bench-visibility-viewer")
+        notes = "lorem ipsum " * 40
+        for g in range(groups):
+            group = Group.objects.create(name=f"bench-visibility-{g}")
+            viewer.groups.add(group)
+            tasks = Task.objects.bulk_create(
+                Task(user=owner, title=f"g{g}-{i}", notes=notes)
+                for i in range(objects)
+            )
+            Task.groups.through.objects.bulk_create(
+                Task.groups.through(task_id=t.pk, group_id=group.pk) for t in tasks
+            )
+        Task.objects.bulk_create(
+            Task(user=viewer, title=f"own-{i}", notes=notes) for i in range(objects // 10)
+        )
+        Task.objects.bulk_create(
+            (Task(user=owner, title=f"other-{i}", notes=notes) for i in range(others)),
+            batch_size=5000,
+        )
+        if connection.vendor == 'postgresql':
+            # Fresh statistics, or the planner costs every table as empty.
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.stdout.write(
+            f"Seeded {objects} shared tasks x {groups} groups, "
+            f"{objects // 10} own tasks, {others} invisible tasks."
+        )
+
+        def legacy():
+            own = Task.objects.filter(user=viewer)
+            shared = Task.objects.filter(groups__in=viewer.groups.all())
+            return (own | shared).distinct().order_by(*LIST_ORDERING)
+
+        def current():
+            return visible_to(Task, viewer)
+
+        def union():
+            return VisibleList(Task, viewer)
+
+        results = {}
+        for label, build in (("legacy distinct", legacy), ("semi-join", current), ("paged union", union)):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                page_obj = Paginator(build(), 10).get_page(page)
+                list(page_obj)
+                timings.append((time.perf_counter() - start) * 1000)
+            results[label] = (statistics.median(timings), page_obj.paginator.count)
+
+        for label, (median, count) in results.items():
+            self.stdout.write(f"{label:<16} median {median:8.2f} ms  ({count} rows)")
+        legacy_ms = results["legacy distinct"][0]
+        for label in ("semi-join", "paged union"):
+            if results[label][0]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label}: speed-up x{legacy_ms / results[label][0]:.1f}"
+                ))
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.event_reminders import LagStats, ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Long-running dispatcher for Event.reminder. Upcoming reminders are "
+        "kept in an in-process heap and handed to the outbox in batches when "
+        "due; run several copies to share the load. Lag is the time between "
+        "a reminder's due time and its hand-off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Dispatch what is due now and exit.")
+        parser.add_argument("--lookahead", type=float, default=300.0,
+                            help="Seconds of upcoming reminders kept in memory.")
+        parser.add_argument("--refresh", type=float, default=10.0,
+                            help="Seconds between scans for new or moved reminders.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--load-limit", type=int, default=5000,
+                            help="Maximum reminders read per scan.")
+        parser.add_argument("--stats-every", type=float, default=60.0,
+                            help="Seconds between lag reports.")
+
+    def handle(self, *args, **opts):
+        scheduler = ReminderScheduler(
+            lookahead=timedelta(seconds=opts["lookahead"]),
+            refresh=timedelta(seconds=opts["refresh"]),
+            load_limit=opts["load_limit"],
+            batch_size=opts["batch_size"],
+        )
+        idle = timedelta(seconds=opts["refresh"])
+        stats, total = LagStats(), 0
+        reported = time.monotonic()
+        try:
+            while True:
+                total += scheduler.run_once(stats)
+                if opts["once"]:
+                    break
+                if time.monotonic() - reported >= opts["stats_every"]:
+                    self.stdout.write(f"{timezone.now():%H:%M:%S} {stats} queued={len(scheduler.queued)}")
+                    stats, reported = LagStats(), time.monotonic()
+                time.sleep(scheduler.seconds_to_wait(timezone.now(), idle))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Dispatched {total} event reminder(s). {stats}"))
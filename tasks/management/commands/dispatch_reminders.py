@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks import reminders
+
+
+class Command(BaseCommand):
+    help = "Send queued ReminderRequest rows to the scheduler API in concurrent batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and poll for new reminders.")
+        parser.add_argument("--interval", type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty (with --loop).")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=reminders.DEFAULT_MAX_ATTEMPTS)
+        parser.add_argument("--async", dest="use_async", action="store_true",
+                            help="Send each batch from one event loop (httpx) instead of a thread pool.")
+        parser.add_argument("--concurrency", type=int, default=None,
+                            help="Requests in flight per batch (default SCHEDULER_MAX_CONCURRENCY).")
+
+    def handle(self, *args, **opts):
+        total_ok = total_failed = 0
+        try:
+            while True:
+                ok, failed = reminders.dispatch(
+                    limit=opts["batch_size"], max_attempts=opts["max_attempts"],
+                    use_async=opts["use_async"], concurrency=opts["concurrency"],
+                )
+                total_ok += ok
+                total_failed += failed
+                if not opts["loop"]:
+                    break
+                if ok + failed == 0:
+                    time.sleep(opts["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f"Scheduled {total_ok} reminder(s), {total_failed} failed."
+        ))
@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a user's tasks, habits, notes and events as NDJSON or CSV. "
+        "Rows are read in chunks without building model instances, so memory "
+        "use does not depend on how much the user has."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--format", choices=export.FORMATS, default="ndjson")
+        parser.add_argument("--type", dest="types",
+                            help="Comma-separated subset, e.g. tasks,notes (default: all).")
+        parser.add_argument("--output", "-o",
+                            help="File to write (default: standard output).")
+
+    def handle(self, *args, username, format, types, output, **opts):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {username!r}.")
+        try:
+            kinds = export.parse_kinds(types)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        started = time.perf_counter()
+        out = open(output, "w", encoding="utf-8", newline="") if output else sys.stdout
+        written = 0
+        try:
+            for block in export.stream(user, format, kinds):
+                out.write(block)
+                written += len(block)
+        finally:
+            if output:
+                out.close()
+        if output:
+            self.stderr.write(self.style.SUCCESS(
+                f"Wrote {written / 1e6:.1f} MB to {output} in {time.perf_counter() - started:.1f}s."
+            ))
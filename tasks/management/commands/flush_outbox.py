@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks import outbox
+
+
+class Command(BaseCommand):
+    help = "Publish pending OutboxEvent rows to EventBridge in PutEvents-sized batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running and poll for new events.")
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty (with --loop).")
+        parser.add_argument("--limit", type=int, default=500,
+                            help="Maximum events claimed per pass.")
+        parser.add_argument("--max-attempts", type=int, default=outbox.DEFAULT_MAX_ATTEMPTS)
+
+    def handle(self, *args, **opts):
+        total = outbox.FlushStats()
+        try:
+            while True:
+                stats = outbox.flush(limit=opts["limit"], max_attempts=opts["max_attempts"])
+                total.sent += stats.sent
+                total.failed += stats.failed
+                total.dead += stats.dead
+                total.calls += stats.calls
+                total.seconds += stats.seconds
+                if stats.calls:
+                    self.stdout.write(str(stats))
+                if not opts["loop"]:
+                    break
+                if stats.sent + stats.failed < opts["limit"]:
+                    time.sleep(opts["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Total: {total}"))
+        dead = outbox.dead_letters(opts["max_attempts"]).count()
+        if dead:
+            self.stderr.write(f"{dead} event(s) reached --max-attempts and will not be retried.")
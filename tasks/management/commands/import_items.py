@@ -0,0 +1,57 @@
+import io
+import json
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import export
+from tasks.importer import BATCH_SIZE, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks, habits, notes and events from CSV or NDJSON (the "
+        "api/export/ formats) for one user. The file is streamed, validated "
+        "and inserted in batches; TaskCreated events are queued at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, or - for standard input.")
+        parser.add_argument("--user", required=True, help="Username that will own the rows.")
+        parser.add_argument("--format", choices=export.FORMATS,
+                            help="Default: from the file extension, else ndjson.")
+        parser.add_argument("--type", dest="default_type", choices=list(export.KINDS),
+                            help="Type of records that have no 'type' field.")
+        parser.add_argument("--group", action="append", default=[], dest="groups",
+                            help="Also share every row with this group (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Validate only; write nothing.")
+
+    def handle(self, *args, path, user, format, default_type, groups, batch_size, dry_run, **opts):
+        try:
+            owner = User.objects.get(username=user)
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {user!r}.")
+        fmt = format or ("csv" if path.endswith(".csv") else "ndjson")
+
+        importer = Importer(owner, default_type=default_type, groups=groups,
+                            batch_size=batch_size, dry_run=dry_run)
+        started = time.perf_counter()
+        if path == "-":
+            source = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        else:
+            source = open(path, encoding="utf-8", newline="")
+        with source:
+            stats = importer.run(read_records(source, fmt))
+
+        for number, errors in stats.errors:
+            self.stderr.write(f"record {number}: {json.dumps(errors)}")
+        if stats.error_count > len(stats.errors):
+            self.stderr.write(f"... and {stats.error_count - len(stats.errors)} more rejected record(s)")
+        elapsed = time.perf_counter() - started
+        rate = stats.read / elapsed if elapsed else 0
+        prefix = "Dry run: " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{stats} in {elapsed:.1f}s ({rate:.0f} records/s)"))
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from tasks import recurrence
+from tasks.models import RecurrenceRule, TaskOccurrence
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep TaskOccurrence rows materialized up to the recurrence horizon. "
+        "Only rules whose horizon is behind are loaded, in primary-key chunks, "
+        "and only the missing tail of each is generated. Run it daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=recurrence.HORIZON.days,
+                            help="How far ahead to materialize.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--keep-days", type=int, default=90,
+                            help="Delete occurrences that were due more than this many days ago.")
+
+    def handle(self, *args, days, chunk_size, keep_days, **opts):
+        now = timezone.now()
+        horizon = now + timedelta(days=days)
+        behind = (
+            RecurrenceRule.objects
+            .filter(task__completed=False)
+            .filter(Q(materialized_until__isnull=True) | Q(materialized_until__lt=horizon))
+            .filter(Q(ends__isnull=True) | Q(ends__gte=now))
+            .select_related("task")
+            .order_by("pk")
+        )
+        rules = created = 0
+        last_pk = 0
+        while True:
+            chunk = list(behind.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            created += recurrence.materialize(chunk, now, horizon)
+            rules += len(chunk)
+            last_pk = chunk[-1].pk
+
+        pruned, _ = TaskOccurrence.objects.filter(due__lt=now - timedelta(days=keep_days)).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Materialized {created} occurrence(s) for {rules} rule(s) up to "
+            f"{horizon:%Y-%m-%d}; pruned {pruned}."
+        ))
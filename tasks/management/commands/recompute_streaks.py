@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks import caching
+from tasks.models import Habit, HabitCompletion
+from tasks.streaks import advance
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild Habit.streak and Habit.last_done from HabitCompletion rows. "
+        "Completions are streamed in (habit, done_at) index order and results "
+        "are written in chunks, so memory stays flat however many rows exist. "
+        "Habits without completions are reset to no streak."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000,
+                            help="Rows fetched per round trip and habits per UPDATE batch.")
+        parser.add_argument("--habit", type=int, action="append", dest="habits",
+                            help="Only recompute these habit ids (repeatable).")
+
+    def handle(self, *args, chunk_size, habits, **opts):
+        started = time.perf_counter()
+        rows = (
+            HabitCompletion.objects
+            .order_by("habit_id", "done_at")
+            .values_list("habit_id", "habit__frequency", "done_at")
+        )
+        if habits:
+            rows = rows.filter(habit_id__in=habits)
+
+        pending, updated, seen = [], 0, 0
+        current_id = streak = last_done = frequency = None
+        for habit_id, habit_frequency, done_at in rows.iterator(chunk_size=chunk_size):
+            seen += 1
+            if habit_id != current_id:
+                if current_id is not None:
+                    pending.append(Habit(pk=current_id, streak=streak, last_done=last_done))
+                current_id, frequency, streak, last_done = habit_id, habit_frequency, 0, None
+                if len(pending) >= chunk_size:
+                    updated += self._flush(pending)
+                    pending = []
+            streak, last_done = advance(frequency, streak, last_done, done_at)
+        if current_id is not None:
+            pending.append(Habit(pk=current_id, streak=streak, last_done=last_done))
+        updated += self._flush(pending)
+
+        # Migration 0018 gave every dated streak its completions, so a habit
+        # left without any has had them all deleted.
+        stale = (
+            Habit.objects.filter(completions__isnull=True)
+            .exclude(streak=0, last_done__isnull=True)
+            .values_list("pk", flat=True)
+        )
+        if habits:
+            stale = stale.filter(pk__in=habits)
+        stale = list(stale)
+        for start in range(0, len(stale), chunk_size):
+            updated += self._flush([
+                Habit(pk=pk, streak=0, last_done=None) for pk in stale[start:start + chunk_size]
+            ])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {updated} habit(s) from {seen} completion(s) in {elapsed:.1f}s."
+        ))
+
+    def _flush(self, habits):
+        if not habits:
+            return 0
+        now = timezone.now()
+        for habit in habits:
+            habit.last_modified = now
+        Habit.objects.bulk_update(habits, ["streak", "last_done", "last_modified"])
+        if caching.enabled():
+            pks = [habit.pk for habit in habits]
+            caching.bump_users(Habit.objects.filter(pk__in=pks).values_list("user_id", flat=True))
+            caching.bump_groups(caching.shared_group_ids(Habit, pks))
+        return len(habits)
@@ -0,0 +1,46 @@
+"""
+Group membership lookups shared by the group_tags filters, the in_group /
+in_groups view decorators, the permissions and the visibility queries.
+
+Memberships are loaded with one query the first time they are needed and
+memoised on the user instance. ``request.user`` lives for exactly one
+request, so this is a request-scoped cache; ``invalidate`` drops it when the
+user's ``groups`` relation changes (see ``tasks.signals``).
+"""
+
+_CACHE_ATTR = '_tasks_group_membership'
+
+
+def _memberships(user):
+    cached = getattr(user, _CACHE_ATTR, None)
+    if cached is None:
+        cached = dict(user.groups.values_list('name', 'pk'))
+        setattr(user, _CACHE_ATTR, cached)
+    return cached
+
+
+def group_names(user):
+    """Names of the groups ``user`` belongs to."""
+    if not getattr(user, 'is_authenticated', False):
+        return frozenset()
+    return frozenset(_memberships(user))
+
+
+def group_ids(user):
+    """Primary keys of the groups ``user`` belongs to."""
+    if not getattr(user, 'is_authenticated', False):
+        return []
+    return list(_memberships(user).values())
+
+
+def in_any_group(user, names):
+    """True when ``user`` is a member of at least one of ``names``."""
+    return not group_names(user).isdisjoint(names)
+
+
+def invalidate(user):
+    """Forget cached memberships, e.g. after ``user.groups.add(...)``."""
+    try:
+        delattr(user, _CACHE_ATTR)
+    except AttributeError:
+        pass
@@ -0,0 +1,227 @@
+"""
+Per-view request metrics in Prometheus text format.
+
+``RequestMetricsMiddleware`` (tasks.middleware) calls ``observe`` once per
+request. Each worker process accumulates its own counters and histograms
+in memory and writes a snapshot to ``METRICS_DIR/<pid>.json`` at most
+every ``METRICS_FLUSH_INTERVAL`` seconds; ``render`` merges the snapshots
+of every live worker on the host, so whichever gunicorn worker answers
+``/metrics`` reports the totals of all of them. Snapshots are cumulative,
+so a lost or late write only delays numbers, it never loses them.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from . import pooling
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_lock = threading.Lock()
+# One snapshot writer at a time: the threads of a worker share its tmp file.
+_flush_lock = threading.Lock()
+_state = None
+_last_flush = 0.0
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def directory():
+    return getattr(settings, 'METRICS_DIR', '') or os.path.join(
+        tempfile.gettempdir(), 'productivity-metrics'
+    )
+
+
+def _empty():
+    return {
+        'requests': {},      # "view|method|status" -> count
+        'latency': {},       # view -> [bucket counts..., +Inf, sum]
+        'queries': {},       # view -> [bucket counts..., +Inf, sum]
+        'sql_seconds': {},   # view -> seconds
+        'duplicates': {},    # view -> duplicate queries
+        'db_pool': {},       # alias -> tasks.pooling counters and gauges
+    }
+
+
+def _observe_histogram(histograms, view, buckets, value):
+    hist = histograms.get(view)
+    if hist is None:
+        hist = histograms[view] = [0] * (len(buckets) + 1) + [0.0]
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            hist[i] += 1
+            break
+    else:
+        hist[len(buckets)] += 1
+    hist[-1] += value
+
+
+def observe(view, method, status, seconds, queries, sql_seconds, duplicates):
+    global _state
+    with _lock:
+        if _state is None:
+            _state = _empty()
+        key = f'{view}|{method}|{status}'
+        _state['requests'][key] = _state['requests'].get(key, 0) + 1
+        _observe_histogram(_state['latency'], view, LATENCY_BUCKETS, seconds)
+        _observe_histogram(_state['queries'], view, QUERY_BUCKETS, queries)
+        _state['sql_seconds'][view] = _state['sql_seconds'].get(view, 0.0) + sql_seconds
+        if duplicates:
+            _state['duplicates'][view] = _state['duplicates'].get(view, 0) + duplicates
+    maybe_flush()
+
+
+def maybe_flush(force=False):
+    """Write this worker's snapshot if METRICS_FLUSH_INTERVAL has passed."""
+    global _last_flush
+    if _state is None:
+        return
+    # A request finding another thread writing skips; the next one flushes.
+    if not _flush_lock.acquire(blocking=force):
+        return
+    try:
+        now = time.monotonic()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0)
+        if not force and now - _last_flush < interval:
+            return
+        _last_flush = now
+        with _lock:
+            _state['db_pool'] = pooling.stats()
+            payload = json.dumps(_state)
+        path = directory()
+        os.makedirs(path, exist_ok=True)
+        target = os.path.join(path, f'{os.getpid()}.json')
+        # Write-then-rename, so a reader never sees half a file.
+        tmp = f'{target}.tmp'
+        with open(tmp, 'w') as fh:
+            fh.write(payload)
+        os.replace(tmp, target)
+    finally:
+        _flush_lock.release()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _snapshots():
+    path = directory()
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        pid = int(name[:-5]) if name[:-5].isdigit() else None
+        if pid is None or not _alive(pid):
+            # A dead worker's counters are dropped; Prometheus treats it
+            # as a counter reset.
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+            continue
+        try:
+            with open(os.path.join(path, name)) as fh:
+                yield json.load(fh)
+        except (OSError, ValueError):
+            continue
+
+
+def collect():
+    """Merged state of every live worker on this host."""
+    maybe_flush(force=True)
+    merged = _empty()
+    for snapshot in _snapshots():
+        for name in ('requests', 'sql_seconds', 'duplicates'):
+            for key, value in snapshot.get(name, {}).items():
+                merged[name][key] = merged[name].get(key, 0) + value
+        for name in ('latency', 'queries'):
+            for view, hist in snapshot.get(name, {}).items():
+                current = merged[name].get(view)
+                merged[name][view] = hist if current is None else [a + b for a, b in zip(current, hist)]
+        for alias, values in snapshot.get('db_pool', {}).items():
+            totals = merged['db_pool'].setdefault(alias, {})
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0) + value
+    return merged
+
+
+# (metric, tasks.pooling snapshot key, type, help), summed over workers.
+POOL_METRICS = (
+    ('db_pool_connections', 'size', 'gauge', 'Open pooled connections, idle or in use.'),
+    ('db_pool_idle_connections', 'idle', 'gauge', 'Pooled connections waiting for a checkout.'),
+    ('db_pool_max_connections', 'max_size', 'gauge', 'Pool capacity.'),
+    ('db_pool_checkouts_total', 'checkouts', 'counter', 'Connections handed out.'),
+    ('db_pool_waits_total', 'waits', 'counter', 'Checkouts that had to wait for a free connection.'),
+    ('db_pool_wait_seconds_total', 'wait_seconds', 'counter', 'Time spent waiting for a free connection.'),
+    ('db_pool_timeouts_total', 'timeouts', 'counter', 'Checkouts that gave up waiting.'),
+    ('db_pool_connections_created_total', 'created', 'counter', 'Connections opened.'),
+    ('db_pool_connections_closed_total', 'closed', 'counter', 'Connections closed (broken, expired or drained).'),
+    ('db_pool_check_failures_total', 'check_failures', 'counter', 'Idle connections that failed their health check.'),
+)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram_lines(name, help_text, histograms, buckets):
+    yield f'# HELP {name} {help_text}'
+    yield f'# TYPE {name} histogram'
+    for view, hist in sorted(histograms.items()):
+        view = _label(view)
+        running = 0
+        for bound, count in zip(buckets, hist):
+            running += count
+            yield f'{name}_bucket{{view="{view}",le="{bound}"}} {running}'
+        running += hist[len(buckets)]
+        yield f'{name}_bucket{{view="{view}",le="+Inf"}} {running}'
+        yield f'{name}_sum{{view="{view}"}} {hist[-1]}'
+        yield f'{name}_count{{view="{view}"}} {running}'
+
+
+def render():
+    state = collect()
+    lines = [
+        '# HELP http_requests_total Requests handled, by view, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for key, count in sorted(state['requests'].items()):
+        view, method, status = key.rsplit('|', 2)
+        lines.append(
+            f'http_requests_total{{view="{_label(view)}",method="{method}",status="{status}"}} {count}'
+        )
+    lines += _histogram_lines('http_request_duration_seconds',
+                              'Time spent in the Django handler.', state['latency'], LATENCY_BUCKETS)
+    lines += _histogram_lines('db_queries_per_request',
+                              'SQL queries executed per request.', state['queries'], QUERY_BUCKETS)
+    lines += ['# HELP db_query_seconds_total Time spent executing SQL.',
+              '# TYPE db_query_seconds_total counter']
+    lines += [f'db_query_seconds_total{{view="{_label(v)}"}} {s}'
+              for v, s in sorted(state['sql_seconds'].items())]
+    lines += ['# HELP db_duplicate_queries_total Repeats of an identical SQL statement within one '
+              'request (N+1 candidates).',
+              '# TYPE db_duplicate_queries_total counter']
+    lines += [f'db_duplicate_queries_total{{view="{_label(v)}"}} {n}'
+              for v, n in sorted(state['duplicates'].items())]
+    for name, key, kind, help_text in POOL_METRICS:
+        if state['db_pool']:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        lines += [f'{name}{{alias="{_label(alias)}"}} {values[key]}'
+                  for alias, values in sorted(state['db_pool'].items())]
+    return '\n'.join(lines) + '\n'
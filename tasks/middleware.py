@@ -0,0 +1,180 @@
+"""
+Request instrumentation: query count, SQL time, duplicate queries and
+handler latency for every request.
+
+Queries are observed by one ``execute_wrapper`` added to every database
+connection when it opens (connected in TasksConfig.ready), which costs one
+extra Python call per query. It reports to the observer of the current
+request, held in a context variable. asgiref copies context variables into
+the threads that run sync code under ASGI: both Django's thread for plain
+sync views and the tasks.aio pool. So a request's queries are counted
+whichever thread runs them.
+
+The per-request numbers go to the client as a ``Server-Timing`` header and
+to tasks.metrics, which aggregates them per URL name for ``/metrics``.
+For a streaming response the header covers the work done before
+streaming. /metrics gets the totals once the body has been sent, including
+the queries run while it was produced.
+"""
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger("tasks")
+
+_current = ContextVar('tasks_query_observer', default=None)
+
+
+class _QueryObserver:
+    __slots__ = ('count', 'seconds', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            # Parameters are bound separately, so an N+1 loop repeats the
+            # very same SQL string.
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    def duplicates(self):
+        return self.count - len(self.statements)
+
+    def worst(self):
+        return max(self.statements.items(), key=lambda item: item[1])
+
+
+def _observe(execute, sql, params, many, context):
+    observer = _current.get()
+    if observer is None:
+        return execute(sql, params, many, context)
+    return observer(execute, sql, params, many, context)
+
+
+def install_observer(sender=None, connection=None, **kwargs):
+    # First in the list: Django's execute_wrapper() context manager pops the
+    # last entry when its block ends.
+    if _observe not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _observe)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or '<unnamed>'
+
+
+class RequestMetricsMiddleware:
+    """Place first, so the latency covers every other middleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = metrics.enabled()
+        self.n_plus_one = getattr(settings, 'METRICS_N_PLUS_ONE_THRESHOLD', 10)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        observer = _QueryObserver()
+        start = time.perf_counter()
+        token = _current.set(observer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._respond(request, response, observer, start)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        observer = _QueryObserver()
+        start = time.perf_counter()
+        token = _current.set(observer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._respond(request, response, observer, start)
+
+    def _respond(self, request, response, observer, start):
+        elapsed = time.perf_counter() - start
+        response['Server-Timing'] = (
+            f'db;dur={observer.seconds * 1000:.1f};desc="{observer.count} queries", '
+            f'app;dur={elapsed * 1000:.1f}'
+        )
+        if not response.streaming:
+            self._record(request, response.status_code, observer, elapsed)
+            return response
+
+        def done():
+            self._record(request, response.status_code, observer, time.perf_counter() - start)
+
+        if response.is_async:
+            response.streaming_content = self._astream(response.streaming_content, observer, done)
+        else:
+            response.streaming_content = self._stream(response.streaming_content, observer, done)
+        return response
+
+    @staticmethod
+    def _stream(content, observer, done):
+        # The observer is set around each step only: between chunks the
+        # server, not this request, owns the thread.
+        try:
+            iterator = iter(content)
+            while True:
+                token = _current.set(observer)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                yield chunk
+        finally:
+            done()
+
+    @staticmethod
+    async def _astream(content, observer, done):
+        try:
+            iterator = aiter(content)
+            while True:
+                token = _current.set(observer)
+                try:
+                    chunk = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                yield chunk
+        finally:
+            done()
+
+    def _record(self, request, status_code, observer, elapsed):
+        view = view_name(request)
+        duplicates = observer.duplicates()
+        if duplicates:
+            sql, repeats = observer.worst()
+            if repeats >= self.n_plus_one:
+                logger.warning("Possible N+1 in %s (%s %s): %d executions of %s",
+                               view, request.method, request.path, repeats, sql[:200])
+        metrics.observe(view, request.method, status_code, elapsed,
+                        observer.count, observer.seconds, duplicates)
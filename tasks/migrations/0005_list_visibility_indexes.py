@@ -0,0 +1,46 @@
+# Generated by Django 4.2.10 on 2026-10-18 03:26
+
+from django.db import migrations, models
+
+# The auto-created ``groups`` through tables only index (obj_id, group_id) and
+# group_id alone. The visibility semi-join looks up object ids by group, so a
+# (group_id, obj_id) index lets it answer from the index without table reads.
+THROUGH_TABLES = ['task', 'habit', 'note', 'event']
+
+
+def _through_index_ops():
+    ops = []
+    for name in THROUGH_TABLES:
+        index = f"tasks_{name}_groups_group_obj_idx"
+        ops.append(migrations.RunSQL(
+            sql=f"CREATE INDEX {index} ON tasks_{name}_groups (group_id, {name}_id);",
+            reverse_sql=f"DROP INDEX {index};",
+        ))
+    return ops
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_profile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'created'], name='event_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='habit',
+            index=models.Index(fields=['user', 'created'], name='habit_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'created'], name='note_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created'], name='task_user_created_idx'),
+        ),
+        *_through_index_ops(),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.10 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_reminderrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='events', to='tasks.tag'),
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='habits', to='tasks.tag'),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='notes', to='tasks.tag'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='normalized_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='tasks', to='tasks.tag'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+MODELS = ['Task', 'Habit', 'Note', 'Event']
+CHUNK = 2000
+
+
+def _parse(raw):
+    names = []
+    for part in (raw or '').split(','):
+        name = part.strip().lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill(apps, schema_editor):
+    Tag = apps.get_model('tasks', 'Tag')
+    for model_name in MODELS:
+        model = apps.get_model('tasks', model_name)
+        through = model.normalized_tags.through
+        fk = f"{model_name.lower()}_id"
+        rows = model.objects.exclude(tags='').values_list('pk', 'tags').order_by('pk')
+        chunk = []
+        for row in rows.iterator(chunk_size=CHUNK):
+            chunk.append(row)
+            if len(chunk) >= CHUNK:
+                _write(Tag, through, fk, chunk)
+                chunk = []
+        _write(Tag, through, fk, chunk)
+
+
+def _write(Tag, through, fk, rows):
+    if not rows:
+        return
+    wanted = {pk: _parse(raw) for pk, raw in rows}
+    names = sorted({n for tags in wanted.values() for n in tags})
+    Tag.objects.bulk_create([Tag(name=n) for n in names], ignore_conflicts=True)
+    ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    through.objects.bulk_create(
+        [through(**{fk: pk, 'tag_id': ids[n]}) for pk, tags in wanted.items() for n in tags],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_tag'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
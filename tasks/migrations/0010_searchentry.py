@@ -0,0 +1,120 @@
+# Generated by Django 4.2.10 on 2026-10-18 03:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Full-text index on tasks_searchentry. PostgreSQL gets a generated,
+# weighted tsvector column with a GIN index; SQLite (settings_ci) gets an
+# external-content FTS5 table kept current by triggers.
+POSTGRES_SQL = [
+    """
+    ALTER TABLE tasks_searchentry ADD COLUMN document tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX tasks_searchentry_document_idx ON tasks_searchentry USING gin (document)",
+]
+SQLITE_SQL = [
+    """
+    CREATE VIRTUAL TABLE tasks_searchentry_fts USING fts5(
+        title, body, content='tasks_searchentry', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_searchentry_ai AFTER INSERT ON tasks_searchentry BEGIN
+        INSERT INTO tasks_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_searchentry_ad AFTER DELETE ON tasks_searchentry BEGIN
+        INSERT INTO tasks_searchentry_fts(tasks_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_searchentry_au AFTER UPDATE ON tasks_searchentry BEGIN
+        INSERT INTO tasks_searchentry_fts(tasks_searchentry_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO tasks_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_searchentry_ai",
+    "DROP TRIGGER IF EXISTS tasks_searchentry_ad",
+    "DROP TRIGGER IF EXISTS tasks_searchentry_au",
+    "DROP TABLE IF EXISTS tasks_searchentry_fts",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'postgresql': POSTGRES_SQL, 'sqlite': SQLITE_SQL}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_REVERSE_SQL:
+            schema_editor.execute(sql)
+    # On PostgreSQL the column and its index go away with the table.
+
+
+# (model, kind, title field, body fields) as of this migration
+SOURCES = [
+    ('Task', 'task', 'title', ('notes', 'tags')),
+    ('Habit', 'habit', 'name', ('notes', 'tags')),
+    ('Note', 'note', 'title', ('content', 'tags')),
+    ('Event', 'event', 'title', ('description', 'location', 'tags')),
+]
+
+
+def backfill(apps, schema_editor):
+    SearchEntry = apps.get_model('tasks', 'SearchEntry')
+    for model_name, kind, title_field, body_fields in SOURCES:
+        model = apps.get_model('tasks', model_name)
+        fields = ('pk', 'user_id', 'last_modified', title_field) + body_fields
+        batch = []
+        for row in model.objects.values_list(*fields).order_by('pk').iterator(chunk_size=2000):
+            pk, user_id, last_modified, title, *body = row
+            batch.append(SearchEntry(
+                kind=kind, object_id=pk, user_id=user_id, title=title,
+                body='\n'.join(part for part in body if part), last_modified=last_modified,
+            ))
+            if len(batch) >= 2000:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0009_backfill_normalized_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('task', 'Task'), ('habit', 'Habit'), ('note', 'Note'), ('event', 'Event')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('last_modified', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='searchentry_kind_object_uniq'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
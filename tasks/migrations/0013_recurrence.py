@@ -0,0 +1,57 @@
+# Generated by Django 4.2.10 on 2026-10-18 03:40
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0012_habitcompletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurrenceRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('freq', models.CharField(choices=[('Daily', 'Daily'), ('Weekly', 'Weekly'), ('Monthly', 'Monthly')], default='Weekly', max_length=10)),
+                ('interval', models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('weekdays', models.CharField(blank=True, help_text='Weekly rules only: comma-separated weekdays, 0 = Monday. Defaults to the start day.', max_length=13, validators=[django.core.validators.RegexValidator('^[0-6](,[0-6])*$', 'Use weekday numbers 0-6 separated by commas.')])),
+                ('start', models.DateTimeField()),
+                ('until', models.DateTimeField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)])),
+                ('ends', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('materialized_until', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence', to='tasks.task')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due', models.DateTimeField()),
+                ('completed', models.BooleanField(default=False)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='tasks.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_occurrences', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'due'], name='occurrence_user_due_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskoccurrence',
+            constraint=models.UniqueConstraint(fields=('task', 'due'), name='occurrence_task_due_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='recurrencerule',
+            index=models.Index(fields=['start', 'ends'], name='recurrence_window_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recurrencerule',
+            index=models.Index(fields=['materialized_until'], name='recurrence_horizon_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 03:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_recurrence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['user', 'event_date'], name='event_user_date_idx'),
+        ),
+    ]
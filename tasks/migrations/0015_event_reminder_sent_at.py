@@ -0,0 +1,22 @@
+# Generated by Django 4.2.10 on 2026-10-18 03:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_event_user_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('reminder__isnull', False), ('reminder_sent_at__isnull', True)), fields=['reminder'], name='event_reminder_due_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models import F
+from django.utils import timezone
+
+
+def mark_past_reminders_sent(apps, schema_editor):
+    # Reminders that were due before the dispatcher existed count as sent;
+    # otherwise its first run would deliver every past reminder at once.
+    Event = apps.get_model('tasks', 'Event')
+    Event.objects.filter(
+        reminder__isnull=False, reminder_sent_at__isnull=True, reminder__lte=timezone.now(),
+    ).update(reminder_sent_at=F('reminder'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0016_outboxevent_claimed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_past_reminders_sent, migrations.RunPython.noop),
+    ]
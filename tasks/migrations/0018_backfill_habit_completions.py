@@ -0,0 +1,58 @@
+import calendar
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+CHUNK = 2000
+
+
+def _period_back(frequency, local, periods):
+    """``local`` (naive local time) moved back by ``periods`` habit periods."""
+    if frequency == 'Weekly':
+        return local - timedelta(weeks=periods)
+    if frequency == 'Monthly':
+        month = local.year * 12 + local.month - 1 - periods
+        year, month = divmod(month, 12)
+        day = min(local.day, calendar.monthrange(year, month + 1)[1])
+        return local.replace(year=year, month=month + 1, day=day)
+    return local - timedelta(days=periods)
+
+
+def backfill(apps, schema_editor):
+    # Streaks used to be stored without a history. Give every such habit one
+    # completion per counted period, ending at last_done, so that
+    # recompute_streaks rebuilds the same streak instead of resetting it.
+    Habit = apps.get_model('tasks', 'Habit')
+    HabitCompletion = apps.get_model('tasks', 'HabitCompletion')
+    habits = (
+        Habit.objects
+        .filter(last_done__isnull=False, completions__isnull=True)
+        .values_list('pk', 'user_id', 'frequency', 'streak', 'last_done')
+        .order_by('pk')
+    )
+    rows = []
+    for pk, user_id, frequency, streak, last_done in habits.iterator(chunk_size=CHUNK):
+        local = timezone.localtime(last_done).replace(tzinfo=None)
+        rows.extend(
+            HabitCompletion(
+                habit_id=pk, user_id=user_id,
+                done_at=timezone.make_aware(_period_back(frequency, local, periods)),
+            )
+            for periods in range(max(streak, 1))
+        )
+        if len(rows) >= CHUNK:
+            HabitCompletion.objects.bulk_create(rows)
+            rows = []
+    HabitCompletion.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0017_mark_past_reminders_sent'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,20 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User, Group
-from django.core.validators import RegexValidator
+from django.core.validators import MinValueValidator, RegexValidator
+
+# -------------- TAG MODEL --------------
+class Tag(models.Model):
+    """
+    Normalized (lower-cased) tag name. The comma-separated ``tags`` strings
+    on Task, Habit, Note and Event stay the source of truth for display and
+    editing; ``normalized_tags`` mirrors them for indexed filtering
+    (see tasks.tagging).
+    """
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
 
 # -------------- TASK MODEL --------------
 class Task(models.Model):
@@ -21,10 +34,73 @@ class Task(models.Model):
     recurring = models.BooleanField(default=False)
     notes = models.TextField(blank=True)
     groups = models.ManyToManyField(Group, blank=True, related_name='tasks')
+    normalized_tags = models.ManyToManyField(Tag, blank=True, related_name='tasks', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created'], name='task_user_created_idx'),
+            models.Index(fields=['user', 'last_modified'], name='task_user_modified_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+# -------------- RECURRENCE MODELS --------------
+class RecurrenceRule(models.Model):
+    """
+    Repeat schedule of a task, anchored at ``start``. Occurrences are
+    computed on demand (tasks.recurrence); ``ends`` caches the last one,
+    None for open-ended rules, so window queries can skip finished rules.
+    """
+    FREQ_CHOICES = [
+        ('Daily', 'Daily'),
+        ('Weekly', 'Weekly'),
+        ('Monthly', 'Monthly'),
+    ]
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, related_name='recurrence')
+    freq = models.CharField(max_length=10, choices=FREQ_CHOICES, default='Weekly')
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    weekdays = models.CharField(
+        max_length=13, blank=True,
+        validators=[RegexValidator(r'^[0-6](,[0-6])*$', "Use weekday numbers 0-6 separated by commas.")],
+        help_text="Weekly rules only: comma-separated weekdays, 0 = Monday. Defaults to the start day.",
+    )
+    start = models.DateTimeField()
+    until = models.DateTimeField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True, validators=[MinValueValidator(1)])
+    ends = models.DateTimeField(null=True, blank=True, editable=False)
+    materialized_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start', 'ends'], name='recurrence_window_idx'),
+            models.Index(fields=['materialized_until'], name='recurrence_horizon_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task}: every {self.interval} {self.freq}"
+
+class TaskOccurrence(models.Model):
+    """
+    A materialized occurrence of a recurring task, kept only up to a fixed
+    horizon ahead (manage.py materialize_occurrences).
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='occurrences')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_occurrences')
+    due = models.DateTimeField()
+    completed = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'due'], name='occurrence_task_due_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'due'], name='occurrence_user_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} @ {self.due:%Y-%m-%d %H:%M}"
+
 # -------------- HABIT MODEL --------------
 class Habit(models.Model):
     FREQUENCY_CHOICES = [
@@ -42,10 +118,33 @@ class Habit(models.Model):
     notes = models.TextField(blank=True)
     tags = models.CharField(max_length=100, blank=True, help_text="Comma-separated tags, e.g. Ideas, Work")
     groups = models.ManyToManyField(Group, blank=True, related_name='habits')
+    normalized_tags = models.ManyToManyField(Tag, blank=True, related_name='habits', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created'], name='habit_user_created_idx'),
+            models.Index(fields=['user', 'last_modified'], name='habit_user_modified_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+# -------------- HABIT COMPLETION MODEL --------------
+class HabitCompletion(models.Model):
+    """One check-in of a habit; ``Habit.streak`` is derived from these (tasks.streaks)."""
+    habit = models.ForeignKey(Habit, on_delete=models.CASCADE, related_name='completions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='habit_completions')
+    done_at = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['habit', 'done_at'], name='completion_habit_done_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.habit} @ {self.done_at:%Y-%m-%d %H:%M}"
+
 # -------------- NOTE MODEL --------------
 class Note(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notes')
@@ -55,7 +154,14 @@ class Note(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     tags = models.CharField(max_length=100, blank=True, help_text="Comma-separated tags, e.g. Ideas, Work")
     groups = models.ManyToManyField(Group, blank=True, related_name='notes')
-    
+    normalized_tags = models.ManyToManyField(Tag, blank=True, related_name='notes', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created'], name='note_user_created_idx'),
+            models.Index(fields=['user', 'last_modified'], name='note_user_modified_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -67,11 +173,25 @@ class Event(models.Model):
     location = models.CharField(max_length=200, blank=True)
     description = models.TextField(blank=True)
     reminder = models.DateTimeField(null=True, blank=True)
+    # Set by tasks.event_reminders; cleared again when ``reminder`` changes.
+    reminder_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
     created = models.DateTimeField(auto_now_add=True)
     last_modified = models.DateTimeField(auto_now=True)
     tags = models.CharField(max_length=100, blank=True, help_text="Comma-separated tags, e.g. Meeting, Personal")
     groups = models.ManyToManyField(Group, blank=True, related_name='events')
-    
+    normalized_tags = models.ManyToManyField(Tag, blank=True, related_name='events', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created'], name='event_user_created_idx'),
+            models.Index(fields=['user', 'last_modified'], name='event_user_modified_idx'),
+            models.Index(fields=['user', 'event_date'], name='event_user_date_idx'),
+            models.Index(
+                fields=['reminder'], name='event_reminder_due_idx',
+                condition=models.Q(reminder__isnull=False, reminder_sent_at__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.event_date.strftime('%Y-%m-%d %H:%M')})"
 phone_validator = RegexValidator(
@@ -99,3 +219,124 @@ class Profile(models.Model):
         return f"Profile({self.user.username})"
 
 
+
+
+# -------------- OUTBOX MODEL --------------
+class OutboxEvent(models.Model):
+    """
+    Domain event waiting to be published to EventBridge. Rows are written in
+    the same transaction as the change they describe and sent in batches by
+    ``manage.py flush_outbox``.
+    """
+    source = models.CharField(max_length=100)
+    detail_type = models.CharField(max_length=100)
+    detail = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Set while a flusher is publishing the row (tasks.outbox.flush).
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(sent_at__isnull=True),
+                name='outbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.detail_type} #{self.pk}"
+
+
+# -------------- REMINDER REQUEST MODEL --------------
+class ReminderRequest(models.Model):
+    """
+    A reminder waiting to be sent to the scheduler API. Rows are created by
+    the web views and delivered in batches by ``manage.py dispatch_reminders``;
+    ``status`` is what the UI polls.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SCHEDULED = 'scheduled'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SCHEDULED, 'Scheduled'),
+        (FAILED, 'Failed'),
+    ]
+    requested_by = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name='reminder_requests'
+    )
+    task_id = models.CharField(max_length=100)
+    owner_id = models.CharField(max_length=100)
+    user_email = models.EmailField()
+    due_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    last_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='reminder_status_idx'),
+            models.Index(fields=['requested_by', 'created'], name='reminder_requester_idx'),
+        ]
+
+    def __str__(self):
+        return f"Reminder for {self.task_id} at {self.due_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+# -------------- SEARCH INDEX MODEL --------------
+class SearchEntry(models.Model):
+    """
+    One row per Task, Habit, Note and Event holding the text that full-text
+    search runs against. The vendor-specific index (a generated tsvector
+    column with a GIN index on PostgreSQL, an FTS5 table on SQLite) is
+    created by migration 0010 and queried by tasks.search.
+    """
+    KIND_CHOICES = [
+        ('task', 'Task'),
+        ('habit', 'Habit'),
+        ('note', 'Note'),
+        ('event', 'Event'),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_entries')
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    last_modified = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='searchentry_kind_object_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.title}"
+
+
+# -------------- TOMBSTONE MODEL --------------
+class Tombstone(models.Model):
+    """
+    Records that a Task, Habit, Note or Event was deleted, so delta-sync
+    clients (tasks.sync) can drop their local copy.
+    """
+    KIND_CHOICES = SearchEntry.KIND_CHOICES
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,150 @@
+"""
+Transactional outbox for domain events.
+
+``enqueue`` writes an OutboxEvent row inside the caller's transaction, so an
+event exists if and only if the change it describes was committed.
+``flush`` publishes pending rows in PutEvents-sized batches; rows rejected by
+EventBridge keep their place in the queue and are retried on the next pass
+until ``max_attempts`` is reached. Rows that reach it are dead letters: they
+are logged once and listed by ``dead_letters``.
+
+Rows are claimed (``claimed_at``) in a short transaction and published
+outside it, and each batch's outcome is recorded as soon as its call
+returns. A flusher that dies in between leaves its claim behind; the rows
+become pending again after ``STALE_AFTER`` and are published again, so
+delivery is at least once, with at most one batch duplicated.
+"""
+import logging
+import time
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import aws_events
+from .models import OutboxEvent
+
+logger = logging.getLogger("tasks")
+
+DEFAULT_MAX_ATTEMPTS = 5
+# A claim this old belongs to a flusher that died.
+STALE_AFTER = timedelta(minutes=5)
+
+
+def task_created_detail(task):
+    """TaskCreated payload for ``task``, or None when there is nothing to schedule."""
+    due = task.due_date
+    owner = task.user
+    if not (due and owner and owner.email):
+        return None
+
+    # Convert to UTC ISO with Z
+    if timezone.is_naive(due):
+        due = timezone.make_aware(due, timezone.get_current_timezone())
+    due_utc = due.astimezone(dt_timezone.utc).replace(microsecond=0)
+    due_iso = due_utc.isoformat().replace("+00:00", "Z")
+
+    return {
+        "task_id": str(task.pk),
+        "owner_id": str(owner.pk),
+        "owner_email": owner.email,
+        "owner_name": owner.get_username(),
+        "task_title": (task.title or str(task.pk)),
+        "dueAtIso": due_iso,
+    }
+
+
+def enqueue(detail_type, detail, source=aws_events.SOURCE):
+    return OutboxEvent.objects.create(source=source, detail_type=detail_type, detail=detail)
+
+
+def enqueue_many(detail_type, details, source=aws_events.SOURCE):
+    """Write several events with one INSERT, e.g. after a bulk_create."""
+    return OutboxEvent.objects.bulk_create(
+        OutboxEvent(source=source, detail_type=detail_type, detail=detail)
+        for detail in details
+    )
+
+
+def dead_letters(max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Unsent events that ``flush`` has given up on."""
+    return OutboxEvent.objects.filter(sent_at__isnull=True, attempts__gte=max_attempts)
+
+
+class FlushStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+        self.calls = 0
+        self.seconds = 0.0
+
+    @property
+    def throughput(self):
+        return self.sent / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"sent={self.sent} failed={self.failed} dead={self.dead} calls={self.calls} "
+                f"in {self.seconds * 1000:.1f} ms ({self.throughput:.0f} events/s)")
+
+
+def _claim(limit, max_attempts):
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            OutboxEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(sent_at__isnull=True, attempts__lt=max_attempts)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=now - STALE_AFTER))
+            .order_by('id')[:limit]
+        )
+        OutboxEvent.objects.filter(pk__in=[e.pk for e in claimed]).update(claimed_at=now)
+    return claimed
+
+
+def _record(batch, errors, max_attempts, stats):
+    now = timezone.now()
+    for event, error in zip(batch, errors):
+        event.attempts += 1
+        event.claimed_at = None
+        if error is None:
+            event.sent_at = now
+            event.last_error = ""
+            stats.sent += 1
+            continue
+        event.last_error = error
+        stats.failed += 1
+        if event.attempts >= max_attempts:
+            stats.dead += 1
+            logger.error("Outbox event %s (%s) dead-lettered after %d attempts: %s",
+                         event.pk, event.detail_type, event.attempts, error)
+    OutboxEvent.objects.bulk_update(batch, ['sent_at', 'claimed_at', 'attempts', 'last_error'])
+
+
+def flush(client=None, limit=500, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Publish up to ``limit`` pending events and return FlushStats.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED (a no-op on
+    SQLite) so several flushers can run side by side without double sending;
+    no transaction is open during the PutEvents calls.
+    """
+    stats = FlushStats()
+    started = time.perf_counter()
+    batch_size = aws_events.MAX_ENTRIES_PER_CALL
+    pending = _claim(limit, max_attempts)
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        entries = [aws_events.build_entry(e.detail_type, e.detail, e.source) for e in batch]
+        try:
+            errors = aws_events.put_entries(entries, client=client)
+        except Exception as exc:
+            logger.exception("PutEvents call failed")
+            errors = [str(exc)] * len(batch)
+        stats.calls += 1
+        _record(batch, errors, max_attempts, stats)
+    stats.seconds = time.perf_counter() - started
+    if pending:
+        logger.info("Outbox flush: %s", stats)
+    return stats
@@ -0,0 +1,228 @@
+"""
+Per-process pool of PostgreSQL connections, used by the
+``tasks.backends.postgresql_pool`` database engine.
+
+Django opens a connection when a request first touches the database and
+closes it when the request ends (CONN_MAX_AGE = 0). With the pooled engine
+"open" takes an idle connection from this pool and "close" hands it back,
+so the TCP/TLS handshake and authentication are paid once per pooled
+connection rather than once per request. One pool exists per database
+alias and process. It never holds more than ``MAX_SIZE`` connections;
+a thread that finds it exhausted waits up to ``TIMEOUT`` seconds.
+
+Connections are checked when they come back: one still in a transaction
+is rolled back, and a broken one is dropped. They are checked again on
+checkout: one idle for more than ``CHECK_AFTER`` seconds must answer
+``SELECT 1``. A connection older than ``MAX_LIFETIME`` is closed instead
+of reused, so server-side memory and DNS/failover changes are picked up.
+
+Fork safety: a connection must never be used by two processes. After
+``fork()`` the child discards the pools it inherited, without closing
+their sockets, because closing would also end the parent's sessions.
+``close_all()`` empties the pools of the current process; the gunicorn
+master calls it after its warm-up (tasks.warmup).
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2 import extensions
+
+DEFAULTS = {
+    'MIN_SIZE': 0,          # connections opened ahead of demand by prefill()
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10.0,        # seconds to wait for a free connection
+    'MAX_LIFETIME': 1800.0,
+    'CHECK_AFTER': 30.0,    # idle seconds after which a checkout runs SELECT 1
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PoolStats:
+    __slots__ = ('created', 'closed', 'checkouts', 'waits', 'wait_seconds', 'timeouts',
+                 'check_failures')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+        self.wait_seconds = 0.0
+
+
+class ConnectionPool:
+    def __init__(self, connect, MIN_SIZE, MAX_SIZE, TIMEOUT, MAX_LIFETIME, CHECK_AFTER):
+        self.connect = connect
+        self.min_size = MIN_SIZE
+        self.max_size = MAX_SIZE
+        self.timeout = TIMEOUT
+        self.max_lifetime = MAX_LIFETIME
+        self.check_after = CHECK_AFTER
+        self.pid = os.getpid()
+        self.stats = PoolStats()
+        self._idle = deque()     # (connection, created, returned), most recent last
+        self._born = {}          # id(connection) -> created
+        self._size = 0           # open connections, idle or checked out
+        self._cond = threading.Condition()
+
+    # -- checkout ----------------------------------------------------------
+
+    def getconn(self):
+        start = time.monotonic()
+        waited = False
+        while True:
+            candidate = None
+            with self._cond:
+                if self._idle:
+                    candidate = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self.stats.timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection free within {self.timeout:.1f}s "
+                            f"({self.max_size} in use)."
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                    continue
+            if candidate is None:
+                break
+            # Checked outside the lock: the health check is a round trip.
+            if self._fresh(*candidate):
+                with self._cond:
+                    self._checked_out(start, waited)
+                return candidate[0]
+            with self._cond:
+                self._discard(candidate[0])
+        # A slot is reserved; connect outside the lock, it is the slow part.
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._born[id(connection)] = time.monotonic()
+            self.stats.created += 1
+            self._checked_out(start, waited)
+        return connection
+
+    def _checked_out(self, start, waited):
+        self.stats.checkouts += 1
+        if waited:
+            self.stats.waits += 1
+            self.stats.wait_seconds += time.monotonic() - start
+
+    def _fresh(self, connection, created, returned):
+        now = time.monotonic()
+        if connection.closed or now - created > self.max_lifetime:
+            return False
+        if now - returned > self.check_after:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+            except Exception:
+                self.stats.check_failures += 1
+                return False
+        return True
+
+    # -- checkin -----------------------------------------------------------
+
+    def putconn(self, connection):
+        if os.getpid() != self.pid:
+            _inherited.append(connection)  # from the parent; see _after_fork
+            return
+        created = self._born.get(id(connection), 0.0)
+        reusable = not connection.closed and time.monotonic() - created <= self.max_lifetime
+        if reusable:
+            status = connection.info.transaction_status
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                    reusable = connection.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+                except Exception:
+                    reusable = False
+        with self._cond:
+            if reusable:
+                self._idle.append((connection, created, time.monotonic()))
+            else:
+                self._discard(connection)
+            self._cond.notify()
+
+    def _discard(self, connection):
+        """Close ``connection`` and free its slot; caller holds the lock."""
+        self._size -= 1
+        self._born.pop(id(connection), None)
+        self.stats.closed += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    # -- whole pool ----------------------------------------------------------
+
+    def prefill(self):
+        """Open connections up to MIN_SIZE (e.g. right after a worker forks)."""
+        opened = [self.getconn() for _ in range(max(0, self.min_size - len(self._idle)))]
+        for connection in opened:
+            self.putconn(connection)
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+
+    def snapshot(self):
+        with self._cond:
+            data = {name: getattr(self.stats, name) for name in PoolStats.__slots__}
+            data.update(size=self._size, idle=len(self._idle), max_size=self.max_size)
+        return data
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Connections inherited from the parent process, kept referenced so their
+# destructors never run (closing would end the parent's sessions too).
+_inherited = []
+
+
+def get_pool(alias, connect, options):
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(connect, **{**DEFAULTS, **(options or {})})
+    return pool
+
+
+def prefill_all():
+    for pool in list(_pools.values()):
+        pool.prefill()
+
+
+def close_all():
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+def stats():
+    """alias -> counters and gauges of this process's pools."""
+    return {alias: pool.snapshot() for alias, pool in list(_pools.items())}
+
+
+def _after_fork():
+    global _pools_lock
+    for pool in _pools.values():
+        _inherited.extend(connection for connection, _, _ in pool._idle)
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
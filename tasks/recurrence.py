@@ -0,0 +1,206 @@
+"""
+Occurrences of recurring tasks.
+
+Every rule has a closed form for its n-th occurrence, so a date window is
+answered by jumping straight to the first index that can fall inside it
+and stepping forward only while inside: the cost depends on the number of
+occurrences in the window, never on how long the rule has been running.
+``due_between`` uses this for arbitrary windows without writing anything;
+the TaskOccurrence rows kept by ``materialize`` cover only the next
+``HORIZON`` for the list pages and reminders.
+
+Arithmetic is done on local wall-clock time, so a 09:00 task stays at
+09:00 across DST changes. Monthly rules on the 29th-31st fall on the last
+day of shorter months.
+"""
+import calendar
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import RecurrenceRule, Task, TaskOccurrence
+from .visibility import visible_to
+
+HORIZON = timedelta(days=60)
+
+
+def _local(dt):
+    return timezone.localtime(dt).replace(tzinfo=None)
+
+
+def _aware(naive):
+    return timezone.make_aware(naive)
+
+
+def weekdays(rule):
+    if rule.freq != 'Weekly' or not rule.weekdays:
+        return [_local(rule.start).weekday()]
+    return sorted({int(day) for day in rule.weekdays.split(',')})
+
+
+class _Schedule:
+    """Index <-> local datetime arithmetic for one rule."""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.start = _local(rule.start)
+        if rule.freq == 'Weekly':
+            self.days = weekdays(rule)
+            self.week0 = self.start - timedelta(days=self.start.weekday())
+            # Days of the first week before the start are not occurrences.
+            self.skip = sum(1 for day in self.days if day < self.start.weekday())
+
+    def nth(self, n):
+        rule, start = self.rule, self.start
+        if rule.freq == 'Daily':
+            return start + timedelta(days=n * rule.interval)
+        if rule.freq == 'Weekly':
+            week, pos = divmod(n + self.skip, len(self.days))
+            return self.week0 + timedelta(days=week * rule.interval * 7 + self.days[pos])
+        month = start.year * 12 + start.month - 1 + n * rule.interval
+        year, month = divmod(month, 12)
+        day = min(start.day, calendar.monthrange(year, month + 1)[1])
+        return start.replace(year=year, month=month + 1, day=day)
+
+    def first_index(self, after):
+        """An index no later than that of the first occurrence >= ``after``."""
+        rule, start = self.rule, self.start
+        if after <= start:
+            return 0
+        if rule.freq == 'Daily':
+            return (after - start).days // rule.interval
+        if rule.freq == 'Weekly':
+            week = (after - self.week0).days // (rule.interval * 7)
+            return max(0, week * len(self.days) - self.skip)
+        months = (after.year - start.year) * 12 + after.month - start.month
+        return max(0, months // rule.interval - 1)
+
+
+def occurrences(rule, after=None, before=None):
+    """
+    Lazily yield the aware datetimes of ``rule`` in [after, before); either
+    bound may be None. Open-ended rules without ``before`` never stop.
+    """
+    schedule = _Schedule(rule)
+    after_local = _local(after) if after is not None else None
+    before_local = _local(before) if before is not None else None
+    until = _local(rule.until) if rule.until is not None else None
+    n = schedule.first_index(after_local) if after_local is not None else 0
+    while rule.count is None or n < rule.count:
+        when = schedule.nth(n)
+        if (until is not None and when > until) or (before_local is not None and when >= before_local):
+            return
+        if after_local is None or when >= after_local:
+            yield _aware(when)
+        n += 1
+
+
+def last_occurrence(rule):
+    """Datetime of the final occurrence; None if the rule never ends."""
+    if rule.count is None and rule.until is None:
+        return None
+    schedule = _Schedule(rule)
+    last = None
+    if rule.count is not None:
+        last = schedule.nth(rule.count - 1)
+    if rule.until is not None:
+        until = _local(rule.until)
+        if last is None or last > until:
+            # One step back from the seek is guaranteed to be before ``until``.
+            n = max(0, schedule.first_index(until) - 1)
+            last = None
+            while (rule.count is None or n < rule.count) and schedule.nth(n) <= until:
+                last = schedule.nth(n)
+                n += 1
+    # A rule with no occurrence at all "ends" where it starts.
+    return _aware(last) if last is not None else rule.start
+
+
+def rules_between(tasks, start, end):
+    """Rules of ``tasks`` that can have an occurrence in [start, end)."""
+    return (
+        RecurrenceRule.objects
+        .filter(task__in=tasks, task__completed=False, start__lt=end)
+        .filter(Q(ends__isnull=True) | Q(ends__gte=start))
+    )
+
+
+def due_between(user, start, end):
+    """
+    (task, due) pairs visible to ``user`` in [start, end), sorted by due
+    date: one-off tasks by their ``due_date``, recurring ones through their
+    rule. Occurrences already marked completed are left out.
+    """
+    visible = visible_to(Task, user).order_by()
+    single = (
+        visible.filter(recurrence__isnull=True, completed=False,
+                       due_date__gte=start, due_date__lt=end)
+        .select_related('user')
+    )
+    items = [(task, task.due_date) for task in single]
+
+    rules = rules_between(visible.values('pk'), start, end).select_related('task__user')
+    done = set(
+        TaskOccurrence.objects
+        .filter(task__in=visible.values('pk'), due__gte=start, due__lt=end, completed=True)
+        .values_list('task_id', 'due')
+    )
+    for rule in rules:
+        for due in occurrences(rule, start, end):
+            if (rule.task_id, due) not in done:
+                items.append((rule.task, due))
+    items.sort(key=lambda item: (item[1], item[0].pk))
+    return items
+
+
+def materialize(rules, since, until):
+    """
+    Extend the TaskOccurrence rows of ``rules`` to cover [since, until).
+    Each rule remembers how far it has been materialized, so repeated runs
+    only insert the new tail, with one statement per call.
+    """
+    rows, reached = [], []
+    for rule in rules:
+        after = max(rule.materialized_until or rule.start, since)
+        if after >= until:
+            continue
+        rows.extend(
+            TaskOccurrence(task_id=rule.task_id, user_id=rule.task.user_id, due=due)
+            for due in occurrences(rule, after, until)
+        )
+        reached.append(rule.pk)
+    with transaction.atomic():
+        TaskOccurrence.objects.bulk_create(rows, ignore_conflicts=True)
+        RecurrenceRule.objects.filter(pk__in=reached).update(materialized_until=until)
+    return len(rows)
+
+
+def rematerialize(rule, now=None):
+    """Replace the open future occurrences of a new or edited rule."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        TaskOccurrence.objects.filter(task_id=rule.task_id, due__gte=now, completed=False).delete()
+        rule.materialized_until = None
+        RecurrenceRule.objects.filter(pk=rule.pk).update(materialized_until=None)
+        if not rule.task.completed:
+            materialize([rule], now, now + HORIZON)
+
+
+def next_occurrences(tasks, now=None):
+    """{task pk: next open materialized occurrence} for a page of tasks."""
+    now = now or timezone.now()
+    rows = (
+        TaskOccurrence.objects
+        .filter(task__in=[task.pk for task in tasks], due__gte=now, completed=False)
+        .values('task_id')
+        .annotate(next_due=Min('due'))
+    )
+    return {row['task_id']: row['next_due'] for row in rows}
+
+
+def start_of_week(now=None):
+    today = timezone.localdate(now or timezone.now())
+    monday = today - timedelta(days=today.weekday())
+    return _aware(datetime.combine(monday, datetime.min.time()))
@@ -0,0 +1,135 @@
+"""
+Queued reminder scheduling.
+
+Views only insert ReminderRequest rows; ``dispatch`` (run by
+``manage.py dispatch_reminders``) claims pending rows in batches and sends
+them to the scheduler API concurrently, outside any web request: from a
+thread pool by default, or from one event loop with ``use_async`` (httpx).
+"""
+import asyncio
+import logging
+from datetime import timedelta, timezone as dt_timezone
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ReminderRequest, Task, TaskOccurrence
+from .services.scheduler_api import SchedulerError, schedule_many, schedule_many_async
+
+logger = logging.getLogger("tasks")
+
+DEFAULT_MAX_ATTEMPTS = 3
+# A row left in "sending" this long belongs to a dispatcher that died.
+STALE_AFTER = timedelta(minutes=5)
+
+
+def to_iso(dt):
+    """ISO8601 with trailing Z (Scheduler-friendly)."""
+    return dt.astimezone(dt_timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def enqueue(task_id, due_at, owner_id, user_email, requested_by=None):
+    return ReminderRequest.objects.create(
+        task_id=task_id, due_at=due_at, owner_id=owner_id,
+        user_email=user_email, requested_by=requested_by,
+    )
+
+
+def enqueue_due_tasks(user):
+    """
+    Queue a reminder for every open task of ``user`` that is due in the
+    future and does not already have one queued or scheduled. Tasks with a
+    repeat rule get one per materialized occurrence (tasks.recurrence); the
+    ``recurring`` flag alone does not make a task repeat.
+    Returns the number of reminders created.
+    """
+    if not user.email:
+        return 0
+    now = timezone.now()
+    already = ReminderRequest.objects.filter(
+        requested_by=user,
+        status__in=[ReminderRequest.PENDING, ReminderRequest.SENDING, ReminderRequest.SCHEDULED],
+    ).values_list('task_id', 'due_at')
+    due = (
+        Task.objects
+        .filter(user=user, completed=False, recurrence__isnull=True, due_date__gt=now)
+        .values_list('pk', 'due_date')
+    )
+    occurrences = (
+        TaskOccurrence.objects
+        .filter(user=user, completed=False, task__completed=False, due__gt=now)
+        .values_list('task_id', 'due')
+    )
+    # Keyed on the due date too, so a task moved to a new date gets a
+    # reminder for it even while the one for the old date is still queued.
+    pending = set(already)
+    wanted = [
+        (pk, when) for pk, when in chain(due.iterator(), occurrences.iterator())
+        if (str(pk), when) not in pending
+    ]
+    created = ReminderRequest.objects.bulk_create(
+        ReminderRequest(
+            task_id=str(pk), due_at=due_at, owner_id=str(user.pk),
+            user_email=user.email, requested_by=user,
+        )
+        for pk, due_at in wanted
+    )
+    return len(created)
+
+
+def _claim(limit):
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = list(
+            ReminderRequest.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ReminderRequest.PENDING)
+                | Q(status=ReminderRequest.SENDING, last_modified__lt=now - STALE_AFTER)
+            )
+            .order_by('id')[:limit]
+        )
+        ReminderRequest.objects.filter(pk__in=[r.pk for r in claimed]).update(
+            status=ReminderRequest.SENDING, last_modified=now,
+        )
+    return claimed
+
+
+def dispatch(limit=100, max_attempts=DEFAULT_MAX_ATTEMPTS, use_async=False, concurrency=None):
+    """
+    Send one batch of pending reminders. Returns (scheduled, failed) counts;
+    failures below ``max_attempts`` go back to pending for the next pass.
+    """
+    batch = _claim(limit)
+    if not batch:
+        return 0, 0
+    items = [(r.task_id, to_iso(r.due_at), r.owner_id, r.user_email) for r in batch]
+    if use_async:
+        results = asyncio.run(schedule_many_async(items, max_concurrency=concurrency))
+    else:
+        results = schedule_many(items, max_workers=concurrency)
+    scheduled = failed = 0
+    now = timezone.now()
+    for reminder, result in zip(batch, results):
+        reminder.attempts += 1
+        reminder.last_modified = now
+        if isinstance(result, Exception):
+            reminder.last_error = str(result)
+            permanent = isinstance(result, SchedulerError) and result.permanent
+            if permanent or reminder.attempts >= max_attempts:
+                reminder.status = ReminderRequest.FAILED
+                failed += 1
+            else:
+                reminder.status = ReminderRequest.PENDING
+        else:
+            reminder.status = ReminderRequest.SCHEDULED
+            reminder.last_error = ""
+            scheduled += 1
+    ReminderRequest.objects.bulk_update(
+        batch, ['status', 'attempts', 'last_error', 'last_modified']
+    )
+    logger.info("Reminder dispatch: %d scheduled, %d failed, %d sent",
+                scheduled, failed, len(batch))
+    return scheduled, failed
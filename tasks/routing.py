@@ -0,0 +1,176 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+When settings.DATABASES has a ``replica`` alias, ``ReplicaRouter`` sends
+reads there and writes to ``default``. Reads go to ``default`` instead when
+any of these holds:
+
+* the current context has already written: a request that saves something
+  reads its own write;
+* a transaction is open on ``default``: ``select_for_update`` and
+  read-modify-write blocks stay on one connection;
+* the code asked for it with ``use_primary()``. tasks.caching does this, so
+  that a value cached under a fresh version never comes from a lagging
+  replica;
+* ``ReplicaStickinessMiddleware`` pinned the request, because it is not a
+  safe method or because the client wrote less than
+  ``REPLICA_STICKY_SECONDS`` ago. ``task_create`` -> redirect ->
+  ``task_list`` therefore lists the new task.
+
+The last write is tracked in a ``primary_until`` cookie. Clients that send
+an ``Authorization`` header (DRF tokens, which often drop cookies) are also
+tracked in the cache under a hash of that header.
+
+State lives in context variables. asgiref carries them into and back out
+of the threads used by tasks.aio, so the same rules hold under ASGI.
+"""
+import hashlib
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_pinned = ContextVar('tasks_routing_pinned', default=False)
+_wrote = ContextVar('tasks_routing_wrote', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+@contextmanager
+def use_primary():
+    """Route every read in the block to ``default``."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replica_configured():
+            return None
+        if _pinned.get() or _wrote.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema by replication.
+        return db != REPLICA
+
+
+def _cookie_until(request):
+    """The ``primary_until`` cookie as a timestamp; None when it is malformed."""
+    raw = request.COOKIES.get(COOKIE)
+    if not raw:
+        return 0.0
+    try:
+        until = float(raw)
+    except (ValueError, OverflowError):
+        return None
+    # "inf" would pin the client forever, "nan" compares false to everything.
+    return until if math.isfinite(until) else None
+
+
+def _cache_key(request):
+    auth = request.headers.get('Authorization')
+    if not auth:
+        return None
+    return 'tasks:primary_until:' + hashlib.sha256(auth.encode()).hexdigest()
+
+
+class ReplicaStickinessMiddleware:
+    """Pins requests to the primary after a write; a no-op without a replica."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_configured():
+            return self.get_response(request)
+        key = _cache_key(request)
+        cookie = _cookie_until(request)
+        until = cookie or 0.0
+        if key and until < time.time():
+            until = cache.get(key, 0)
+        pin, wrote = self._enter(request, until)
+        try:
+            response = self.get_response(request)
+            if self._should_stick(request):
+                until = self._stick(response)
+                if key:
+                    cache.set(key, until, timeout=sticky_seconds())
+            elif cookie is None:
+                response.delete_cookie(COOKIE, samesite='Lax')
+        finally:
+            _pinned.reset(pin)
+            _wrote.reset(wrote)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_configured():
+            return await self.get_response(request)
+        key = _cache_key(request)
+        cookie = _cookie_until(request)
+        until = cookie or 0.0
+        if key and until < time.time():
+            until = await cache.aget(key, 0)
+        pin, wrote = self._enter(request, until)
+        try:
+            response = await self.get_response(request)
+            if self._should_stick(request):
+                until = self._stick(response)
+                if key:
+                    await cache.aset(key, until, timeout=sticky_seconds())
+            elif cookie is None:
+                response.delete_cookie(COOKIE, samesite='Lax')
+        finally:
+            _pinned.reset(pin)
+            _wrote.reset(wrote)
+        return response
+
+    def _enter(self, request, until):
+        pinned = request.method not in SAFE_METHODS or until > time.time()
+        return _pinned.set(pinned), _wrote.set(False)
+
+    def _should_stick(self, request):
+        return _wrote.get() or request.method not in SAFE_METHODS
+
+    def _stick(self, response):
+        window = sticky_seconds()
+        until = time.time() + window
+        response.set_cookie(
+            COOKIE, f'{until:.3f}', max_age=window, httponly=True, samesite='Lax',
+            secure=settings.SESSION_COOKIE_SECURE,
+        )
+        return until
@@ -0,0 +1,97 @@
+"""
+Full-text search over tasks, habits, notes and events.
+
+Each object has a SearchEntry row (kept current by signals and the bulk
+paths through ``index_objects``/``unindex``). Queries run against the
+vendor-specific index created by migration 0010: the ``document`` tsvector
+column on PostgreSQL, the ``tasks_searchentry_fts`` FTS5 table on SQLite.
+Other backends fall back to ``icontains``.
+"""
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Event, Habit, Note, SearchEntry, Task
+from .visibility import shared_ids
+
+# kind -> (model, title field, body fields)
+SOURCES = {
+    'task': (Task, 'title', ('notes', 'tags')),
+    'habit': (Habit, 'name', ('notes', 'tags')),
+    'note': (Note, 'title', ('content', 'tags')),
+    'event': (Event, 'title', ('description', 'location', 'tags')),
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+
+def entry_for(obj):
+    kind = KIND_BY_MODEL[type(obj)]
+    _, title_field, body_fields = SOURCES[kind]
+    body = [getattr(obj, name) for name in body_fields]
+    return SearchEntry(
+        kind=kind, object_id=obj.pk, user_id=obj.user_id,
+        title=getattr(obj, title_field),
+        body='\n'.join(part for part in body if part),
+        last_modified=obj.last_modified,
+    )
+
+
+def index_objects(objs):
+    """Insert or refresh the search entries of ``objs`` with one statement."""
+    entries = [entry_for(obj) for obj in objs if obj.pk is not None]
+    if entries:
+        SearchEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['user', 'title', 'body', 'last_modified'],
+        )
+
+
+def unindex(model, pks):
+    SearchEntry.objects.filter(kind=KIND_BY_MODEL[model], object_id__in=list(pks)).delete()
+
+
+def _fts5_query(text):
+    # Quote every term so user input can never be parsed as FTS5 syntax;
+    # a trailing * keeps prefix matches ("meet" finds "meeting").
+    terms = ['"%s"*' % term.replace('"', '""') for term in text.split()]
+    return ' '.join(terms)
+
+
+def visible_entries(user):
+    """Entries for objects ``user`` owns or can see through a group."""
+    visible = Q()
+    for kind, (model, _, _) in SOURCES.items():
+        visible |= Q(kind=kind) & (Q(user=user) | Q(object_id__in=shared_ids(model, user)))
+    return SearchEntry.objects.filter(visible)
+
+
+def search(user, text):
+    """Ranked hits for ``text`` (best first), annotated with ``rank``."""
+    text = (text or '').strip()
+    entries = visible_entries(user)
+    if not text:
+        return entries.none()
+
+    if connection.vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('english', %s)"
+        entries = entries.extra(where=[f"document @@ {tsquery}"], params=[text]).annotate(
+            rank=RawSQL(f"ts_rank(document, {tsquery})", [text], output_field=FloatField())
+        )
+    elif connection.vendor == 'sqlite':
+        match = _fts5_query(text)
+        entries = entries.extra(
+            where=["tasks_searchentry.id IN (SELECT rowid FROM tasks_searchentry_fts "
+                   "WHERE tasks_searchentry_fts MATCH %s)"],
+            params=[match],
+        ).annotate(rank=RawSQL(
+            "(SELECT -bm25(tasks_searchentry_fts, 2.0, 1.0) FROM tasks_searchentry_fts "
+            "WHERE tasks_searchentry_fts MATCH %s AND rowid = tasks_searchentry.id)",
+            [match], output_field=FloatField(),
+        ))
+    else:
+        entries = entries.filter(Q(title__icontains=text) | Q(body__icontains=text)).annotate(
+            rank=Value(0.0, output_field=FloatField())
+        )
+    return entries.order_by('-rank', '-last_modified', '-id')
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Task, Habit, Note, Event
+from .models import Task, Habit, Note, Event, RecurrenceRule, SearchEntry
 
 class TaskSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)  # Shows username in API
@@ -11,6 +11,22 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['user', 'created', 'last_modified']
 
+class RecurrenceRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecurrenceRule
+        fields = ['freq', 'interval', 'weekdays', 'start', 'until', 'count', 'ends']
+        read_only_fields = ['ends']
+
+    def validate(self, attrs):
+        freq = attrs.get('freq', getattr(self.instance, 'freq', 'Weekly'))
+        if attrs.get('weekdays') and freq != 'Weekly':
+            raise serializers.ValidationError({'weekdays': 'Only weekly rules take weekdays.'})
+        return attrs
+
+class DueItemSerializer(serializers.Serializer):
+    due = serializers.DateTimeField()
+    task = TaskSerializer()
+
 class HabitSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
     class Meta:
@@ -40,3 +56,15 @@ class EventSerializer(serializers.ModelSerializer):
             'reminder', 'created', 'last_modified', 'tags', 'user'
         ]
         read_only_fields = ['user', 'created', 'last_modified']
+
+class SearchHitSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='kind', read_only=True)
+    id = serializers.IntegerField(source='object_id', read_only=True)
+    snippet = serializers.SerializerMethodField()
+    rank = serializers.FloatField(read_only=True)
+    class Meta:
+        model = SearchEntry
+        fields = ['type', 'id', 'title', 'snippet', 'rank', 'last_modified']
+
+    def get_snippet(self, obj):
+        return obj.body[:200]
@@ -1,13 +1,36 @@
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
 class SchedulerError(Exception):
-    pass
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
 
-def schedule_task(task_id: str, due_at_iso: str, owner_id: str, user_email: str):
-    url = f"{settings.API_BASE_URL}/tasks/{task_id}/schedule"
-    payload = {
+    @property
+    def permanent(self):
+        """A 4xx other than 408/429: the request itself is bad, retrying will not help."""
+        return (self.status_code is not None and 400 <= self.status_code < 500
+                and self.status_code not in (408, 429))
+
+# One keep-alive session per process, so batches reuse TLS connections to
+# API Gateway instead of opening one per reminder.
+_session = None
+def _get_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.SCHEDULER_MAX_CONCURRENCY)
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+    return _session
+
+def _payload(task_id: str, due_at_iso: str, owner_id: str, user_email: str):
+    return {
         "dueAtIso": due_at_iso,                     # ISO 8601
         "ownerId": owner_id,
         "userEmail": user_email,
@@ -16,11 +39,75 @@ def schedule_task(task_id: str, due_at_iso: str, owner_id: str, user_email: str)
         "unsubUrl": f"https://productivity.dunedivision.com/unsub?u={owner_id}",
         "timezone": "Europe/Berlin",
     }
+
+def _headers():
     headers = {"Content-Type": "application/json"}
     if settings.API_KEY:
         headers["x-api-key"] = settings.API_KEY
+    return headers
+
+def schedule_task(task_id: str, due_at_iso: str, owner_id: str, user_email: str):
+    url = f"{settings.API_BASE_URL}/tasks/{task_id}/schedule"
+    payload = _payload(task_id, due_at_iso, owner_id, user_email)
+    r = _get_session().post(url, headers=_headers(), data=json.dumps(payload),
+                            timeout=settings.SCHEDULER_TIMEOUT)
+    if r.status_code >= 300:
+        raise SchedulerError(f"{r.status_code} {r.text}", status_code=r.status_code)
+    return r.json() if r.content else {}
+
+def schedule_many(items, max_workers=None):
+    """
+    Schedule a batch of reminders concurrently over the shared session.
+
+    ``items`` is an iterable of (task_id, due_at_iso, owner_id, user_email)
+    tuples. Returns one result per item, in order: the API response dict on
+    success or the exception that was raised.
+    """
+    items = list(items)
+    if not items:
+        return []
+    workers = min(max_workers or settings.SCHEDULER_MAX_CONCURRENCY, len(items))
+
+    def send(item):
+        try:
+            return schedule_task(*item)
+        except (SchedulerError, requests.RequestException) as exc:
+            return exc
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(send, items))
 
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=10)
+async def schedule_task_async(client, task_id: str, due_at_iso: str, owner_id: str, user_email: str):
+    """``schedule_task`` over an ``httpx.AsyncClient``."""
+    url = f"{settings.API_BASE_URL}/tasks/{task_id}/schedule"
+    payload = _payload(task_id, due_at_iso, owner_id, user_email)
+    r = await client.post(url, headers=_headers(), content=json.dumps(payload),
+                           timeout=settings.SCHEDULER_TIMEOUT)
     if r.status_code >= 300:
-        raise SchedulerError(f"{r.status_code} {r.text}")
+        raise SchedulerError(f"{r.status_code} {r.text}", status_code=r.status_code)
     return r.json() if r.content else {}
+
+async def schedule_many_async(items, max_concurrency=None):
+    """
+    ``schedule_many`` on one event loop: up to ``max_concurrency`` requests
+    in flight over a single httpx connection pool, with no thread per
+    request, so a batch can keep hundreds of slow calls open at once.
+    """
+    import httpx
+
+    items = list(items)
+    if not items:
+        return []
+    limit = max_concurrency or settings.SCHEDULER_MAX_CONCURRENCY
+    semaphore = asyncio.Semaphore(limit)
+    limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+        async def send(item):
+            async with semaphore:
+                try:
+                    return await schedule_task_async(client, *item)
+                except (SchedulerError, httpx.HTTPError) as exc:
+                    return exc
+
+        return await asyncio.gather(*(send(item) for item in items))
@@ -2,10 +2,14 @@ from django.conf import settings
 from django.contrib.auth.models import User, Group   
 from django.dispatch import receiver
 from .models import Profile
-from django.db.models.signals import post_save
-from django.utils import timezone
-from .models import Task
-from .aws_events import put_task_created
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from .models import Task, Habit, Note, Event, RecurrenceRule, Tombstone
+from . import caching
+from . import outbox
+from . import recurrence
+from . import membership
+from . import search
+from . import tagging
 
 DEFAULT_GROUP_NAME = "users"
 
@@ -13,30 +17,131 @@ DEFAULT_GROUP_NAME = "users"
 def schedule_on_create(sender, instance: Task, created, **kwargs):
     if not created:
         return
-    due = getattr(instance, "due_date", None)
-    owner = getattr(instance, "owner", None)  # adjust to your model
-    if not (due and owner and owner.email):
+    detail = outbox.task_created_detail(instance)
+    if detail is None:
         return  # nothing to schedule or no email available
+    # Written in the saving transaction; manage.py flush_outbox publishes it.
+    outbox.enqueue("TaskCreated", detail)
 
-    # Convert to UTC ISO with Z
-    if timezone.is_naive(due):
-        due = timezone.make_aware(due, timezone.get_current_timezone())
-    due_utc = due.astimezone(timezone.utc).replace(microsecond=0)
-    due_iso = due_utc.isoformat().replace("+00:00", "Z")
-
-    detail = {
-        "task_id": str(instance.pk),
-        "owner_id": str(getattr(owner, "pk", "")),
-        "owner_email": owner.email,
-        "owner_name": owner.get_username(),      # or owner.get_full_name()
-        "task_title": (instance.title or str(instance.pk)),
-        "dueAtIso": due_iso,
-    }
-    try:
-        put_task_created(detail)
-    except Exception:
-        import logging
-        logging.getLogger("tasks").exception("Failed to emit TaskCreated event")
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Habit)
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=Event)
+def sync_normalized_tags(sender, instance, created, raw=False, **kwargs):
+    if raw or (created and not instance.tags):
+        return
+    tagging.sync(instance)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Habit)
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=Event)
+def update_search_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_objects([instance])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Habit)
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=Event)
+def remove_search_entry(sender, instance, **kwargs):
+    search.unindex(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Habit)
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=Event)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    # Nobody is left to sync when the owning account itself is deleted.
+    if isinstance(origin, User):
+        return
+    Tombstone.objects.create(
+        kind=sender._meta.model_name, object_id=instance.pk, user_id=instance.user_id,
+    )
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Habit)
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=Event)
+def invalidate_cached_lists_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    caching.bump_objects(sender, [instance])
+
+
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=Habit)
+@receiver(pre_delete, sender=Note)
+@receiver(pre_delete, sender=Event)
+def invalidate_cached_lists_on_delete(sender, instance, **kwargs):
+    # Before the delete, while the groups links still exist; the bump itself
+    # is deferred to commit.
+    caching.bump_objects(sender, [instance])
+
+
+@receiver(m2m_changed, sender=Task.groups.through)
+@receiver(m2m_changed, sender=Habit.groups.through)
+@receiver(m2m_changed, sender=Note.groups.through)
+@receiver(m2m_changed, sender=Event.groups.through)
+def invalidate_cached_lists_on_share(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        # instance is the shared object, pk_set the groups
+        caching.bump_users([instance.user_id])
+        groups = pk_set if pk_set is not None else instance.groups.values_list("pk", flat=True)
+        caching.bump_groups(groups)
+    else:
+        # instance is the group, pk_set the shared objects
+        caching.bump_groups([instance.pk])
+        if pk_set:
+            caching.bump_users(model.objects.filter(pk__in=pk_set).values_list("user_id", flat=True))
+
+
+@receiver(pre_save, sender=Event)
+def rearm_moved_reminder(sender, instance, raw=False, **kwargs):
+    # Only events whose reminder already went out need the extra lookup.
+    if raw or instance.pk is None or instance.reminder_sent_at is None:
+        return
+    previous = Event.objects.filter(pk=instance.pk).values_list("reminder", flat=True).first()
+    if previous != instance.reminder:
+        instance.reminder_sent_at = None
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "reminder_sent_at" not in update_fields:
+            Event.objects.filter(pk=instance.pk).update(reminder_sent_at=None)
+
+
+@receiver(pre_save, sender=RecurrenceRule)
+def compute_rule_end(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.ends = recurrence.last_occurrence(instance)
+
+
+@receiver(post_save, sender=RecurrenceRule)
+def materialize_rule(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    recurrence.rematerialize(instance)
+    task = instance.task
+    if not task.recurring:
+        task.recurring = True
+        task.save(update_fields=["recurring", "last_modified"])
+
+
+@receiver(post_delete, sender=RecurrenceRule)
+def drop_rule_occurrences(sender, instance, origin=None, **kwargs):
+    # origin is what delete() was called on: an instance or a queryset.
+    if getattr(origin, "model", type(origin)) is not RecurrenceRule:
+        return  # the task itself is going; its occurrences cascade
+    instance.task.occurrences.filter(completed=False).delete()
+    instance.task.recurring = False
+    instance.task.save(update_fields=["recurring", "last_modified"])
 
 
 @receiver(post_save, sender=User)
@@ -46,6 +151,13 @@ def add_user_to_default_group(sender, instance, created, **kwargs):
     group, _ = Group.objects.get_or_create(name=DEFAULT_GROUP_NAME)
     instance.groups.add(group)
 
+@receiver(m2m_changed, sender=User.groups.through)
+def forget_group_membership(sender, instance, action, reverse, **kwargs):
+    # Only the forward side (user.groups.add/remove) hands us the user
+    # instance; memberships are request-scoped, so that is all we need.
+    if action.startswith("post_") and not reverse:
+        membership.invalidate(instance)
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
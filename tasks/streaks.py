@@ -0,0 +1,75 @@
+"""
+Habit streak engine.
+
+A streak counts consecutive periods (days, ISO weeks or calendar months,
+per ``Habit.frequency``) with at least one completion. ``advance`` is the
+O(1) step applied on every check-in; ``recompute_streaks`` folds the same
+step over the full completion history in one streaming pass.
+"""
+import calendar
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Habit, HabitCompletion
+
+
+def period_index(frequency, when):
+    """Sequential number of the period ``when`` falls in, in local time."""
+    day = timezone.localdate(when)
+    if frequency == 'Weekly':
+        # date.min is a Monday, so this counts Monday-based weeks.
+        return (day.toordinal() - 1) // 7
+    if frequency == 'Monthly':
+        return day.year * 12 + day.month - 1
+    return day.toordinal()
+
+
+def advance(frequency, streak, last_done, done_at):
+    """(streak, last_done) after a completion at ``done_at``."""
+    if last_done is None:
+        return 1, done_at
+    current, previous = period_index(frequency, done_at), period_index(frequency, last_done)
+    if current < previous:
+        # Back-dated check-in: it cannot extend the current run; a full
+        # recompute (manage.py recompute_streaks) will account for it.
+        return streak, last_done
+    if current == previous:
+        return max(streak, 1), max(last_done, done_at)
+    if current == previous + 1:
+        return streak + 1, done_at
+    return 1, done_at
+
+
+def history(frequency, streak, last_done):
+    """
+    Completion times that rebuild (``streak``, ``last_done``): one per
+    period, ending at ``last_done``, the same wall-clock time in each.
+    """
+    local = timezone.localtime(last_done).replace(tzinfo=None)
+    times = []
+    for periods in range(max(streak, 1)):
+        if frequency == 'Weekly':
+            when = local - timedelta(weeks=periods)
+        elif frequency == 'Monthly':
+            year, month = divmod(local.year * 12 + local.month - 1 - periods, 12)
+            day = min(local.day, calendar.monthrange(year, month + 1)[1])
+            when = local.replace(year=year, month=month + 1, day=day)
+        else:
+            when = local - timedelta(days=periods)
+        times.append(timezone.make_aware(when))
+    return times[::-1]
+
+
+def check_in(habit, user, done_at=None):
+    """Record a completion and update the habit's streak incrementally."""
+    done_at = done_at or timezone.now()
+    with transaction.atomic():
+        habit = Habit.objects.select_for_update().get(pk=habit.pk)
+        HabitCompletion.objects.create(habit=habit, user=user, done_at=done_at)
+        habit.streak, habit.last_done = advance(
+            habit.frequency, habit.streak, habit.last_done, done_at
+        )
+        habit.save(update_fields=['streak', 'last_done', 'last_modified'])
+    return habit
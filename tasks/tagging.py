@@ -0,0 +1,60 @@
+"""
+Keeps the indexed ``normalized_tags`` relation in step with the free-text
+comma-separated ``tags`` field of Task, Habit, Note and Event.
+"""
+from .models import Tag
+
+MAX_TAG_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def parse(raw):
+    """'Work, personal ,work' -> ['work', 'personal'] (order kept, no dupes)."""
+    names = []
+    for part in (raw or '').split(','):
+        name = part.strip().lower()[:MAX_TAG_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def normalize(name):
+    return (name or '').strip().lower()
+
+
+def _tag_ids(names):
+    """Map tag names to ids, creating missing tags with one INSERT."""
+    if not names:
+        return {}
+    Tag.objects.bulk_create([Tag(name=n) for n in names], ignore_conflicts=True)
+    return dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+
+
+def sync(obj):
+    """Update ``obj.normalized_tags`` to match ``obj.tags``; writes only on change."""
+    wanted = parse(obj.tags)
+    current = dict(obj.normalized_tags.values_list('name', 'pk'))
+    if set(wanted) == set(current):
+        return
+    ids = _tag_ids([n for n in wanted if n not in current])
+    obj.normalized_tags.remove(*[pk for name, pk in current.items() if name not in wanted])
+    obj.normalized_tags.add(*ids.values())
+
+
+def sync_many(model, objs, replace=True):
+    """
+    Batch version of ``sync`` for bulk writes: one tag upsert, at most one
+    DELETE and one INSERT on the through table for the whole batch.
+    """
+    objs = [obj for obj in objs if obj.pk is not None]
+    if not objs:
+        return
+    through = model.normalized_tags.through
+    fk = f"{model._meta.model_name}_id"
+    wanted = {obj.pk: parse(obj.tags) for obj in objs}
+    ids = _tag_ids(sorted({n for names in wanted.values() for n in names}))
+    if replace:
+        through.objects.filter(**{f"{fk}__in": list(wanted)}).delete()
+    through.objects.bulk_create(
+        [through(**{fk: pk, 'tag_id': ids[n]}) for pk, names in wanted.items() for n in names],
+        ignore_conflicts=True,
+    )
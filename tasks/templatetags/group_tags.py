@@ -1,5 +1,7 @@
 from django import template
 
+from tasks.membership import in_any_group
+
 register = template.Library()
 
 @register.filter
@@ -9,7 +11,7 @@ def in_group(user, group_name):
         return False
     if user.is_superuser:
         return True
-    return user.groups.filter(name=group_name).exists()
+    return in_any_group(user, [group_name])
 
 @register.filter
 def in_groups(user, group_names):
@@ -18,4 +20,4 @@ def in_groups(user, group_names):
     if user.is_superuser:
         return True
     names = [n.strip() for n in group_names.split(',') if n.strip()]
-    return user.groups.filter(name__in=names).exists()
+    return in_any_group(user, names)
@@ -1,3 +1,1389 @@
-from django.test import TestCase
+import base64
+import contextvars
+import csv
+import importlib
+import io
+import tempfile
+import json
+import os
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from types import ModuleType, SimpleNamespace
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.apps import apps
+from django.contrib.auth.models import Group, User
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from . import (
+    aio, aws_events, caching, checks, dashboard, event_reminders, export, fastlist, ical, importer, membership, metrics,
+    outbox, pooling, recurrence, reminders, routing, sync, warmup,
+)
+from .visibility import VisibleList, visible_to
+from .models import (
+    Event, Habit, HabitCompletion, Note, OutboxEvent, RecurrenceRule, ReminderRequest, Task,
+    TaskOccurrence,
+)
+from .serializers import EventSerializer, HabitSerializer, NoteSerializer, TaskSerializer
+from .services.scheduler_api import SchedulerError, schedule_many
+from .views import TaskListCreateAPI
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def make_events(n):
+    return OutboxEvent.objects.bulk_create(
+        OutboxEvent(source="test", detail_type="TaskCreated", detail={"n": i}) for i in range(n)
+    )
+
+
+class OutboxFlushTests(TestCase):
+    def test_batches_and_marks_sent(self):
+        make_events(25)
+        bus = aws_events.InMemoryEventBus()
+        stats = outbox.flush(client=bus)
+        self.assertEqual((bus.calls, len(bus.entries)), (3, 25))
+        self.assertEqual(stats.sent, 25)
+        self.assertFalse(OutboxEvent.objects.filter(sent_at__isnull=True).exists())
+        self.assertFalse(OutboxEvent.objects.filter(claimed_at__isnull=False).exists())
+
+    def test_partial_failure_keeps_rejected_entries_pending(self):
+        events = make_events(3)
+        stats = outbox.flush(client=aws_events.InMemoryEventBus(fail_every=2))
+        self.assertEqual((stats.sent, stats.failed, stats.dead), (2, 1, 0))
+        rejected = OutboxEvent.objects.get(pk=events[1].pk)
+        self.assertIsNone(rejected.sent_at)
+        self.assertIsNone(rejected.claimed_at)
+        self.assertEqual(rejected.attempts, 1)
+        self.assertTrue(rejected.last_error.startswith("InternalFailure"))
+
+        bus = aws_events.InMemoryEventBus()
+        stats = outbox.flush(client=bus)
+        self.assertEqual(stats.sent, 1)
+        self.assertEqual([json.loads(e["Detail"]) for e in bus.entries], [{"n": 1}])
+
+    def test_exception_fails_the_whole_batch(self):
+        make_events(3)
+        bus = aws_events.InMemoryEventBus()
+        with mock.patch.object(bus, "put_events", side_effect=ConnectionError("timed out")):
+            stats = outbox.flush(client=bus)
+        self.assertEqual((stats.sent, stats.failed), (0, 3))
+        self.assertEqual(
+            set(OutboxEvent.objects.values_list('attempts', 'last_error', 'claimed_at')),
+            {(1, "timed out", None)},
+        )
+
+    def test_max_attempts_dead_letters(self):
+        event = make_events(1)[0]
+        OutboxEvent.objects.filter(pk=event.pk).update(attempts=outbox.DEFAULT_MAX_ATTEMPTS - 1)
+        with self.assertLogs("tasks", level="ERROR") as logs:
+            stats = outbox.flush(client=aws_events.InMemoryEventBus(fail_every=1))
+        self.assertEqual(stats.dead, 1)
+        self.assertIn("dead-lettered", logs.output[0])
+        self.assertEqual(list(outbox.dead_letters()), [event])
+
+        bus = aws_events.InMemoryEventBus()
+        self.assertEqual(outbox.flush(client=bus).calls, 0)
+        self.assertEqual(bus.calls, 0)
+
+    def test_stale_claim_is_taken_over(self):
+        fresh, stale = make_events(2)
+        now = outbox.timezone.now()
+        OutboxEvent.objects.filter(pk=fresh.pk).update(claimed_at=now)
+        OutboxEvent.objects.filter(pk=stale.pk).update(claimed_at=now - outbox.STALE_AFTER * 2)
+        bus = aws_events.InMemoryEventBus()
+        outbox.flush(client=bus)
+        self.assertEqual(len(bus.entries), 1)
+        self.assertIsNotNone(OutboxEvent.objects.get(pk=stale.pk).sent_at)
+        self.assertIsNone(OutboxEvent.objects.get(pk=fresh.pk).sent_at)
+
+
+class OutboxFlushTransactionTests(TransactionTestCase):
+    def test_publishes_outside_a_transaction(self):
+        make_events(2)
+        bus = aws_events.InMemoryEventBus()
+        seen = []
+        put_events = bus.put_events
+
+        def observe(Entries):
+            seen.append((
+                connection.in_atomic_block,
+                OutboxEvent.objects.filter(claimed_at__isnull=False).count(),
+            ))
+            return put_events(Entries)
+
+        with mock.patch.object(bus, "put_events", side_effect=observe):
+            outbox.flush(client=bus)
+        self.assertEqual(seen, [(False, 2)])
+        self.assertEqual(len(bus.entries), 2)
+
+
+class StubSchedulerHandler(BaseHTTPRequestHandler):
+    """
+    Scheduler API stand-in: POST /tasks/<id>/schedule answers according to
+    the task id: ``ok*`` 201, ``bad*`` 400, ``boom*`` 503, ``slow*`` after
+    a second (longer than the tests' SCHEDULER_TIMEOUT).
+    """
+
+    def do_POST(self):
+        task_id = self.path.split("/")[2]
+        self.server.received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        if task_id.startswith("slow"):
+            time.sleep(1)
+        status = 400 if task_id.startswith("bad") else 503 if task_id.startswith("boom") else 201
+        body = json.dumps({"scheduleId": task_id} if status == 201 else {"message": "nope"}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+class SchedulerStubMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubSchedulerHandler)
+        cls.server.daemon_threads = True
+        cls.server.received = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(
+            API_BASE_URL=f"http://127.0.0.1:{cls.server.server_port}", API_KEY="", SCHEDULER_TIMEOUT=0.3,
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+
+class ScheduleManyTests(SchedulerStubMixin, TestCase):
+    def test_results_per_status(self):
+        due = "2030-01-01T09:00:00Z"
+        results = schedule_many(
+            [(task_id, due, "1", "a@example.com") for task_id in ("ok-1", "bad-1", "boom-1", "slow-1")]
+        )
+        self.assertEqual(results[0], {"scheduleId": "ok-1"})
+        self.assertIsInstance(results[1], SchedulerError)
+        self.assertEqual(results[1].status_code, 400)
+        self.assertTrue(results[1].permanent)
+        self.assertIsInstance(results[2], SchedulerError)
+        self.assertEqual(results[2].status_code, 503)
+        self.assertFalse(results[2].permanent)
+        self.assertNotIsInstance(results[3], SchedulerError)  # a requests timeout
+        self.assertIsInstance(results[3], Exception)
+        self.assertEqual(self.server.received[-1]["dueAtIso"], due)
+
+    def test_status_comes_from_the_code_not_the_message(self):
+        error = SchedulerError("404 looks like a client error but is not one")
+        self.assertFalse(error.permanent)
+        self.assertFalse(SchedulerError("429 Too Many Requests", status_code=429).permanent)
+
+
+class DispatchTests(SchedulerStubMixin, TestCase):
+    def setUp(self):
+        due = timezone.now() + timedelta(days=1)
+        self.rows = {
+            task_id: reminders.enqueue(task_id, due, "1", "a@example.com")
+            for task_id in ("ok-1", "bad-1", "boom-1", "slow-1")
+        }
+
+    def assertOutcome(self, use_async=False):
+        scheduled, failed = reminders.dispatch(max_attempts=3, use_async=use_async)
+        self.assertEqual((scheduled, failed), (1, 1))
+        status = {
+            task_id: ReminderRequest.objects.values_list('status', 'attempts').get(pk=row.pk)
+            for task_id, row in self.rows.items()
+        }
+        self.assertEqual(status, {
+            "ok-1": (ReminderRequest.SCHEDULED, 1),
+            "bad-1": (ReminderRequest.FAILED, 1),     # 4xx: no retry
+            "boom-1": (ReminderRequest.PENDING, 1),   # 5xx: retried on the next pass
+            "slow-1": (ReminderRequest.PENDING, 1),   # timeout: retried too
+        })
+
+        reminders.dispatch(max_attempts=3, use_async=use_async)
+        self.assertEqual(ReminderRequest.objects.get(pk=self.rows["boom-1"].pk).attempts, 2)
+        self.assertEqual(ReminderRequest.objects.get(pk=self.rows["bad-1"].pk).attempts, 1)
+
+    def test_dispatch(self):
+        self.assertOutcome()
+
+    @unittest.skipIf(httpx is None, "httpx is not installed")
+    def test_dispatch_async(self):
+        self.assertOutcome(use_async=True)
+
+    def test_gives_up_after_max_attempts(self):
+        for _ in range(2):
+            reminders.dispatch(max_attempts=2)
+        self.assertEqual(
+            ReminderRequest.objects.values_list('status', 'attempts').get(pk=self.rows["boom-1"].pk),
+            (ReminderRequest.FAILED, 2),
+        )
+
+
+class EnqueueDueTasksTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("due", email="due@example.com", password="pw")
+        self.due = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def queued(self):
+        return sorted(ReminderRequest.objects.values_list('task_id', 'due_at'))
+
+    def test_skips_only_the_same_task_and_due_date(self):
+        task = Task.objects.create(user=self.user, title="one-off", due_date=self.due)
+        self.assertEqual(reminders.enqueue_due_tasks(self.user), 1)
+        self.assertEqual(reminders.enqueue_due_tasks(self.user), 0)
+
+        # Moved to a later date: the old reminder stays, the new date gets one.
+        later = self.due + timedelta(days=2)
+        Task.objects.filter(pk=task.pk).update(due_date=later)
+        self.assertEqual(reminders.enqueue_due_tasks(self.user), 1)
+        self.assertEqual(self.queued(), [(str(task.pk), self.due), (str(task.pk), later)])
+
+    def test_only_tasks_with_a_rule_use_their_occurrences(self):
+        one_off = Task.objects.create(user=self.user, title="one-off", due_date=self.due)
+        flagged = Task.objects.create(user=self.user, title="flagged", due_date=self.due, recurring=True)
+        ruled = Task.objects.create(user=self.user, title="ruled", due_date=self.due)
+        RecurrenceRule.objects.create(
+            task=ruled, freq="Daily", start=self.due + timedelta(hours=1), count=3,
+        )
+        occurrences = sorted(TaskOccurrence.objects.filter(task=ruled).values_list("due", flat=True))
+        self.assertEqual(len(occurrences), 3)
+
+        self.assertEqual(reminders.enqueue_due_tasks(self.user), 5)
+        self.assertEqual(self.queued(), sorted(
+            [(str(one_off.pk), self.due), (str(flagged.pk), self.due)]
+            + [(str(ruled.pk), due) for due in occurrences]
+        ))
+
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class RecurrenceMathTests(SimpleTestCase):
+    def rule(self, freq, start, **kwargs):
+        return RecurrenceRule(freq=freq, start=start, **kwargs)
+
+    def assertSeekMatchesWalk(self, rule, months=30):
+        # Every window answered by the index seek equals filtering the
+        # occurrences walked one by one from the start.
+        horizon = rule.start + timedelta(days=31 * months)
+        walked = list(recurrence.occurrences(rule, before=horizon))
+        for offset in range(-3, 31 * months, 17):
+            after = rule.start + timedelta(days=offset, hours=offset % 24)
+            before = min(after + timedelta(days=45), horizon)
+            with self.subTest(after=after):
+                self.assertEqual(
+                    list(recurrence.occurrences(rule, after, before)),
+                    [when for when in walked if after <= when < before],
+                )
+
+    def test_monthly_on_the_31st_falls_on_the_last_day(self):
+        rule = self.rule("Monthly", local(2026, 1, 31, 9))
+        self.assertEqual(
+            list(recurrence.occurrences(rule, before=local(2026, 5, 1))),
+            [local(2026, 1, 31, 9), local(2026, 2, 28, 9), local(2026, 3, 31, 9), local(2026, 4, 30, 9)],
+        )
+        self.assertEqual(
+            list(recurrence.occurrences(rule, local(2028, 2, 1), local(2028, 3, 1))),
+            [local(2028, 2, 29, 9)],
+        )
+        self.assertSeekMatchesWalk(rule)
+        self.assertSeekMatchesWalk(self.rule("Monthly", local(2026, 1, 31, 9), interval=5), months=80)
+
+    def test_weekdays_every_other_week(self):
+        # Starts on a Wednesday; the Monday of the first week is skipped.
+        rule = self.rule("Weekly", local(2026, 1, 7, 18), weekdays="0,2,4", interval=2)
+        self.assertEqual(
+            [when.date() for when in recurrence.occurrences(rule, before=local(2026, 2, 3))],
+            [date(2026, 1, 7), date(2026, 1, 9), date(2026, 1, 19), date(2026, 1, 21),
+             date(2026, 1, 23), date(2026, 2, 2)],
+        )
+        self.assertSeekMatchesWalk(rule)
+        self.assertSeekMatchesWalk(self.rule("Weekly", local(2026, 1, 10, 7), weekdays="1,5", interval=3))
+        self.assertSeekMatchesWalk(self.rule("Daily", local(2026, 1, 1, 6, 30), interval=4))
+
+    def test_count_and_until_limits(self):
+        start = local(2026, 1, 5, 8)
+        counted = self.rule("Daily", start, interval=2, count=4)
+        self.assertEqual(len(list(recurrence.occurrences(counted))), 4)
+        self.assertEqual(recurrence.last_occurrence(counted), local(2026, 1, 11, 8))
+        self.assertEqual(list(recurrence.occurrences(counted, local(2026, 1, 10))), [local(2026, 1, 11, 8)])
+
+        until = self.rule("Weekly", start, weekdays="0,3", until=local(2026, 1, 22, 8))
+        self.assertEqual(
+            [when.date() for when in recurrence.occurrences(until)],
+            [date(2026, 1, 5), date(2026, 1, 8), date(2026, 1, 12), date(2026, 1, 15),
+             date(2026, 1, 19), date(2026, 1, 22)],
+        )
+        self.assertEqual(recurrence.last_occurrence(until), local(2026, 1, 22, 8))
+
+        both = self.rule("Monthly", local(2026, 1, 31, 9), count=12, until=local(2026, 4, 30, 9))
+        self.assertEqual(recurrence.last_occurrence(both), local(2026, 4, 30, 9))
+        self.assertEqual(len(list(recurrence.occurrences(both))), 4)
+        self.assertIsNone(recurrence.last_occurrence(self.rule("Daily", start)))
+
+    def test_wall_clock_time_survives_dst(self):
+        with timezone.override("Europe/Berlin"):
+            rule = self.rule("Daily", local(2026, 3, 27, 9), interval=1)
+            hours = {timezone.localtime(when).hour
+                     for when in recurrence.occurrences(rule, before=local(2026, 4, 2))}
+            self.assertEqual(hours, {9})
+            self.assertSeekMatchesWalk(rule, months=8)
+
+
+class OccurrenceCompleteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("repeater", email="r@example.com", password="pw")
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(user=self.user, title="standup")
+        start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        RecurrenceRule.objects.create(task=self.task, freq="Daily", start=start, count=3)
+        self.first, self.second, _ = recurrence.occurrences(self.task.recurrence)
+
+    def complete(self, due, task=None):
+        return self.client.post(f"/tasks/api/tasks/{(task or self.task).pk}/occurrences/{due}/complete/")
+
+    def due_list(self):
+        response = self.client.get("/tasks/api/tasks/due/", {
+            "start": self.first.isoformat(), "end": (self.first + timedelta(days=7)).isoformat(),
+        })
+        return [item["due"] for item in response.json()["results"]]
+
+    def test_completed_occurrence_leaves_the_due_list_and_the_reminders(self):
+        reminders.enqueue_due_tasks(self.user)
+        due = self.due_list()
+        self.assertEqual(len(due), 3)
+        response = self.complete(due[1])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(TaskOccurrence.objects.get(task=self.task, due=self.second).completed)
+        self.assertEqual(self.due_list(), [due[0], due[2]])
+        self.assertEqual(
+            sorted(ReminderRequest.objects.values_list("due_at", flat=True)),
+            [self.first, self.first + timedelta(days=2)],
+        )
+        self.assertEqual(reminders.enqueue_due_tasks(self.user), 0)
+
+    def test_rejects_other_dates_and_tasks(self):
+        self.assertEqual(self.complete((self.first + timedelta(hours=1)).isoformat()).status_code, 404)
+        self.assertEqual(self.complete("someday").status_code, 400)
+        one_off = Task.objects.create(user=self.user, title="one-off")
+        self.assertEqual(self.complete(self.first.isoformat(), task=one_off).status_code, 404)
+
+
+class BulkUpdateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("bulk", password="pw")
+        self.client.force_login(self.user)
+        now = timezone.now()
+        self.sent = now - timedelta(hours=1)
+        self.moved, self.kept = Event.objects.bulk_create(
+            Event(user=self.user, title=title, event_date=now + timedelta(days=1),
+                  reminder=now - timedelta(hours=2), reminder_sent_at=self.sent)
+            for title in ("moved", "kept")
+        )
+
+    def test_moving_a_reminder_rearms_it(self):
+        new_reminder = timezone.now() + timedelta(hours=3)
+        response = self.client.patch(
+            "/tasks/api/events/bulk/",
+            [{"id": self.moved.pk, "reminder": new_reminder.isoformat()},
+             {"id": self.kept.pk, "title": "renamed"}],
+            content_type="application/json",
+        )
+        self.assertEqual([r["status"] for r in response.json()["results"]], [200, 200])
+        self.assertEqual(list(event_reminders.pending()), [self.moved])
+        self.assertIsNone(Event.objects.get(pk=self.moved.pk).reminder_sent_at)
+        kept = Event.objects.get(pk=self.kept.pk)
+        self.assertEqual((kept.title, kept.reminder_sent_at), ("renamed", self.sent))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("keyset", password="pw")
+        self.client.force_login(self.user)
+        Task.objects.bulk_create(Task(user=self.user, title=f"t{i}") for i in range(7))
+        # Two runs of equal timestamps straddle the page boundaries.
+        tasks = list(Task.objects.order_by("id"))
+        moment = timezone.now()
+        Task.objects.filter(pk__in=[t.pk for t in tasks[:4]]).update(created=moment)
+        Task.objects.filter(pk__in=[t.pk for t in tasks[4:]]).update(created=moment - timedelta(hours=1))
+        self.expected = list(Task.objects.order_by("-created", "-id").values_list("id", flat=True))
+
+    def walk(self, url, link):
+        ids, pages = [], 0
+        while url:
+            body = self.client.get(url).json()
+            ids += [item["id"] for item in body["results"]]
+            url, pages = body[link], pages + 1
+        return ids, pages
+
+    def test_walks_equal_created_values_without_gaps_or_repeats(self):
+        ids, pages = self.walk("/tasks/api/tasks/?pagination=cursor&page_size=3", "next")
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+        self.assertNotIn("count", self.client.get("/tasks/api/tasks/?pagination=cursor").json())
+
+    def test_previous_links_walk_back_over_the_same_rows(self):
+        url = "/tasks/api/tasks/?pagination=cursor&page_size=3"
+        for _ in range(2):
+            url = self.client.get(url).json()["next"]
+        last = self.client.get(url).json()
+        ids, _ = self.walk(last["previous"], "previous")
+        self.assertEqual(ids, self.expected[3:6] + self.expected[:3])
+
+    def test_rejects_a_malformed_cursor(self):
+        for position in ("p=1", "p=nope|x"):
+            cursor = base64.b64encode(position.encode()).decode()
+            with self.subTest(position=position):
+                response = self.client.get(f"/tasks/api/tasks/?cursor={cursor}")
+                self.assertEqual(response.status_code, 404)
+
+
+class TagFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("tagger", password="pw")
+        self.client.force_login(self.user)
+        self.single = Task.objects.create(user=self.user, title="single", tags="Work, home ,work")
+        response = self.client.post("/tasks/api/tasks/bulk/", [
+            {"title": "bulk-work", "tags": "WORK"},
+            {"title": "bulk-home", "tags": "home"},
+        ], content_type="application/json")
+        self.assertEqual([r["status"] for r in response.json()["results"]], [201, 201])
+        Task.objects.create(user=User.objects.create_user("stranger"), title="theirs", tags="work")
+
+    def titles(self, tag):
+        response = self.client.get("/tasks/api/tasks/", {"tag": tag})
+        return sorted(item["title"] for item in response.json()["results"])
+
+    def test_filters_on_normalized_tags(self):
+        self.assertEqual(self.titles(" Work "), ["bulk-work", "single"])
+        self.assertEqual(self.titles("home"), ["bulk-home", "single"])
+        self.assertEqual(self.titles("missing"), [])
+        self.assertEqual(len(self.titles("")), 3)
+        self.assertEqual(
+            sorted(self.single.normalized_tags.values_list("name", flat=True)), ["home", "work"]
+        )
+
+    def test_editing_tags_moves_the_task_between_filters(self):
+        # The list cache is versioned; versions are bumped on commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.single.tags = "errands"
+            self.single.save()
+        self.assertEqual(self.titles("work"), ["bulk-work"])
+        self.assertEqual(self.titles("errands"), ["single"])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch("/tasks/api/tasks/bulk/", [
+                {"id": self.single.pk, "tags": "work"},
+            ], content_type="application/json")
+        self.assertEqual(response.json()["results"][0]["status"], 200)
+        self.assertEqual(self.titles("work"), ["bulk-work", "single"])
+        self.assertEqual(self.titles("errands"), [])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("searcher", password="pw")
+        self.client.force_login(self.user)
+        other = User.objects.create_user("colleague", password="pw")
+        team = Group.objects.create(name="finance")
+        self.user.groups.add(team)
+        self.in_title = Note.objects.create(user=self.user, title="Budget review", content="numbers")
+        self.in_body = Note.objects.create(user=self.user, title="Monday", content="talk about the budget")
+        self.shared = Note.objects.create(user=other, title="Team budget", content="spreadsheet")
+        self.shared.groups.add(team)
+        self.hidden = Note.objects.create(user=other, title="Private budget", content="salary")
+        Task.objects.create(user=self.user, title="File taxes", notes="budgeting for next year")
+
+    def hits(self, q):
+        response = self.client.get("/tasks/api/search/", {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [(hit["type"], hit["id"]) for hit in response.json()["results"]]
+
+    def test_ranks_title_matches_first_and_hides_unshared_items(self):
+        hits = self.hits("budget")
+        self.assertNotIn(("note", self.hidden.pk), hits)
+        self.assertIn(("note", self.shared.pk), hits)
+        self.assertLess(hits.index(("note", self.in_title.pk)), hits.index(("note", self.in_body.pk)))
+        ranks = [hit["rank"] for hit in self.client.get("/tasks/api/search/?q=budget").json()["results"]]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_unsharing_removes_the_hit(self):
+        self.shared.groups.clear()
+        self.assertNotIn(("note", self.shared.pk), self.hits("budget"))
+
+    def test_edits_are_reindexed_and_odd_input_is_harmless(self):
+        self.in_body.content = "nothing to see"
+        self.in_body.save()
+        self.assertNotIn(("note", self.in_body.pk), self.hits("budget"))
+        self.assertEqual(self.hits(""), [])
+        self.assertEqual(self.hits('budget" OR NEAR(*'), [])
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("syncer", password="pw")
+        self.client.force_login(self.user)
+        self.now = timezone.now()
+
+    def sync(self, since=None, at=None):
+        with mock.patch.object(sync.timezone, "now", return_value=at or self.now + sync.SETTLE * 2):
+            response = self.client.get("/tasks/api/sync/", {"since": since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_round_trip_with_changes_and_tombstones(self):
+        kept, gone = (Task.objects.create(user=self.user, title=t) for t in ("kept", "gone"))
+        Note.objects.create(user=User.objects.create_user("other"), title="not mine")
+        first = self.sync()
+        self.assertEqual(sorted(t["title"] for t in first["tasks"]), ["gone", "kept"])
+        self.assertEqual((first["notes"], first["deleted"], first["more"]), ([], [], False))
+
+        empty = self.sync(first["next"])
+        self.assertEqual([empty[key] for key in sync.STREAMS], [[]] * len(sync.STREAMS))
+
+        kept.title = "renamed"
+        kept.save()
+        gone_pk = gone.pk
+        gone.delete()
+        later = timezone.now() + sync.SETTLE * 2
+        delta = self.sync(empty["next"], at=later)
+        self.assertEqual([t["title"] for t in delta["tasks"]], ["renamed"])
+        self.assertEqual([(d["type"], d["id"]) for d in delta["deleted"]], [("task", gone_pk)])
+        self.assertEqual(self.sync(delta["next"], at=later)["deleted"], [])
+
+    def test_rows_inside_the_settle_window_wait_for_the_next_sync(self):
+        task = Task.objects.create(user=self.user, title="fresh")
+        held = self.sync(at=task.last_modified + sync.SETTLE / 2)
+        self.assertEqual(held["tasks"], [])
+        released = self.sync(held["next"], at=task.last_modified + sync.SETTLE)
+        self.assertEqual([t["id"] for t in released["tasks"]], [task.pk])
+
+    def test_pages_streams_and_rejects_bad_tokens(self):
+        Task.objects.bulk_create(Task(user=self.user, title=f"t{i}") for i in range(3))
+        Task.objects.update(last_modified=self.now)  # equal timestamps: ties break on id
+        with mock.patch.object(sync.timezone, "now", return_value=self.now + sync.SETTLE):
+            first = sync.changes(self.user, page_size=2)
+            rest = sync.changes(self.user, first["next"], page_size=2)
+        self.assertTrue(first["more"])
+        self.assertFalse(rest["more"])
+        ids = [t["id"] for t in first["tasks"] + rest["tasks"]]
+        self.assertEqual(ids, sorted(Task.objects.values_list("id", flat=True)))
+        for token in ("garbage", first["next"][:-2] + "xx"):
+            self.assertEqual(self.client.get("/tasks/api/sync/", {"since": token}).status_code, 400)
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("conditional", password="pw")
+        self.client.force_login(self.user)
+        self.task = Task.objects.create(user=self.user, title="draft")
+        self.url = f"/tasks/api/tasks/{self.task.pk}/"
+
+    def test_unchanged_list_answers_304_until_a_write(self):
+        etag = self.client.get("/tasks/api/tasks/")["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(self.client.get("/tasks/api/tasks/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        other = self.client.get("/tasks/api/tasks/?page_size=5", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.user, title="second")
+        response = self.client.get("/tasks/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_304_and_stale_writes_412(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.patch(self.url, {"title": "final"}, content_type="application/json",
+                                     HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # A second client still holding the old ETag loses.
+        stale = self.client.patch(self.url, {"title": "clobber"}, content_type="application/json",
+                                  HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=etag).status_code, 412)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "final")
+
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=response["ETag"]).status_code, 204)
+
+
+class FastListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("fästlist", password="pw")
+        when = timezone.now().replace(microsecond=123456)
+        Task.objects.create(user=self.user, title="plain")
+        Task.objects.create(user=self.user, title='quote " and \\ slash', due_date=when, priority="High",
+                            tags="Work, Ünïcode", recurring=True, completed=True, notes="line\nbreak ☃")
+        Habit.objects.create(user=self.user, name="never done")
+        Habit.objects.create(user=self.user, name="daily", last_done=when, streak=3, notes="é")
+        Note.objects.create(user=self.user, title="", content="")
+        Note.objects.create(user=self.user, title="note", content="<b>&amp;</b>\t", tags="Ideas")
+        Event.objects.create(user=self.user, title="no reminder", event_date=when)
+        Event.objects.create(user=self.user, title="reminded", event_date=when.replace(microsecond=0),
+                             reminder=when - timedelta(hours=1), location="Zürich", description="\u2028")
+
+    def assertSameBytes(self):
+        render = JSONRenderer().render
+        for model, serializer_class in ((Task, TaskSerializer), (Habit, HabitSerializer),
+                                        (Note, NoteSerializer), (Event, EventSerializer)):
+            with self.subTest(model=model.__name__):
+                queryset = model.objects.order_by("pk")
+                expected = render(serializer_class(queryset, many=True).data)
+                actual = render(fastlist.represent(fastlist.rows(queryset, serializer_class), serializer_class))
+                self.assertEqual(actual, expected)
+
+    def test_represent_renders_the_serializer_bytes(self):
+        self.assertSameBytes()
+
+    @override_settings(TIME_ZONE="America/New_York")
+    def test_datetimes_follow_the_current_time_zone(self):
+        # In UTC the renderer's own datetime encoding hides a missed conversion.
+        self.assertSameBytes()
+
+
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("cached", password="pw")
+
+    def test_evicted_version_never_revives_an_old_key(self):
+        first = caching.make_key("list", self.user.pk)
+        caching.get_or_set(first, lambda: "old rows")
+        with self.captureOnCommitCallbacks(execute=True):
+            caching.bump_users([self.user.pk])
+        second = caching.make_key("list", self.user.pk)
+        self.assertNotEqual(second, first)
+
+        cache.delete(caching._user_key(self.user.pk))  # as if culled by the backend
+        third = caching.make_key("list", self.user.pk)
+        self.assertNotIn(third, (first, second))
+        self.assertEqual(caching.get_or_set(third, lambda: "new rows"), "new rows")
+
+    def test_waiter_that_times_out_leaves_the_lock_alone(self):
+        key = caching.make_key("list", self.user.pk)
+        cache.add(f"{key}:lock", 1)  # another worker is computing
+        with mock.patch.object(caching, "LOCK_WAIT", 0.1):
+            self.assertEqual(caching.get_or_set(key, lambda: "computed"), "computed")
+        self.assertEqual(cache.get(f"{key}:lock"), 1)
+
+        other = caching.make_key("other", self.user.pk)
+        caching.get_or_set(other, lambda: "computed")
+        self.assertIsNone(cache.get(f"{other}:lock"))
+
+
+class StreakBackfillTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("streaker", password="pw")
+        last_done = timezone.make_aware(datetime(2026, 3, 31, 8, 30))
+        self.habits = {
+            (frequency, streak): Habit.objects.create(
+                user=self.user, name=f"{frequency}-{streak}", frequency=frequency,
+                streak=streak, last_done=last_done,
+            )
+            for frequency, streak in (("Daily", 40), ("Weekly", 3), ("Monthly", 14), ("Daily", 0))
+        }
+        self.undated = Habit.objects.create(user=self.user, name="undated", streak=5)
+
+    def recompute(self):
+        call_command("recompute_streaks", stdout=io.StringIO())
+        return {key: Habit.objects.get(pk=habit.pk) for key, habit in self.habits.items()}
+
+    def test_recompute_after_the_backfill_keeps_existing_streaks(self):
+        importlib.import_module("tasks.migrations.0018_backfill_habit_completions").backfill(apps, None)
+        monthly = self.habits["Monthly", 14].completions.order_by("done_at")
+        self.assertEqual(timezone.localtime(monthly[0].done_at).date(), date(2025, 2, 28))
+        for (frequency, streak), habit in self.recompute().items():
+            with self.subTest(frequency=frequency):
+                self.assertEqual(habit.streak, max(streak, 1))
+                self.assertEqual(habit.last_done, self.habits[frequency, streak].last_done)
+
+    def test_habits_without_completions_are_reset(self):
+        HabitCompletion.objects.create(
+            habit=self.habits["Weekly", 3], user=self.user, done_at=timezone.now(),
+        )
+        recomputed = self.recompute()
+        self.assertEqual(recomputed["Weekly", 3].streak, 1)
+        self.assertEqual((recomputed["Daily", 40].streak, recomputed["Daily", 40].last_done), (0, None))
+        self.assertEqual(Habit.objects.get(pk=self.undated.pk).streak, 0)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("calendar", password="pw")
+        self.team = Group.objects.create(name="crew")
+        self.user.groups.add(self.team)
+        self.description = "Agenda: " + "café, crème brûlée; " * 12
+        self.event = Event.objects.create(
+            user=self.user, title="Offsite", description=self.description,
+            event_date=timezone.now() + timedelta(days=3), tags="Work, travel",
+        )
+
+    def feed(self, token):
+        return self.client.get(f"/tasks/events/feed/{token}.ics")
+
+    def test_lines_are_folded_at_75_octets(self):
+        response = self.feed(ical.feed_token(self.user))
+        self.assertEqual(response.status_code, 200)
+        body = b"".join(response.streaming_content)
+        lines = body.split(b"\r\n")
+        self.assertGreater(len(lines), 10)
+        self.assertLessEqual(max(len(line) for line in lines), 75)
+        for line in lines:
+            line.decode()  # folds never split a UTF-8 sequence
+        unfolded = body.replace(b"\r\n ", b"").decode()
+        self.assertIn("DESCRIPTION:" + ical._escape(self.description) + "\r\n", unfolded)
+        self.assertIn("CATEGORIES:Work,travel\r\n", unfolded)
+
+        for text in ("x" * 200, "é" * 100, "a" + "€" * 60):
+            folded = ical._line("DESCRIPTION", text).encode()
+            self.assertTrue(all(len(part) <= 75 for part in folded.split(b"\r\n")))
+            self.assertEqual(folded.replace(b"\r\n ", b"").decode(), f"DESCRIPTION:{text}\r\n")
+
+    def test_bad_tokens_are_rejected(self):
+        token = ical.feed_token(self.user, self.team)
+        self.assertEqual(self.feed(token).status_code, 200)
+        for bad in ("garbage", token[:-1] + ("A" if token[-1] != "A" else "B"),
+                    signing.dumps({"u": self.user.pk}, salt="other")):
+            with self.subTest(token=bad):
+                self.assertEqual(self.feed(bad).status_code, 404)
+
+        self.user.groups.remove(self.team)
+        self.assertEqual(self.feed(token).status_code, 404)
+        personal = ical.feed_token(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.feed(personal).status_code, 404)
+
+    def test_chunks_resume_after_tied_dates(self):
+        same = timezone.now() + timedelta(days=1)
+        Event.objects.bulk_create(Event(user=self.user, title=f"e{i}", event_date=same) for i in range(7))
+        events = ical.feed_events(self.user)
+        with mock.patch.object(ical, "CHUNK_SIZE", 3):
+            self.assertEqual([row[0] for row in ical._rows(events)], list(events.values_list("pk", flat=True)))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("exporter", password="pw")
+        self.client.force_login(self.user)
+        self.due = timezone.make_aware(datetime(2026, 5, 1, 12, 30))
+        self.task = Task.objects.create(user=self.user, title='Say "hi", then go', due_date=self.due,
+                                        notes="line one\nline two", tags="work")
+        self.habit = Habit.objects.create(user=self.user, name="Run", frequency="Weekly", streak=3)
+        self.note = Note.objects.create(user=self.user, title="Idées", content="crème")
+        Task.objects.create(user=User.objects.create_user("someone"), title="not mine")
+
+    def export(self, **params):
+        response = self.client.get("/tasks/api/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_has_one_typed_record_per_object(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([(r["type"], r["id"]) for r in records],
+                         [("task", self.task.pk), ("habit", self.habit.pk), ("note", self.note.pk)])
+        task = records[0]
+        self.assertEqual(list(task), ["type", *export.KINDS["task"][1]])
+        self.assertEqual((task["title"], task["notes"], task["due_date"]),
+                         (self.task.title, self.task.notes, "2026-05-01T12:30:00Z"))
+        self.assertEqual((records[1]["streak"], records[1]["last_done"]), (3, None))
+        self.assertEqual(records[2]["title"], "Idées")
+
+    def test_csv_uses_the_union_of_columns(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(fmt="csv", type="tasks,notes"))))
+        self.assertEqual([(r["type"], int(r["id"])) for r in rows],
+                         [("task", self.task.pk), ("note", self.note.pk)])
+        self.assertEqual(list(rows[0]), export.csv_columns(["task", "note"]))
+        self.assertEqual((rows[0]["title"], rows[0]["notes"], rows[0]["content"]),
+                         (self.task.title, self.task.notes, ""))
+        self.assertEqual((rows[1]["content"], rows[1]["due_date"]), ("crème", ""))
+
+    def test_blocks_split_only_between_records(self):
+        Note.objects.bulk_create(Note(user=self.user, title=f"n{i}", content="x" * 50) for i in range(40))
+        with mock.patch.object(export, "WRITE_SIZE", 256):
+            blocks = list(export.stream(self.user, "ndjson", ["note"]))
+            csv_blocks = list(export.stream(self.user, "csv", ["note"]))
+        self.assertGreater(len(blocks), 5)
+        self.assertTrue(all(block.endswith("\n") for block in blocks if block))
+        self.assertEqual(len("".join(blocks).splitlines()), 41)
+        self.assertEqual(len(list(csv.reader(io.StringIO("".join(csv_blocks))))), 42)
+
+    def test_reads_rows_in_chunks(self):
+        Note.objects.bulk_create(Note(user=self.user, title=f"n{i}", content="") for i in range(7))
+        with mock.patch.object(export, "CHUNK_SIZE", 3), self.assertNumQueries(3):
+            ids = [row[0] for row in export._rows(self.user, "note")]
+        self.assertEqual(ids, list(Note.objects.filter(user=self.user).order_by("id").values_list("id", flat=True)))
+
+    def test_rejects_unknown_formats_and_types(self):
+        self.assertEqual(self.client.get("/tasks/api/export/", {"fmt": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get("/tasks/api/export/", {"type": "goals"}).status_code, 400)
+
+
+class ImportHabitTests(TestCase):
+    def setUp(self):
+        self.source = User.objects.create_user("source", password="pw")
+        self.target = User.objects.create_user("target", password="pw")
+        Habit.objects.create(
+            user=self.source, name="Read", frequency="Weekly", streak=4, tags="Books, calm",
+            last_done=timezone.make_aware(datetime(2026, 10, 1, 21)),
+        )
+
+    def round_trip(self, fmt):
+        text = "".join(export.stream(self.source, fmt, ["habit"]))
+        stats = importer.Importer(self.target).run(importer.read_records(io.StringIO(text), fmt))
+        self.assertEqual((stats.created["habit"], stats.error_count), (1, 0))
+        return Habit.objects.get(user=self.target)
+
+    def test_tags_and_streak_survive_export_and_import(self):
+        for fmt in export.FORMATS:
+            with self.subTest(fmt=fmt):
+                habit = self.round_trip(fmt)
+                self.assertEqual((habit.tags, habit.streak), ("Books, calm", 4))
+                self.assertEqual(sorted(habit.normalized_tags.values_list("name", flat=True)),
+                                 ["books", "calm"])
+                self.assertEqual(habit.completions.count(), 4)
+                call_command("recompute_streaks", habit=[habit.pk], stdout=io.StringIO())
+                habit.refresh_from_db()
+                self.assertEqual((habit.streak, habit.last_done),
+                                 (4, timezone.make_aware(datetime(2026, 10, 1, 21))))
+                habit.delete()
+
+    def test_extra_fields_are_validated(self):
+        stats = importer.Importer(self.target).run([
+            {"type": "habit", "name": "Bad", "streak": "many"},
+            {"type": "habit", "name": "Long", "tags": "x" * 101},
+            {"type": "habit", "name": "Undated", "streak": 9},
+        ])
+        self.assertEqual(stats.error_count, 2)
+        self.assertEqual([list(errors) for _, errors in stats.errors], [["streak"], ["tags"]])
+        self.assertEqual(Habit.objects.get(user=self.target).streak, 0)
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("dash", password="pw")
+        self.now = timezone.now()
+
+    def test_key_is_version_only_and_the_entry_is_short_lived(self):
+        with mock.patch.object(caching.cache, "set", wraps=caching.cache.set) as cache_set:
+            first = dashboard.summary(self.user, self.now)
+        self.assertEqual(cache_set.call_args.kwargs["timeout"], dashboard.CACHE_TTL)
+
+        # The next minute reuses the entry instead of filling the cache with a new key.
+        with self.assertNumQueries(0):
+            later = dashboard.summary(self.user, self.now + timedelta(minutes=2))
+        self.assertEqual(later["generated_at"], first["generated_at"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.user, title="late", due_date=self.now - timedelta(hours=1))
+        fresh = dashboard.summary(self.user, self.now + timedelta(minutes=2))
+        self.assertNotEqual(fresh["generated_at"], first["generated_at"])
+        self.assertEqual(fresh["tasks"]["overdue"], 1)
+
+
+class AsgiServingTests(TransactionTestCase):
+    """Offloaded views and streams under the ASGI handler; the ORM pool's
+    threads open their own connections, so the data must be committed."""
+
+    databases = "__all__"
+
+    def setUp(self):
+        self.user = User.objects.create_user("asgi", password="pw")
+        Task.objects.create(user=self.user, title="offloaded")
+        Note.objects.bulk_create(Note(user=self.user, title=f"n{i}", content="x" * 50) for i in range(40))
+
+    def recording(self, func, threads):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return func(*args, **kwargs)
+        return wrapper
+
+    async def test_offloaded_view_answers_from_the_pool(self):
+        threads = []
+        view = self.recording(TaskListCreateAPI.as_view(), threads)
+        urlconf = ModuleType("asgi_urls")
+        urlconf.urlpatterns = [path("api/tasks/", aio.offload(view))]
+        await sync_to_async(self.async_client.force_login)(self.user)
+        with override_settings(ROOT_URLCONF=urlconf):
+            response = await self.async_client.get("/api/tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task["title"] for task in response.json()["results"]], ["offloaded"])
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("orm"))
+        with override_settings(ASYNC_VIEWS=True):
+            self.assertTrue(iscoroutinefunction(aio.serve(view)))
+        self.assertIs(aio.serve(view), view)
+
+    async def test_export_streams_blocks_from_the_pool(self):
+        threads = []
+        await sync_to_async(self.async_client.force_login)(self.user)
+        with override_settings(ASYNC_VIEWS=True), mock.patch.object(export, "WRITE_SIZE", 256), \
+                mock.patch.object(export, "_rows", self.recording(export._rows, threads)):
+            response = await self.async_client.get("/tasks/api/export/", {"type": "notes"})
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_async)
+            blocks = [block async for block in response.streaming_content]
+        self.assertGreater(len(blocks), 5)
+        self.assertEqual(len(b"".join(blocks).splitlines()), 40)
+        self.assertTrue(threads and all(name.startswith("orm") for name in threads))
+
+
+class MembershipMemoTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("member", password="pw")
+        self.team = Group.objects.create(name="team")
+
+    def test_memberships_are_loaded_once_per_user_instance(self):
+        names = membership.group_names(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(membership.group_names(self.user), names)
+            self.assertEqual(len(membership.group_ids(self.user)), len(names))
+
+    def test_groups_add_and_remove_drop_the_memo(self):
+        self.assertNotIn("team", membership.group_names(self.user))
+        self.user.groups.add(self.team)
+        self.assertIn("team", membership.group_names(self.user))
+        self.assertIn(self.team.pk, membership.group_ids(self.user))
+        self.user.groups.remove(self.team)
+        self.assertFalse(membership.in_any_group(self.user, ["team"]))
+        self.user.groups.set([self.team])
+        self.assertTrue(membership.in_any_group(self.user, ["team"]))
+        self.user.groups.clear()
+        self.assertEqual(membership.group_ids(self.user), [])
+
+
+class VisibleListTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user("viewer", password="pw")
+        owner = User.objects.create_user("owner", password="pw")
+        group = Group.objects.create(name="team")
+        self.viewer.groups.add(group)
+        Task.objects.bulk_create(Task(user=self.viewer, title=f"own-{i}") for i in range(7))
+        shared = Task.objects.bulk_create(Task(user=owner, title=f"shared-{i}") for i in range(9))
+        Task.objects.bulk_create(Task(user=owner, title=f"hidden-{i}") for i in range(5))
+        Task.groups.through.objects.bulk_create(
+            Task.groups.through(task_id=task.pk, group_id=group.pk) for task in shared
+        )
+        # The viewer's own task shared with their group is listed once.
+        Task.objects.get(title="own-0").groups.add(group)
+
+    def test_pages_match_the_visibility_query(self):
+        expected = list(visible_to(Task, self.viewer))
+        self.assertEqual(len(expected), 16)
+        paginator = Paginator(VisibleList(Task, self.viewer), 5)
+        self.assertEqual(paginator.count, 16)
+        pages = [list(paginator.page(n)) for n in paginator.page_range]
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+
+@override_settings(METRICS_ENABLED=True)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("metrics", password="pw")
+        Task.objects.bulk_create(Task(user=self.user, title=f"t{i}") for i in range(3))
+
+    def observed(self, observe):
+        self.assertEqual(observe.call_count, 1)
+        view, method, status, seconds, queries, sql_seconds, duplicates = observe.call_args.args
+        return view, status, queries
+
+    def test_counts_queries_run_while_streaming(self):
+        self.client.force_login(self.user)
+        with mock.patch("tasks.metrics.observe") as observe:
+            response = self.client.get("/tasks/api/export/")
+            self.assertTrue(response.streaming)
+            observe.assert_not_called()  # recorded once the body has been sent
+            body = b"".join(response.streaming_content)
+            response.close()
+        self.assertEqual(body.count(b"\n"), 3)
+        view, status, queries = self.observed(observe)
+        self.assertEqual((view, status), ("tasks:api_export", 200))
+        self.assertGreaterEqual(queries, 5)  # session, user, one per exported kind
+
+    async def test_counts_queries_of_plain_sync_views_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        with mock.patch("tasks.metrics.observe") as observe:
+            response = await self.async_client.get("/tasks/api/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        view, status, queries = self.observed(observe)
+        self.assertEqual(view, "tasks:api_dashboard")
+        self.assertGreater(queries, 0)
+
+
+class MetricsFlushTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(METRICS_DIR=directory.name, METRICS_FLUSH_INTERVAL=60)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        state = mock.patch.multiple(metrics, _state=metrics._empty(), _last_flush=0.0)
+        state.start()
+        self.addCleanup(state.stop)
+        self.directory = directory.name
+
+    def run_threads(self, target, count=8):
+        start, errors = threading.Barrier(count), []
+
+        def run():
+            start.wait()
+            try:
+                target()
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_one_write_per_interval_across_threads(self):
+        with mock.patch.object(metrics.os, "replace", wraps=metrics.os.replace) as replace:
+            self.run_threads(lambda: metrics.observe("v", "GET", 200, 0.01, 1, 0.001, 0))
+        self.assertEqual(replace.call_count, 1)
+
+    def test_forced_flushes_never_share_the_tmp_file(self):
+        self.run_threads(lambda: [metrics.maybe_flush(force=True) for _ in range(25)])
+        self.assertEqual(os.listdir(self.directory), [f"{os.getpid()}.json"])
+
+
+class WarmupTests(TestCase):
+    def setUp(self):
+        self.attempts = 0
+        state = mock.patch.multiple(warmup, _state=None, timings={}, RETRY_DELAY=0.01)
+        state.start()
+        self.addCleanup(state.stop)
+
+    def flaky(self, failures):
+        def step():
+            self.attempts += 1
+            if self.attempts <= failures:
+                raise ConnectionError("database is starting up")
+        return mock.patch.object(warmup, "STEPS", (("database", step),))
+
+    def wait_ready(self):
+        for _ in range(200):
+            if warmup.is_ready():
+                return
+            time.sleep(0.01)
+        self.fail(f"warm-up still {warmup.status()['state']}")
+
+    def test_background_retries_until_ready(self):
+        with self.flaky(failures=2), self.assertLogs("tasks", level="ERROR"):
+            warmup.on_load("background")
+            self.wait_ready()
+        self.assertEqual(self.attempts, 3)
+
+    def test_failed_preload_starts_the_server_and_warms_workers(self):
+        with self.flaky(failures=1), self.assertLogs("tasks", level="ERROR"):
+            warmup.on_load("preload")  # must not raise in the gunicorn master
+            self.assertEqual(warmup.status()["state"], "failed")
+            warmup.post_fork()
+            self.wait_ready()
+        self.assertEqual(self.attempts, 2)
+
+    def test_post_fork_leaves_no_connection_on_the_main_thread_under_asgi(self):
+        warmup._state = "ready"
+        for async_views in (False, True):
+            with self.subTest(async_views=async_views), override_settings(ASYNC_VIEWS=async_views), \
+                    mock.patch.object(warmup, "connect") as connect, \
+                    mock.patch.object(warmup.connections, "close_all") as close_all, \
+                    mock.patch.object(pooling, "prefill_all") as prefill_all:
+                warmup.post_fork()
+            connect.assert_called_once_with()
+            prefill_all.assert_called_once_with()
+            self.assertEqual(close_all.called, async_views)
+
+
+REPLICA = "replica_standalone"
+
+
+@override_settings(TASKS_CACHE_ENABLED=False)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    tasks.routing against two separate SQLite databases, so that every read
+    shows which one it reached: rows are written to the replica directly to
+    stand in for replication. Not a TestCase: the router keeps every read on
+    the primary while a transaction is open there.
+    """
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        replica = mock.patch.object(routing, "REPLICA", REPLICA)
+        replica.start()
+        self.addCleanup(replica.stop)
+        cache.clear()
+        self.user = User.objects.create_user("router", password="pw")
+        self.token = Token.objects.create(user=self.user)
+        # Authentication reads go to the replica too. bulk_create sends no
+        # post_save, which would create a second Profile on the primary.
+        User.objects.using(REPLICA).bulk_create(
+            [User(pk=self.user.pk, username=self.user.username, password=self.user.password)]
+        )
+        Token.objects.using(REPLICA).bulk_create([Token(key=self.token.key, user=self.user)])
+
+    def replicate(self, *titles):
+        Task.objects.using(REPLICA).bulk_create(Task(user=self.user, title=t) for t in titles)
+
+    @staticmethod
+    def fresh(func):
+        """Run ``func`` as a new request would, with no routing state."""
+        return contextvars.Context().run(func)
+
+    def titles(self):
+        return sorted(Task.objects.values_list("title", flat=True))
+
+    def test_reads_go_to_the_replica(self):
+        self.fresh(lambda: Task.objects.create(user=self.user, title="on primary"))
+        self.replicate("on replica")
+        self.assertEqual(self.fresh(self.titles), ["on replica"])
+
+    def test_writes_go_to_the_primary(self):
+        self.fresh(lambda: Task.objects.create(user=self.user, title="new"))
+        self.assertTrue(Task.objects.using("default").filter(title="new").exists())
+        self.assertFalse(Task.objects.using(REPLICA).filter(title="new").exists())
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        def write_then_read():
+            Task.objects.create(user=self.user, title="mine")
+            return self.titles()
+        self.assertEqual(self.fresh(write_then_read), ["mine"])
+
+    def test_use_primary_pins_reads(self):
+        Task.objects.using("default").create(user=self.user, title="on primary")
+
+        def pinned():
+            with routing.use_primary():
+                return self.titles()
+        self.assertEqual(self.fresh(pinned), ["on primary"])
+        self.assertEqual(self.fresh(self.titles), [])
+
+    def list_titles(self, client, **extra):
+        response = client.get("/tasks/api/tasks/", HTTP_AUTHORIZATION=f"Token {self.token.key}", **extra)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return sorted(t["title"] for t in (data["results"] if isinstance(data, dict) else data))
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        response = self.client.post(
+            "/tasks/api/tasks/", {"title": "just written"}, content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {self.token.key}",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(routing.COOKIE, response.cookies)
+
+        # Within the window: the cookie, or the cache entry for the token.
+        self.assertEqual(self.list_titles(self.client), ["just written"])
+        self.assertEqual(self.list_titles(self.client_class()), ["just written"])
+
+        # After the window: back to the (lagging) replica.
+        cache.clear()
+        self.client.cookies[routing.COOKIE] = f"{time.time() - 1:.3f}"
+        self.assertEqual(self.list_titles(self.client), [])
+
+    def test_malformed_cookie_is_ignored_and_dropped(self):
+        for value in ("abc", "1e999999", "inf", "nan"):
+            with self.subTest(value=value):
+                self.client.cookies[routing.COOKIE] = value
+                response = self.client.get(
+                    "/tasks/api/tasks/", HTTP_AUTHORIZATION=f"Token {self.token.key}"
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.cookies[routing.COOKIE].value, "")
+                self.assertEqual(response.cookies[routing.COOKIE]["max-age"], 0)
+
+    async def test_malformed_cookie_under_asgi(self):
+        self.async_client.cookies[routing.COOKIE] = "abc"
+        response = await self.async_client.get("/health/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[routing.COOKIE]["max-age"], 0)
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if self.connection.broken:
+            raise ConnectionError("server closed the connection unexpectedly")
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+        self.now = 1000.0
+        clock = mock.patch.object(pooling, "time", SimpleNamespace(monotonic=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def connect(self):
+        self.opened.append(FakeConnection())
+        return self.opened[-1]
+
+    def pool(self, **options):
+        return pooling.ConnectionPool(self.connect, **{**pooling.DEFAULTS, **options})
+
+    def test_times_out_when_exhausted(self):
+        pool = self.pool(MAX_SIZE=1, TIMEOUT=0)
+        pool.getconn()
+        with self.assertRaises(pooling.PoolTimeout):
+            pool.getconn()
+        snapshot = pool.snapshot()
+        self.assertEqual((snapshot["timeouts"], snapshot["size"], snapshot["created"]), (1, 1, 1))
+
+    def test_a_waiting_checkout_gets_the_returned_connection(self):
+        pool = self.pool(MAX_SIZE=1, TIMEOUT=5)
+        first = pool.getconn()
+        real_wait = pool._cond.wait
+
+        def wait(timeout):
+            self.now += 0.5
+            threading.Timer(0.01, pool.putconn, [first]).start()
+            return real_wait(timeout)
+
+        with mock.patch.object(pool._cond, "wait", side_effect=wait):
+            self.assertIs(pool.getconn(), first)
+        snapshot = pool.snapshot()
+        self.assertEqual((snapshot["waits"], snapshot["checkouts"], snapshot["created"]), (1, 2, 1))
+        self.assertEqual(snapshot["wait_seconds"], 0.5)
+
+    def test_replaces_connections_past_their_lifetime(self):
+        pool = self.pool(MAX_LIFETIME=60, CHECK_AFTER=600)
+        first = pool.getconn()
+        pool.putconn(first)
+        self.now += 30
+        self.assertIs(pool.getconn(), first)
+        pool.putconn(first)
+        self.now += 31
+        second = pool.getconn()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual((pool.stats.created, pool.stats.closed, pool.snapshot()["size"]), (2, 1, 1))
+
+    def test_checks_idle_connections_on_checkout(self):
+        pool = self.pool(CHECK_AFTER=30)
+        first = pool.getconn()
+        pool.putconn(first)
+        self.now += 31
+        self.assertIs(pool.getconn(), first)  # answers SELECT 1
+        pool.putconn(first)
+        first.broken = True
+        self.now += 10
+        self.assertIs(pool.getconn(), first)  # not idle long enough to be checked
+        pool.putconn(first)
+        self.now += 31
+        second = pool.getconn()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual((pool.stats.check_failures, pool.snapshot()["size"]), (1, 1))
+
+    def test_rolls_back_on_checkin(self):
+        pool = self.pool()
+        first = pool.getconn()
+        first.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        pool.putconn(first)
+        self.assertEqual(first.rollbacks, 1)
+        self.assertIs(pool.getconn(), first)
+
+        first.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        with mock.patch.object(first, "rollback", side_effect=ConnectionError):
+            pool.putconn(first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.snapshot()["size"], 0)
+
+    def test_child_leaves_the_parents_connections_open(self):
+        inherited = []
+        with mock.patch.multiple(pooling, _pools={}, _inherited=inherited, _pools_lock=threading.Lock()):
+            pool = pooling.get_pool("default", self.connect, {})
+            idle, checked_out = pool.getconn(), pool.getconn()
+            pool.putconn(idle)
+            with mock.patch.object(pooling.os, "getpid", return_value=pool.pid + 1):
+                pooling._after_fork()
+                self.assertEqual(pooling._pools, {})
+                # A request that was running in the parent at fork time
+                # closes its connection in the child.
+                pool.putconn(checked_out)
+            self.assertEqual(inherited, [idle, checked_out])
+            self.assertFalse(idle.closed or checked_out.closed)
+            self.assertIsNot(pooling.get_pool("default", self.connect, {}), pool)
+
+
+class PoolSizeCheckTests(TestCase):
+    def databases_with_pool(self, max_size):
+        return {"default": {"ENGINE": checks.POOL_ENGINE, "POOL": {"MAX_SIZE": max_size}}}
+
+    def test_warns_when_the_pool_is_smaller_than_the_orm_threads(self):
+        with mock.patch.object(checks, "settings", mock.Mock(
+            ASYNC_VIEWS=True, ASYNC_DB_THREADS=16, DATABASES=self.databases_with_pool(10),
+        )):
+            self.assertEqual([w.id for w in checks.pool_covers_async_threads()], ["tasks.W001"])
+
+    def test_quiet_when_the_pool_is_large_enough_or_under_wsgi(self):
+        for async_views, max_size in ((True, 20), (False, 4)):
+            with self.subTest(async_views=async_views), mock.patch.object(checks, "settings", mock.Mock(
+                ASYNC_VIEWS=async_views, ASYNC_DB_THREADS=16, DATABASES=self.databases_with_pool(max_size),
+            )):
+                self.assertEqual(checks.pool_covers_async_threads(), [])
@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from .aio import serve
 from django.views.generic import TemplateView
 from .views import root_redirect
 from .views import SignUpView
@@ -31,21 +32,39 @@ urlpatterns = [
     path('events/new/', views.event_create, name='event_create'),
     path('tasks/<int:pk>/delete/', views.task_delete, name='task_delete'),
     path('habits/<int:pk>/delete/', views.habit_delete, name='habit_delete'),
+    path('habits/<int:pk>/done/', views.habit_done, name='habit_done'),
     path('notes/<int:pk>/delete/', views.note_delete, name='note_delete'),
     path('events/<int:pk>/delete/', views.event_delete, name='event_delete'),
+    path('events/feed/<str:token>.ics', views.event_feed, name='event_feed'),
     
     # API endpoints
-    path('api/tasks/', TaskListCreateAPI.as_view(), name='api_task_list'),
-    path('api/tasks/<int:pk>/', TaskDetailAPI.as_view(), name='api_task_detail'),
+    path('api/tasks/', serve(TaskListCreateAPI.as_view()), name='api_task_list'),
+    path('api/tasks/<int:pk>/', serve(TaskDetailAPI.as_view()), name='api_task_detail'),
+    path('api/tasks/bulk/', views.TaskBulkAPI.as_view(), name='api_task_bulk'),
+    path('api/tasks/due/', views.DueAPI.as_view(), name='api_task_due'),
+    path('api/tasks/<int:pk>/recurrence/', views.TaskRecurrenceAPI.as_view(), name='api_task_recurrence'),
+    path('api/tasks/<int:pk>/occurrences/<str:due>/complete/', views.TaskOccurrenceCompleteAPI.as_view(),
+         name='api_task_occurrence_complete'),
 
-    path('api/habits/', HabitListCreateAPI.as_view(), name='api_habit_list'),
-    path('api/habits/<int:pk>/', HabitDetailAPI.as_view(), name='api_habit_detail'),
+    path('api/habits/', serve(HabitListCreateAPI.as_view()), name='api_habit_list'),
+    path('api/habits/<int:pk>/', serve(HabitDetailAPI.as_view()), name='api_habit_detail'),
+    path('api/habits/bulk/', views.HabitBulkAPI.as_view(), name='api_habit_bulk'),
+    path('api/habits/<int:pk>/complete/', views.HabitCompleteAPI.as_view(), name='api_habit_complete'),
 
-    path('api/notes/', NoteListCreateAPI.as_view(), name='api_note_list'),
-    path('api/notes/<int:pk>/', NoteDetailAPI.as_view(), name='api_note_detail'),
+    path('api/notes/', serve(NoteListCreateAPI.as_view()), name='api_note_list'),
+    path('api/notes/<int:pk>/', serve(NoteDetailAPI.as_view()), name='api_note_detail'),
+    path('api/notes/bulk/', views.NoteBulkAPI.as_view(), name='api_note_bulk'),
 
-    path('api/events/', EventListCreateAPI.as_view(), name='api_event_list'),
-    path('api/events/<int:pk>/', EventDetailAPI.as_view(), name='api_event_detail'),
+    path('api/events/', serve(EventListCreateAPI.as_view()), name='api_event_list'),
+    path('api/events/<int:pk>/', serve(EventDetailAPI.as_view()), name='api_event_detail'),
+    path('api/events/bulk/', views.EventBulkAPI.as_view(), name='api_event_bulk'),
+
+    path('api/dashboard/', views.dashboard_summary, name='api_dashboard'),
+    path('api/search/', views.SearchAPI.as_view(), name='api_search'),
+    path('api/sync/', views.SyncAPI.as_view(), name='api_sync'),
+    path('api/calendar/', views.calendar_feeds, name='api_calendar_feeds'),
+    path('api/export/', views.export_items, name='api_export'),
+    path('api/cache-stats/', views.cache_stats, name='api_cache_stats'),
     
     #User registration
     path("register/", SignUpView.as_view(), name="register"),
@@ -55,6 +74,8 @@ urlpatterns = [
     path('api/', views.api_root, name='api_root'),
 
     #schedule reminder
-    path("schedule/", schedule_reminder_view, name="schedule-reminder"),
+    path("schedule/", serve(schedule_reminder_view), name="schedule-reminder"),
+    path("schedule/due/", serve(views.schedule_due_reminders), name="schedule-due-reminders"),
+    path("schedule/status/<int:pk>/", serve(views.reminder_status), name="reminder-status"),
 
 ]
@@ -1,5 +1,5 @@
 # Standard library
-from datetime import datetime, timezone
+from datetime import datetime, timedelta
 
 # Django
 from django.contrib import messages
@@ -7,22 +7,38 @@ from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User, Group
-from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.generic import CreateView
 
 # Django REST Framework
 from rest_framework import permissions, generics, pagination
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 
 # Local
-from .models import Task, Habit, Note, Event
+from .models import Task, Habit, Note, Event, RecurrenceRule, ReminderRequest, TaskOccurrence
 from .forms import TaskForm, HabitForm, NoteForm, EventForm, SignUpForm
-from .serializers import TaskSerializer, HabitSerializer, NoteSerializer, EventSerializer
-from .services.scheduler_api import schedule_task, SchedulerError
+from .serializers import (
+    TaskSerializer, HabitSerializer, NoteSerializer, EventSerializer, SearchHitSerializer,
+    RecurrenceRuleSerializer, DueItemSerializer,
+)
+from . import aio, bulk, caching, dashboard, export, ical, recurrence, reminders, search, streaks, sync, tagging
+from .conditional import ConditionalDetailMixin, ConditionalListMixin, aggregate_validators
+from .membership import group_ids, in_any_group
+from .visibility import LIST_ORDERING, VisibleList
 
 
 def schedule_reminder_view(request):
@@ -37,32 +53,53 @@ def schedule_reminder_view(request):
             if not all([task_id, due_local, owner_id, user_email]):
                 raise ValueError("All fields are required.")
 
-            # Parse naive local time -> make aware in current TZ -> convert to UTC
+            # Parse naive local time -> make aware in current TZ
             local_dt = datetime.fromisoformat(due_local)  # naive
-            aware_local = timezone.make_aware(local_dt, timezone.get_current_timezone())
-            due_utc = aware_local.astimezone(timezone.utc)
+            due_at = timezone.make_aware(local_dt, timezone.get_current_timezone())
 
             # Must be in the future
-            if due_utc <= timezone.now():
+            if due_at <= timezone.now():
                 raise ValueError("Due time must be in the future.")
 
-            # ISO8601 with trailing Z (Scheduler-friendly)
-            due_iso = due_utc.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+            # Queued; manage.py dispatch_reminders sends it to the orchestrator API
+            requester = request.user if request.user.is_authenticated else None
+            reminders.enqueue(task_id, due_at, owner_id, user_email, requested_by=requester)
 
-            # Call orchestrator API
-            schedule_task(task_id, due_iso, owner_id, user_email)
+            messages.success(request, "✅ Reminder queued.")
+            return redirect("tasks:schedule-reminder")
 
-            messages.success(request, "✅ Reminder scheduled.")
-            return redirect("schedule-reminder")
-
-        except SchedulerError as e:
-            messages.error(request, f"Schedule failed: {e}")
         except ValueError as e:
             messages.error(request, f"Invalid input: {e}")
         except Exception as e:
             messages.error(request, f"Error: {e}")
 
-    return render(request, "tasks/schedule_reminder.html")
+    recent = []
+    if request.user.is_authenticated:
+        recent = ReminderRequest.objects.filter(requested_by=request.user).order_by('-created')[:10]
+    return render(request, "tasks/schedule_reminder.html", {"reminders": recent})
+
+@login_required
+def schedule_due_reminders(request):
+    if request.method == "POST":
+        count = reminders.enqueue_due_tasks(request.user)
+        if count:
+            messages.success(request, f"✅ {count} reminder(s) queued.")
+        elif not request.user.email:
+            messages.error(request, "Add an email address to your account to receive reminders.")
+        else:
+            messages.success(request, "All due tasks already have reminders.")
+    return redirect("tasks:schedule-reminder")
+
+@login_required
+def reminder_status(request, pk):
+    reminder = get_object_or_404(ReminderRequest, pk=pk, requested_by=request.user)
+    return JsonResponse({
+        "id": reminder.pk,
+        "task_id": reminder.task_id,
+        "status": reminder.status,
+        "attempts": reminder.attempts,
+        "last_error": reminder.last_error,
+    })
 
 
 class SignUpView(CreateView):
@@ -77,13 +114,13 @@ def root_redirect(request):
 
 def in_group(group_name, login_url='tasks:no-access'):
     return user_passes_test(
-        lambda u: u.is_authenticated and u.groups.filter(name=group_name).exists(),
+        lambda u: u.is_authenticated and in_any_group(u, [group_name]),
         login_url=login_url
     )
 
 def in_groups(group_names, login_url='tasks:no-access'):
     return user_passes_test(
-        lambda u: u.is_authenticated and u.groups.filter(name__in=group_names).exists(),
+        lambda u: u.is_authenticated and in_any_group(u, group_names),
         login_url=login_url
     )
 
@@ -93,6 +130,163 @@ class StandardResultsSetPagination(pagination.PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+class KeysetResultsSetPagination(pagination.CursorPagination):
+    """
+    Constant-cost pages walked over the (user, created) index; no COUNT(*).
+
+    DRF positions a cursor on the first ordering field alone and steps over
+    equal values with an OFFSET, which drops rows when a client walks back
+    over tasks created in the same instant. Every list ordering here ends in
+    the unique ``id``, so the cursor carries all ordering values and each
+    page is a plain keyset seek.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = LIST_ORDERING
+    separator = '|'
+
+    def get_ordering(self, request, queryset, view):
+        # Follow the queryset when a filter re-sorted it (calendar ranges).
+        return tuple(queryset.query.order_by) or self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        ordering = pagination._reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        try:
+            if current_position is not None:
+                queryset = queryset.filter(self.after(ordering, current_position))
+            results = list(queryset[offset:offset + self.page_size + 1])
+        except (DjangoValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            following_position = None
+        has_current = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = has_current, following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next, self.has_previous = following_position is not None, has_current
+            self.next_position, self.previous_position = following_position, current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, ordering, position):
+        """Rows strictly after ``position`` in ``ordering`` (a row comparison)."""
+        values = position.split(self.separator)
+        if len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        for depth, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = f"{name}__{'lt' if field.startswith('-') else 'gt'}"
+            equal = {f.lstrip('-'): v for f, v in zip(ordering[:depth], values)}
+            condition |= Q(**equal, **{lookup: values[depth]})
+        return condition
+
+    def _get_position_from_instance(self, instance, ordering):
+        return self.separator.join(
+            super(KeysetResultsSetPagination, self)._get_position_from_instance(instance, (field,))
+            for field in ordering
+        )
+
+class SelectableResultsSetPagination(pagination.BasePagination):
+    """
+    Page-number pagination by default so existing clients keep working.
+    Clients opt into keyset pagination with ``?pagination=cursor`` on the
+    first request and then follow the returned ``next``/``previous`` links,
+    which carry ``?cursor=``.
+    """
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.delegate = StandardResultsSetPagination()
+
+    def wants_cursor(self, request):
+        params = request.query_params
+        return (params.get(self.mode_query_param) == 'cursor'
+                or KeysetResultsSetPagination.cursor_query_param in params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_cursor(request):
+            self.delegate = KeysetResultsSetPagination()
+        return self.delegate.paginate_queryset(queryset, request, view=view)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, 'display_page_controls', False)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.delegate.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.delegate.to_html()
+
+    def get_results(self, data):
+        return data['results']
+
+    def get_schema_operation_parameters(self, view):
+        return self.delegate.get_schema_operation_parameters(view) + [{
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': "Set to 'cursor' to use keyset pagination.",
+            'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+        }]
+
+# --- API FILTERS ---
+def parse_instant(value, name):
+    """ISO date or datetime query parameter -> aware datetime (ValueError if bad)."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid {name}: {value!r}.")
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+def filter_by_date_range(queryset, request, field):
+    """
+    Apply ``?start=`` / ``?end=`` as a half-open range on ``field``; a
+    ranged list is ordered by that field so it walks the (user, field) index.
+    """
+    bounds = {}
+    for name, lookup in (('start', 'gte'), ('end', 'lt')):
+        value = request.query_params.get(name)
+        if value:
+            try:
+                bounds[f'{field}__{lookup}'] = parse_instant(value, name)
+            except ValueError as exc:
+                raise ValidationError({name: [str(exc)]})
+    if not bounds:
+        return queryset
+    return queryset.filter(**bounds).order_by(field, 'id')
+
+def filter_by_tag(queryset, request):
+    """Apply ``?tag=<name>`` through the indexed normalized_tags relation."""
+    tag = tagging.normalize(request.query_params.get('tag'))
+    if tag:
+        queryset = queryset.filter(normalized_tags__name=tag)
+    return queryset
+
 # --- API ROOT ---
 @api_view(['GET'])
 def api_root(request, format=None):
@@ -128,23 +322,79 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.user == request.user or request.user.is_superuser
+        # Compare ids so the owner row is never fetched just for this check.
+        return obj.user_id == request.user.pk or request.user.is_superuser
+
+# --- BULK API ---
+class BulkWriteAPI(generics.GenericAPIView):
+    """
+    POST a list of objects to create them, PATCH a list of partial objects
+    (each with ``id``) to update them, DELETE a list of ids to remove them.
+    Each item may carry ``groups`` (ids of the requester's groups). The
+    response lists one result per item, in request order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _items(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return None, Response({'detail': 'Expected a list.'}, status=400)
+        if len(items) > bulk.MAX_ITEMS:
+            return None, Response(
+                {'detail': f'At most {bulk.MAX_ITEMS} items per request.'}, status=400
+            )
+        return items, None
+
+    def post(self, request):
+        items, error = self._items(request)
+        if error:
+            return error
+        return Response({'results': bulk.create(self.serializer_class, request.user, items)})
+
+    def patch(self, request):
+        items, error = self._items(request)
+        if error:
+            return error
+        return Response({'results': bulk.update(self.serializer_class, request.user, items)})
+
+    def delete(self, request):
+        ids, error = self._items(request)
+        if error:
+            return error
+        model = self.serializer_class.Meta.model
+        return Response({'results': bulk.delete(model, request.user, ids)})
+
+class TaskBulkAPI(BulkWriteAPI):
+    serializer_class = TaskSerializer
+
+class HabitBulkAPI(BulkWriteAPI):
+    serializer_class = HabitSerializer
+
+class NoteBulkAPI(BulkWriteAPI):
+    serializer_class = NoteSerializer
+
+class EventBulkAPI(BulkWriteAPI):
+    serializer_class = EventSerializer
 
 # --- TASKS API ---
-class TaskListCreateAPI(generics.ListCreateAPIView):
+class TaskListCreateAPI(ConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = TaskSerializer
-    pagination_class = StandardResultsSetPagination
+    cache_namespace = 'api_task_list'
+    pagination_class = SelectableResultsSetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Task.objects.filter(user=self.request.user)
+            queryset = Task.objects.filter(user=self.request.user).order_by(*LIST_ORDERING)
+            return filter_by_tag(queryset, self.request)
         return Task.objects.none()
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # The TaskCreated outbox row must commit together with the task.
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
 
-class TaskDetailAPI(generics.RetrieveUpdateDestroyAPIView):
+class TaskDetailAPI(ConditionalDetailMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
@@ -153,21 +403,102 @@ class TaskDetailAPI(generics.RetrieveUpdateDestroyAPIView):
             return Task.objects.filter(user=self.request.user)
         return Task.objects.none()
 
+class TaskRecurrenceAPI(generics.RetrieveUpdateDestroyAPIView):
+    """
+    The repeat rule of one of your tasks. PUT creates or replaces it
+    (``start`` defaults to the current start, else the task's due date);
+    DELETE makes the task a one-off again.
+    """
+    serializer_class = RecurrenceRuleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_task(self):
+        return get_object_or_404(Task, pk=self.kwargs['pk'], user=self.request.user)
+
+    def get_object(self):
+        return get_object_or_404(RecurrenceRule, task=self.get_task())
+
+    def update(self, request, *args, **kwargs):
+        task = self.get_task()
+        rule = RecurrenceRule.objects.filter(task=task).first()
+        data = request.data.copy()
+        if not data.get('start'):
+            data['start'] = rule.start if rule else task.due_date
+        serializer = self.get_serializer(rule, data=data, partial=kwargs.get('partial', False))
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(task=task)
+        return Response(serializer.data, status=200 if rule else 201)
+
+class TaskOccurrenceCompleteAPI(APIView):
+    """
+    POST marks one occurrence of a recurring task done. ``due`` is the
+    occurrence's ISO datetime, as listed by ``api/tasks/due/``. The
+    occurrence then drops out of the due list, and its queued reminder is
+    withdrawn.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk, due):
+        task = get_object_or_404(Task, pk=pk, user=request.user)
+        rule = get_object_or_404(RecurrenceRule, task=task)
+        try:
+            when = parse_instant(due, 'due')
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=400)
+        if when not in recurrence.occurrences(rule, when, when + timedelta(seconds=1)):
+            return Response({'detail': 'Not an occurrence of this task.'}, status=404)
+        with transaction.atomic():
+            TaskOccurrence.objects.update_or_create(
+                task=task, due=when, defaults={'user_id': task.user_id, 'completed': True},
+            )
+            ReminderRequest.objects.filter(
+                task_id=str(task.pk), due_at=when, status=ReminderRequest.PENDING,
+            ).delete()
+            caching.bump_objects(Task, [task])
+        return Response({'task': task.pk, 'due': when, 'completed': True})
+
+class DueAPI(APIView):
+    """
+    Tasks due in ``[start, end)`` (ISO dates or datetimes; default: this
+    week), recurring ones expanded into their occurrences.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    MAX_WINDOW = timedelta(days=366)
+
+    def _bound(self, name, default):
+        value = self.request.query_params.get(name)
+        return parse_instant(value, name) if value else default
+
+    def get(self, request):
+        try:
+            start = self._bound('start', recurrence.start_of_week())
+            end = self._bound('end', start + timedelta(days=7))
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=400)
+        if not start < end <= start + self.MAX_WINDOW:
+            return Response({'detail': 'end must be after start, at most a year later.'}, status=400)
+        items = recurrence.due_between(request.user, start, end)
+        data = DueItemSerializer([{'due': due, 'task': task} for task, due in items], many=True).data
+        return Response({'start': start, 'end': end, 'results': data})
+
 # --- HABITS API ---
-class HabitListCreateAPI(generics.ListCreateAPIView):
+class HabitListCreateAPI(ConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = HabitSerializer
-    pagination_class = StandardResultsSetPagination
+    cache_namespace = 'api_habit_list'
+    pagination_class = SelectableResultsSetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Habit.objects.filter(user=self.request.user)
+            queryset = Habit.objects.filter(user=self.request.user).order_by(*LIST_ORDERING)
+            return filter_by_tag(queryset, self.request)
         return Habit.objects.none()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class HabitDetailAPI(generics.RetrieveUpdateDestroyAPIView):
+class HabitDetailAPI(ConditionalDetailMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = HabitSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
@@ -176,21 +507,35 @@ class HabitDetailAPI(generics.RetrieveUpdateDestroyAPIView):
             return Habit.objects.filter(user=self.request.user)
         return Habit.objects.none()
 
+class HabitCompleteAPI(generics.GenericAPIView):
+    """POST a check-in; the response is the habit with its updated streak."""
+    serializer_class = HabitSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Habit.objects.filter(user=self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        habit = streaks.check_in(self.get_object(), request.user)
+        return Response(self.get_serializer(habit).data)
+
 # --- NOTES API ---
-class NoteListCreateAPI(generics.ListCreateAPIView):
+class NoteListCreateAPI(ConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = NoteSerializer
-    pagination_class = StandardResultsSetPagination
+    cache_namespace = 'api_note_list'
+    pagination_class = SelectableResultsSetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Note.objects.filter(user=self.request.user)
+            queryset = Note.objects.filter(user=self.request.user).order_by(*LIST_ORDERING)
+            return filter_by_tag(queryset, self.request)
         return Note.objects.none()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class NoteDetailAPI(generics.RetrieveUpdateDestroyAPIView):
+class NoteDetailAPI(ConditionalDetailMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = NoteSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
@@ -200,20 +545,23 @@ class NoteDetailAPI(generics.RetrieveUpdateDestroyAPIView):
         return Note.objects.none()
 
 # --- EVENTS API ---
-class EventListCreateAPI(generics.ListCreateAPIView):
+class EventListCreateAPI(ConditionalListMixin, generics.ListCreateAPIView):
     serializer_class = EventSerializer
-    pagination_class = StandardResultsSetPagination
+    cache_namespace = 'api_event_list'
+    pagination_class = SelectableResultsSetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Event.objects.filter(user=self.request.user)
+            queryset = Event.objects.filter(user=self.request.user).order_by(*LIST_ORDERING)
+            queryset = filter_by_date_range(queryset, self.request, 'event_date')
+            return filter_by_tag(queryset, self.request)
         return Event.objects.none()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class EventDetailAPI(generics.RetrieveUpdateDestroyAPIView):
+class EventDetailAPI(ConditionalDetailMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = EventSerializer
     permission_classes = [IsOwnerOrReadOnly]
 
@@ -222,60 +570,173 @@ class EventDetailAPI(generics.RetrieveUpdateDestroyAPIView):
             return Event.objects.filter(user=self.request.user)
         return Event.objects.none()
 
+# --- SEARCH API ---
+class SearchAPI(generics.ListAPIView):
+    """Ranked full-text hits across tasks, habits, notes and events: ``?q=``."""
+    serializer_class = SearchHitSerializer
+    pagination_class = StandardResultsSetPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return search.search(self.request.user, self.request.query_params.get('q'))
+
+# --- SYNC API ---
+class SyncAPI(APIView):
+    """
+    Delta sync: ``?since=<token>`` returns the caller's tasks, habits, notes
+    and events changed after the token plus ``deleted`` tombstones. Send the
+    returned ``next`` token on the following call; repeat immediately while
+    ``more`` is true. Omit ``since`` for a full initial sync.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            data = sync.changes(request.user, request.query_params.get('since'))
+        except sync.InvalidToken:
+            return Response({'detail': 'Invalid sync token.'}, status=400)
+        return Response(data)
+
+# --- CALENDAR FEEDS ---
+def event_feed(request, token):
+    """Streamed ``.ics`` feed; the signed token stands in for a login."""
+    try:
+        user, group = ical.resolve(token)
+    except ical.InvalidFeed:
+        raise Http404("Unknown calendar feed.")
+    events = ical.feed_events(user, group)
+    etag, last_modified = aggregate_validators(events, token)
+    not_modified = get_conditional_response(
+        request, etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if not_modified is not None:
+        response = not_modified
+    else:
+        name = group.name if group else f"{user.username}'s events"
+        response = StreamingHttpResponse(
+            aio.serve_iter(ical.stream(events, name, request.get_host().split(':')[0])),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'inline; filename="events.ics"'
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def calendar_feeds(request):
+    """Subscription URLs for your own events and each of your groups."""
+    def url(group=None):
+        return request.build_absolute_uri(
+            reverse('tasks:event_feed', args=[ical.feed_token(request.user, group)])
+        )
+    groups = request.user.groups.order_by('name')
+    return Response({
+        'personal': url(),
+        'groups': [{'id': g.pk, 'name': g.name, 'url': url(g)} for g in groups],
+    })
+
+# --- DASHBOARD API ---
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def dashboard_summary(request):
+    """Counts for the home screen over everything you can see."""
+    return Response(dashboard.summary(request.user))
+
+# --- EXPORT API ---
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_items(request):
+    """
+    Stream all of your tasks, habits, notes and events: ``?fmt=ndjson``
+    (default) or ``?fmt=csv``, optionally ``?type=tasks,notes``.
+    """
+    fmt = request.query_params.get('fmt', 'ndjson')
+    if fmt not in export.FORMATS:
+        return Response({'fmt': [f"Choose one of {', '.join(export.FORMATS)}."]}, status=400)
+    try:
+        kinds = export.parse_kinds(request.query_params.get('type'))
+    except ValueError as exc:
+        return Response({'type': [str(exc)]}, status=400)
+    response = StreamingHttpResponse(
+        aio.serve_iter(export.stream(request.user, fmt, kinds)), content_type=export.CONTENT_TYPES[fmt],
+    )
+    filename = f"export-{request.user.username}-{timezone.localdate():%Y%m%d}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+# --- CACHE STATS API ---
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    return Response(caching.stats())
+
 # --- WEB VIEWS WITH FEEDBACK, USER DATA, AND DELETE ACTIONS ---
+LIST_PAGE_SIZE = 10
+
+def visible_page(request, model):
+    """
+    Page ``?page=`` of ``model`` objects visible to the user. With the
+    versioned cache enabled the rows and count are cached per user and per
+    group; the rendered HTML is not, since it carries the CSRF token and
+    flash messages.
+    """
+    user = request.user
+    number = request.GET.get('page')
+    if not caching.enabled():
+        return Paginator(VisibleList(model, user), LIST_PAGE_SIZE).get_page(number)
+
+    def compute():
+        page = Paginator(VisibleList(model, user), LIST_PAGE_SIZE).get_page(number)
+        return list(page.object_list), page.paginator.count, page.number
+
+    key = caching.make_key(
+        f'{model._meta.model_name}_list', user.pk, group_ids(user), params=(number,)
+    )
+    objects, count, page_number = caching.get_or_set(key, compute)
+    # The paginator only needs the total, which range() provides without a query.
+    return Page(objects, page_number, Paginator(range(count), LIST_PAGE_SIZE))
+
 @login_required
 def task_list(request):
-    user = request.user
-    own    = Task.objects.filter(user=user)
-    shared = Task.objects.filter(groups__in=user.groups.all())
-    tasks  = (own | shared).distinct()
-    paginator    = Paginator(tasks, 10)
-    page         = request.GET.get('page')
-    tasks_page   = paginator.get_page(page)
+    tasks_page = visible_page(request, Task)
+    upcoming = recurrence.next_occurrences([task for task in tasks_page if task.recurring])
+    for task in tasks_page:
+        task.next_occurrence = upcoming.get(task.pk)
     return render(request, 'tasks/task_list.html', {'tasks': tasks_page})
 
 @login_required
 def habit_list(request):
-    user    = request.user
-    own      = Habit.objects.filter(user=user)
-    shared   = Habit.objects.filter(groups__in=user.groups.all())
-    habits   = (own | shared).distinct()
-    paginator  = Paginator(habits, 10)
-    page       = request.GET.get('page')
-    habits_page= paginator.get_page(page)
+    habits_page = visible_page(request, Habit)
     return render(request, 'tasks/habit_list.html', {'habits': habits_page})
 
 @login_required
 def note_list(request):
-    user    = request.user
-    own      = Note.objects.filter(user=user)
-    shared   = Note.objects.filter(groups__in=user.groups.all())
-    notes    = (own | shared).distinct()
-    paginator  = Paginator(notes, 10)
-    page       = request.GET.get('page')
-    notes_page = paginator.get_page(page)
+    notes_page = visible_page(request, Note)
     return render(request, 'tasks/note_list.html', {'notes': notes_page})
 
 @login_required
 def event_list(request):
-    user     = request.user
-    own       = Event.objects.filter(user=user)
-    shared    = Event.objects.filter(groups__in=user.groups.all())
-    events    = (own | shared).distinct()
-    paginator   = Paginator(events, 10)
-    page        = request.GET.get('page')
-    events_page = paginator.get_page(page)
-    return render(request, 'tasks/event_list.html', {'events': events_page})
+    events_page = visible_page(request, Event)
+    feed_url = request.build_absolute_uri(
+        reverse('tasks:event_feed', args=[ical.feed_token(request.user)])
+    )
+    return render(request, 'tasks/event_list.html', {'events': events_page, 'feed_url': feed_url})
 
 @login_required
 def task_create(request):
     if request.method == 'POST':
         form = TaskForm(request.POST)
         if form.is_valid():
-            obj = form.save(commit=False)
-            obj.user = request.user
-            obj.save()
-            form.save_m2m()
+            with transaction.atomic():
+                obj = form.save(commit=False)
+                obj.user = request.user
+                obj.save()
+                form.save_m2m()
             messages.success(request, 'Task created!')
             return redirect('tasks:task_list')
     else:
@@ -307,6 +768,14 @@ def habit_create(request):
         form = HabitForm()
     return render(request, 'tasks/habit_form.html', {'form': form})
 
+@login_required
+def habit_done(request, pk):
+    habit = get_object_or_404(Habit, pk=pk, user=request.user)
+    if request.method == 'POST':
+        habit = streaks.check_in(habit, request.user)
+        messages.success(request, f'{habit.name}: streak {habit.streak}!')
+    return redirect('tasks:habit_list')
+
 @login_required
 @in_groups(['Admins', 'dev'])
 def habit_delete(request, pk):
@@ -0,0 +1,78 @@
+"""
+Own-or-group visibility for Task, Habit, Note and Event.
+
+An object is visible to a user when they own it or when it is shared with
+one of their groups. The shared half is expressed as a semi-join
+(``pk IN (SELECT <fk> FROM <through> WHERE group_id IN ...)``) instead of a
+JOIN on ``groups``, so the result never contains duplicates and no
+``DISTINCT`` over the wide TextField columns is needed.
+
+``VisibleList`` pages through the same rows for the list views. On
+databases that allow LIMIT inside a UNION (PostgreSQL) each page is the
+UNION of two queries that each stop at the end of the page: the owner's
+rows, read in order from the (user, created) index, and the shared rows,
+found through the (group_id, obj_id) index of the through table. The
+single OR above cannot use either index for its ORDER BY ... LIMIT and
+filters and sorts every visible row instead.
+"""
+from django.db import connections, router
+from django.db.models import Q
+
+from .membership import group_ids
+
+# Default ordering for the list pages; backed by the (user, created) indexes.
+LIST_ORDERING = ('-created', '-id')
+
+
+def shared_ids(model, user):
+    """Subquery of ``model`` ids shared with any of ``user``'s groups."""
+    through = model.groups.through
+    fk = f"{model._meta.model_name}_id"
+    return through.objects.filter(group_id__in=group_ids(user)).values(fk)
+
+
+def visible_to(model, user):
+    """Everything ``user`` owns or can see through a group, newest first."""
+    return model.objects.filter(
+        Q(user=user) | Q(pk__in=shared_ids(model, user))
+    ).order_by(*LIST_ORDERING)
+
+
+class VisibleList:
+    """``visible_to(model, user)`` as a sliceable sequence for Paginator."""
+
+    def __init__(self, model, user):
+        self.model = model
+        self.user = user
+        self._count = None
+
+    def _union_supported(self):
+        database = router.db_for_read(self.model) or 'default'
+        return connections[database].features.supports_slicing_ordering_in_compound
+
+    def count(self):
+        if self._count is None:
+            if self._union_supported():
+                # Two index-only counts instead of one over the OR.
+                own = self.model.objects.filter(user=self.user)
+                shared = self.model.objects.filter(pk__in=shared_ids(self.model, self.user))
+                self._count = own.count() + shared.exclude(user=self.user).count()
+            else:
+                self._count = visible_to(self.model, self.user).count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if index.stop is None or index.step is not None or not self._union_supported():
+            return visible_to(self.model, self.user)[index]
+        own = self.model.objects.filter(user=self.user)
+        shared = self.model.objects.filter(pk__in=shared_ids(self.model, self.user))
+        return list(
+            own.order_by(*LIST_ORDERING)[:index.stop]
+            .union(shared.order_by(*LIST_ORDERING)[:index.stop])
+            .order_by(*LIST_ORDERING)[index.start or 0:index.stop]
+        )
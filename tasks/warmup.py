@@ -0,0 +1,189 @@
+"""
+Worker warm-up, run before a process serves its first request.
+
+A fresh process otherwise pays on its first requests for importing DRF,
+drf_yasg and the REST views, building the boto3 EventBridge client,
+populating the URL resolver, compiling templates (kept by the cached
+template loader) and connecting to the database.
+
+``mysite.wsgi`` / ``mysite.asgi`` call ``on_load`` with the mode from
+``DJANGO_WARMUP``:
+
+* ``preload`` (set by gunicorn.conf.py when ``preload_app`` is on): warm up
+  synchronously in the gunicorn master, close the database connections so
+  no socket is shared across the fork, and let ``post_fork`` open each
+  worker's own persistent connection. Workers start warm. If the warm-up
+  fails in the master, the server still starts and every worker warms up
+  in the background instead.
+* ``background`` (default): warm up in a thread of the serving process;
+  ``/health/`` answers 503 until it has finished, so the load balancer only
+  routes to warm workers. A failed attempt (say, the database not taking
+  connections yet) is retried with exponential backoff, up to
+  ``RETRY_MAX_DELAY`` apart, so a worker recovers once the cause is gone.
+* ``off``: nothing.
+
+A process that never called ``on_load`` (tests, management commands)
+counts as ready.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("tasks")
+
+_state = None  # None: not requested; "warming"; "ready"; "failed"
+timings = {}
+
+RETRY_DELAY = 1.0  # seconds before the first retry; doubles after each failure
+RETRY_MAX_DELAY = 30.0
+
+
+def _imports():
+    import drf_yasg.generators  # noqa: F401
+    import rest_framework.renderers  # noqa: F401
+    from . import views  # noqa: F401
+
+
+def _events_client():
+    from . import aws_events
+    aws_events._client()
+
+
+def _urls():
+    from django.urls import get_resolver, reverse
+    resolver = get_resolver()
+    resolver._populate()
+    reverse('tasks:task_list')
+
+
+def _templates():
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError
+    from django.template.loader import get_template
+
+    root = os.path.join(os.path.dirname(__file__), 'templates')
+    names = ['rest_framework/api.html']
+    for directory, _, files in os.walk(root):
+        names += [
+            os.path.relpath(os.path.join(directory, name), root)
+            for name in files if name.endswith('.html')
+        ]
+    for name in names:
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError):
+            logger.warning("Warm-up could not compile template %s", name)
+
+
+def _serializers():
+    from . import fastlist, views
+    for view in (views.TaskListCreateAPI, views.HabitListCreateAPI,
+                 views.NoteListCreateAPI, views.EventListCreateAPI):
+        fastlist._plan(view.serializer_class)
+
+
+def connect():
+    """Open (and check) this process's database connections."""
+    for connection in connections.all():
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+
+STEPS = (
+    ('imports', _imports),
+    ('events_client', _events_client),
+    ('urls', _urls),
+    ('templates', _templates),
+    ('serializers', _serializers),
+    ('database', connect),
+)
+
+
+def warm():
+    global _state
+    _state = "warming"
+    start = time.perf_counter()
+    try:
+        for name, step in STEPS:
+            step_start = time.perf_counter()
+            step()
+            timings[name] = round((time.perf_counter() - step_start) * 1000, 1)
+    except Exception:
+        _state = "failed"
+        logger.exception("Warm-up failed")
+        raise
+    timings['total'] = round((time.perf_counter() - start) * 1000, 1)
+    _state = "ready"
+    logger.info("Warm-up done in %.0f ms: %s", timings['total'], timings)
+
+
+def on_load(mode=None):
+    """Called by the WSGI/ASGI module once the application is built."""
+    from . import checks
+    for warning in checks.pool_covers_async_threads():
+        logger.warning("%s %s (%s)", warning.msg, warning.hint, warning.id)
+    mode = mode or getattr(settings, 'WARMUP_MODE', 'background')
+    if mode == 'preload':
+        try:
+            warm()
+        except Exception:
+            # Logged by warm(). post_fork warms each worker up in the background.
+            pass
+        connections.close_all()
+        from . import pooling
+        pooling.close_all()  # pooled connections must not cross the fork either
+    elif mode == 'background':
+        _start_background()
+
+
+def _start_background():
+    global _state
+    _state = "warming"
+    threading.Thread(target=_warm_quietly, name='warmup', daemon=True).start()
+
+
+def _warm_quietly():
+    delay = RETRY_DELAY
+    while True:
+        try:
+            warm()
+        except Exception:
+            pass  # logged by warm(); /health/ answers 503 until an attempt succeeds
+        finally:
+            # Connections are per thread: close this one (or, with the pooled
+            # engine, hand it to the pool for the first requests).
+            connections.close_all()
+        if _state == "ready":
+            return
+        time.sleep(delay)
+        delay = min(delay * 2, RETRY_MAX_DELAY)
+
+
+def post_fork():
+    """gunicorn ``post_fork`` hook: give the worker its own connections."""
+    from . import pooling
+    if _state != "ready":
+        # The warm-up failed in the master; retry it in this worker.
+        _start_background()
+        return
+    try:
+        connect()
+        if getattr(settings, 'ASYNC_VIEWS', False):
+            # Under ASGI this thread never serves a request: hand its
+            # connections back so they are idle in the pool for tasks.aio.
+            connections.close_all()
+        pooling.prefill_all()
+    except Exception:
+        logger.exception("Worker could not connect to the database")
+
+
+def is_ready():
+    return _state in (None, "ready")
+
+
+def status():
+    return {'state': _state or "ready", 'timings_ms': timings}